@@ -0,0 +1,579 @@
+# In-process HTTP load benchmark for the blog and user endpoints
+#
+# Drives the FastAPI app through httpx's ASGI transport (no network, no server) against
+# a freshly seeded SQLite database, runs weighted request mixes with a number of
+# concurrent clients, and reports req/s and p50/p95/p99 latency per mix and per route.
+# Together the mixes cover every route of blog/routers.py and user/routers.py; a route
+# added without a benchmark entry makes the run fail.
+#
+#     python -m benchmarks.http_load
+#     python -m benchmarks.http_load --posts 20000 --requests 5000 --concurrency 32
+#     python -m benchmarks.http_load --output results.json --baseline benchmarks/baselines/http_load.json
+#     python -m benchmarks.http_load --save-baseline benchmarks/baselines/http_load.json
+#
+# With --baseline the run exits with status 1 when a mix lost more than --threshold
+# (default 20%) of its req/s or its p95 latency grew by more than that.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+TAGS = [f"tag{i}" for i in range(30)]
+
+
+@dataclass
+class Context:
+    """Seeded ids the request builders pick from; writes keep the pools up to date"""
+    rng: random.Random
+    users: dict[int, str]  # id -> username
+    posts: dict[int, int]  # id -> author id
+    comments: dict[int, int]  # id -> author id
+    likes: set[tuple[int, int]]  # (post id, user id)
+    # rows only the delete routes use, so reads never hit a deleted id: (id, author id) / id
+    disposable_posts: list[tuple[int, int]] = field(default_factory=list)
+    disposable_comments: list[tuple[int, int]] = field(default_factory=list)
+    disposable_users: list[int] = field(default_factory=list)
+    etags: dict[str, str] = field(default_factory=dict)
+    cursors: dict[str, str] = field(default_factory=dict)
+    tokens: dict[tuple, str] = field(default_factory=dict)  # (user id, roles) -> access token
+    unique: itertools.count = field(default_factory=itertools.count)
+
+    def post(self) -> int:
+        return self.rng.choice(list(self.posts))
+
+    def user(self) -> int:
+        return self.rng.choice(list(self.users))
+
+    def comment(self) -> int:
+        return self.rng.choice(list(self.comments))
+
+    def bearer(self, user_id: int, roles: tuple[str, ...] = ()) -> dict:
+        """Authorization header for `user_id`; tokens are signed locally, without a login request"""
+        key = (user_id, roles)
+        if key not in self.tokens:
+            from src.modules.auth.services import auth_service
+            # no role table version: the server compiles the permissions from the role names
+            claims = {"sub": self.users[user_id], "uid": user_id, "roles": list(roles)}
+            self.tokens[key] = auth_service.create_access_token(claims)
+        return {"Authorization": f"Bearer {self.tokens[key]}"}
+
+    def admin(self) -> dict:
+        return self.bearer(min(self.users), ("admin",))
+
+
+@dataclass
+class Route:
+    method: str
+    path: str  # route template, used for the coverage check
+    build: Callable[[Context], tuple[str, dict]]  # -> (url, httpx request kwargs)
+    after: Optional[Callable[[Context, object, dict], None]] = None  # (ctx, response, kwargs)
+
+
+def _post_body(ctx: Context, author_id: int) -> dict:
+    n = next(ctx.unique)
+    return {
+        "title": f"Benchmark post {n}",
+        "content": "Lorem ipsum dolor sit amet. " * 40,
+        "excerpt": "Lorem ipsum",
+        "tags": ctx.rng.sample(TAGS, 2),
+        "author_id": author_id,
+    }
+
+
+def _conditional(ctx: Context, url: str, params: dict | None = None) -> dict:
+    key = url + json.dumps(params or {}, sort_keys=True)
+    headers = {"If-None-Match": ctx.etags[key]} if key in ctx.etags else {}
+    return {"params": params, "headers": headers, "etag_key": key}
+
+
+def _remember_etag(ctx: Context, response, kwargs: dict) -> None:
+    if "etag" in response.headers:
+        ctx.etags[kwargs["etag_key"]] = response.headers["etag"]
+
+
+def _remember_cursor(ctx: Context, response, kwargs: dict) -> None:
+    cursor = response.headers.get("x-next-cursor")
+    if cursor:
+        ctx.cursors["posts"] = cursor
+    else:
+        ctx.cursors.pop("posts", None)
+
+
+def _created(pool: str, owner: Callable[[dict], int] | None = None):
+    def after(ctx: Context, response, kwargs: dict) -> None:
+        if response.status_code == 200:
+            target = getattr(ctx, pool)
+            if isinstance(target, dict):
+                target[response.json()["id"]] = owner(kwargs)
+            else:
+                target.append(response.json()["id"])
+    return after
+
+
+def _delete_post(ctx: Context) -> tuple[str, dict]:
+    post_id, author_id = ctx.disposable_posts.pop() if ctx.disposable_posts else (0, 0)
+    return f"/api/blogs/posts/{post_id}", {"params": {"current_user_id": author_id}}
+
+
+def _delete_comment(ctx: Context) -> tuple[str, dict]:
+    comment_id, author_id = ctx.disposable_comments.pop() if ctx.disposable_comments else (0, 0)
+    return f"/api/blogs/comments/{comment_id}", {"params": {"current_user_id": author_id}}
+
+
+def _delete_user(ctx: Context) -> tuple[str, dict]:
+    # only users without posts, comments or likes
+    user_id = ctx.disposable_users.pop() if ctx.disposable_users else 0
+    return f"/api/users/{user_id}", {}
+
+
+def _like(ctx: Context) -> tuple[str, dict]:
+    post_id, user_id = ctx.post(), ctx.user()
+    while (post_id, user_id) in ctx.likes:
+        post_id, user_id = ctx.post(), ctx.user()
+    return "/api/blogs/likes/", {"params": {"post_id": post_id, "current_user_id": user_id}}
+
+
+def _liked(ctx: Context, response, kwargs: dict) -> None:
+    ctx.likes.add((kwargs["params"]["post_id"], kwargs["params"]["current_user_id"]))
+
+
+def _unlike(ctx: Context) -> tuple[str, dict]:
+    post_id, user_id = ctx.likes.pop() if ctx.likes else (ctx.post(), ctx.user())
+    return "/api/blogs/likes/", {"params": {"post_id": post_id, "current_user_id": user_id}}
+
+
+def _new_user(ctx: Context) -> dict:
+    n = next(ctx.unique)
+    return {"username": f"bench{n}", "email": f"bench{n}@example.com", "full_name": f"Bench {n}", "password": "Passw0rd!"}
+
+
+def _update_post(ctx: Context) -> tuple[str, dict]:
+    post_id = ctx.post()
+    return f"/api/blogs/posts/{post_id}", {
+        "params": {"current_user_id": ctx.posts[post_id]},
+        "json": {"title": f"Edited {next(ctx.unique)}", "tags": ctx.rng.sample(TAGS, 2)},
+    }
+
+
+def _update_comment(ctx: Context) -> tuple[str, dict]:
+    comment_id = ctx.comment()
+    return f"/api/blogs/comments/{comment_id}", {
+        "params": {"current_user_id": ctx.comments[comment_id]},
+        "json": {"content": f"Edited {next(ctx.unique)}"},
+    }
+
+
+ROUTES: dict[str, Route] = {
+    # posts
+    "create_post": Route(
+        "POST", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", {"json": _post_body(ctx, ctx.user())}),
+        _created("posts", lambda kwargs: kwargs["json"]["author_id"]),
+    ),
+    "bulk_create_posts": Route(
+        "POST", "/api/blogs/posts/bulk",
+        lambda ctx: ("/api/blogs/posts/bulk", {"json": [_post_body(ctx, ctx.user()) for _ in range(50)]}),
+    ),
+    "get_post": Route("GET", "/api/blogs/posts/{post_id}", lambda ctx: (f"/api/blogs/posts/{ctx.post()}", {})),
+    "get_post_conditional": Route(
+        "GET", "/api/blogs/posts/{post_id}",
+        lambda ctx: (url := f"/api/blogs/posts/{ctx.rng.randint(1, 50)}", _conditional(ctx, url)),
+        _remember_etag,
+    ),
+    "get_post_detail": Route(
+        "GET", "/api/blogs/posts/{post_id}/detail",
+        lambda ctx: (f"/api/blogs/posts/{ctx.post()}/detail", {"headers": ctx.bearer(ctx.user())}),
+    ),
+    "update_post": Route("PUT", "/api/blogs/posts/{post_id}", _update_post),
+    "delete_post": Route("DELETE", "/api/blogs/posts/{post_id}", _delete_post),
+    "list_posts": Route(
+        "GET", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", {"params": {"skip": ctx.rng.randint(0, 200), "limit": 20}}),
+    ),
+    "list_posts_cursor": Route(
+        "GET", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", {"params": {"limit": 20, **({"cursor": ctx.cursors["posts"]} if "posts" in ctx.cursors else {})}}),
+        _remember_cursor,
+    ),
+    "list_posts_conditional": Route(
+        "GET", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", _conditional(ctx, "/api/blogs/posts/", {"limit": 20})),
+        _remember_etag,
+    ),
+    "list_posts_by_tag": Route(
+        "GET", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", {"params": {"tag": ctx.rng.choice(TAGS), "limit": 20}}),
+    ),
+    "list_posts_by_author": Route(
+        "GET", "/api/blogs/posts/",
+        lambda ctx: ("/api/blogs/posts/", {"params": {"author_id": ctx.user(), "limit": 20, "include": "author"}}),
+    ),
+    "search_posts": Route(
+        "GET", "/api/blogs/search",
+        lambda ctx: ("/api/blogs/search", {"params": {"q": ctx.rng.choice(["lorem", "ipsum dolor", "tag3", "amet"]), "limit": 20}}),
+    ),
+    "export_posts": Route("GET", "/api/blogs/export/{entity}", lambda ctx: ("/api/blogs/export/posts", {"headers": ctx.admin()})),
+    "export_comments_csv": Route(
+        "GET", "/api/blogs/export/{entity}",
+        lambda ctx: ("/api/blogs/export/comments", {"params": {"format": "csv"}, "headers": ctx.admin()}),
+    ),
+    "export_likes": Route(
+        "GET", "/api/blogs/export/{entity}",
+        lambda ctx: (
+            "/api/blogs/export/likes",
+            {"params": {"updated_since": (datetime.utcnow() - timedelta(hours=1)).isoformat()}, "headers": ctx.admin()},
+        ),
+    ),
+    # comments
+    "create_comment": Route(
+        "POST", "/api/blogs/comments/",
+        lambda ctx: (
+            "/api/blogs/comments/",
+            {"params": {"current_user_id": (user_id := ctx.user())}, "json": {"post_id": ctx.post(), "author_id": user_id, "content": "Nice post!"}},
+        ),
+        _created("comments", lambda kwargs: kwargs["params"]["current_user_id"]),
+    ),
+    "bulk_create_comments": Route(
+        "POST", "/api/blogs/comments/bulk",
+        lambda ctx: (
+            "/api/blogs/comments/bulk",
+            {"params": {"current_user_id": ctx.user()}, "json": [{"post_id": ctx.post(), "content": "Bulk comment"} for _ in range(50)]},
+        ),
+    ),
+    "get_comment": Route("GET", "/api/blogs/comments/{comment_id}", lambda ctx: (f"/api/blogs/comments/{ctx.comment()}", {})),
+    "update_comment": Route("PUT", "/api/blogs/comments/{comment_id}", _update_comment),
+    "delete_comment": Route("DELETE", "/api/blogs/comments/{comment_id}", _delete_comment),
+    "list_comments": Route(
+        "GET", "/api/blogs/posts/{post_id}/comments/",
+        lambda ctx: (f"/api/blogs/posts/{ctx.post()}/comments/", {"params": {"limit": 10, **ctx.rng.choice([{"include": "author"}, {}])}}),
+    ),
+    # likes
+    "like_post": Route("POST", "/api/blogs/likes/", _like, _liked),
+    "unlike_post": Route("DELETE", "/api/blogs/likes/", _unlike),
+    "count_likes": Route("GET", "/api/blogs/posts/{post_id}/likes/count", lambda ctx: (f"/api/blogs/posts/{ctx.post()}/likes/count", {})),
+    "has_liked": Route(
+        "GET", "/api/blogs/posts/{post_id}/likes/check",
+        lambda ctx: (f"/api/blogs/posts/{ctx.post()}/likes/check", {"params": {"current_user_id": ctx.user()}}),
+    ),
+    "list_likes": Route(
+        "GET", "/api/blogs/posts/{post_id}/likes/", lambda ctx: (f"/api/blogs/posts/{ctx.post()}/likes/", {"params": {"limit": 10}}),
+    ),
+    # users
+    "create_user": Route(
+        "POST", "/api/users/", lambda ctx: ("/api/users/", {"json": _new_user(ctx)}), _created("disposable_users"),
+    ),
+    "bulk_create_users": Route(
+        "POST", "/api/users/bulk", lambda ctx: ("/api/users/bulk", {"json": [_new_user(ctx) for _ in range(10)]}),
+    ),
+    "list_users": Route(
+        "GET", "/api/user/all-users", lambda ctx: ("/api/user/all-users", {"params": {"limit": 50, "skip": ctx.rng.randint(0, 50)}}),
+    ),
+    "get_user": Route(
+        "GET", "/api/users/{username}", lambda ctx: (f"/api/users/{ctx.users[ctx.user()]}", {}),
+    ),
+    "update_user": Route(
+        "PUT", "/api/users/{user_id}",
+        lambda ctx: (f"/api/users/{ctx.user()}", {"json": {"full_name": f"Renamed {next(ctx.unique)}"}}),
+    ),
+    "delete_user": Route("DELETE", "/api/users/{user_id}", _delete_user),
+}
+
+# route name -> weight
+MIXES: dict[str, dict[str, int]] = {
+    # anonymous reading: lists, post pages, revalidation, search
+    "browse": {
+        "list_posts": 20, "list_posts_cursor": 10, "list_posts_conditional": 10, "list_posts_by_tag": 8,
+        "list_posts_by_author": 5, "get_post": 15, "get_post_conditional": 8, "get_post_detail": 10,
+        "list_comments": 6, "get_comment": 2, "count_likes": 2, "has_liked": 1, "list_likes": 1, "search_posts": 5,
+    },
+    # signed-in activity: likes, comments, edits
+    "engage": {
+        "like_post": 25, "unlike_post": 10, "create_comment": 20, "update_comment": 8, "delete_comment": 4,
+        "create_post": 10, "update_post": 10, "delete_post": 3, "get_post_detail": 10,
+    },
+    # account pages and admin
+    "users": {"get_user": 50, "list_users": 20, "update_user": 15, "create_user": 10, "delete_user": 5},
+    # imports and exports
+    "bulk": {
+        "bulk_create_posts": 30, "bulk_create_comments": 30, "bulk_create_users": 10,
+        "export_posts": 10, "export_comments_csv": 10, "export_likes": 10,
+    },
+}
+# the bulk mix moves a lot of data per request
+MIX_REQUEST_FACTOR = {"bulk": 0.05}
+
+
+def check_route_coverage(app) -> None:
+    """Fail if a blog or user route has no benchmark entry"""
+    from src.modules.blog.routers import router as blog_router
+    from src.modules.user.routers import router as user_router
+
+    covered = {(route.method, route.path) for route in ROUTES.values()}
+    missing = [
+        f"{method} /api{route.path}"
+        for route in (*blog_router.routes, *user_router.routes)
+        for method in route.methods
+        if (method, f"/api{route.path}") not in covered
+    ]
+    unused = set(ROUTES) - {name for mix in MIXES.values() for name in mix}
+    if missing or unused:
+        raise SystemExit(f"Benchmark routes out of date: missing {missing}, not in any mix {sorted(unused)}")
+
+
+async def seed_database(engine, args) -> Context:
+    """Insert users, posts, tags, comments and likes directly; returns the id pools"""
+    from sqlalchemy import insert, select
+    from src.core.db_connection import session_scope
+    from src.core.security import password_hasher
+    from src.modules.blog.enums import CommentApprovalStatus, PostStatus
+    from src.modules.blog.models import BlogPost, Comment, Likes, PostTag, Tag
+    from src.modules.blog.services import BlogService
+    from src.modules.user.models import User
+
+    rng = random.Random(args.seed)
+    hashed_password = await password_hasher.hash("Passw0rd!")
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "full_name": f"User {i}", "hashed_password": hashed_password, "disabled": 0}
+            for i in range(args.users + args.disposable)
+        ])
+        users = dict((await conn.execute(select(User.id, User.username).order_by(User.id))).all())
+        user_ids = list(users)
+        active_users, disposable_users = user_ids[:args.users], user_ids[args.users:]
+
+        posts = []
+        for i in range(args.posts + args.disposable):
+            created_at = now - timedelta(minutes=args.posts + args.disposable - i)
+            posts.append({
+                "title": f"Post {i} about {rng.choice(TAGS)}",
+                "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * rng.randint(5, 40),
+                "excerpt": "Lorem ipsum",
+                "tags": ",".join(tags := rng.sample(TAGS, rng.randint(0, 3))),
+                "author_id": rng.choice(active_users),
+                "status": rng.choice([PostStatus.PUBLISHED] * 4 + [PostStatus.DRAFT]),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "likes_count": 0,
+                "comments_count": 0,
+            })
+        await conn.execute(insert(BlogPost), posts)
+        post_authors = dict((await conn.execute(select(BlogPost.id, BlogPost.author_id).order_by(BlogPost.id))).all())
+        post_ids = list(post_authors)
+
+        await conn.execute(insert(Tag), [{"name": name} for name in TAGS])
+        tag_ids = dict((await conn.execute(select(Tag.name, Tag.id))).all())
+        await conn.execute(insert(PostTag), [
+            {"post_id": post_id, "tag_id": tag_ids[name]}
+            for post_id, post in zip(post_ids, posts) if post["tags"] for name in post["tags"].split(",")
+        ])
+
+        comments = [
+            {
+                "post_id": post_id, "author_id": rng.choice(active_users), "content": "Great read, thanks!",
+                "created_at": now, "approved": rng.choice([CommentApprovalStatus.APPROVED] * 3 + [CommentApprovalStatus.PENDING]),
+            }
+            for post_id in post_ids[:args.posts] for _ in range(args.comments_per_post)
+        ]
+        comments += [
+            {"post_id": rng.choice(post_ids[:args.posts]), "author_id": rng.choice(active_users), "content": "Disposable", "created_at": now, "approved": CommentApprovalStatus.APPROVED}
+            for _ in range(args.disposable)
+        ]
+        await conn.execute(insert(Comment), comments)
+        likes = {
+            (post_id, user_id)
+            for post_id in post_ids[:args.posts]
+            for user_id in rng.sample(active_users, min(args.likes_per_post, len(active_users)))
+        }
+        if likes:
+            await conn.execute(insert(Likes), [{"post_id": p, "user_id": u, "created_at": now} for p, u in likes])
+        comment_authors = dict((await conn.execute(select(Comment.id, Comment.author_id).order_by(Comment.id))).all())
+
+    # denormalized counters as the write paths would have left them
+    async with session_scope() as db:
+        after_id = 0
+        while after_id is not None:
+            after_id, _ = await BlogService().reconcile_counters(db, after_id=after_id, batch_size=1000)
+
+    comment_ids = list(comment_authors)
+    kept_comments = comment_ids[:len(comment_ids) - args.disposable]
+    return Context(
+        rng=rng,
+        users={user_id: users[user_id] for user_id in active_users},
+        posts={post_id: post_authors[post_id] for post_id in post_ids[:args.posts]},
+        comments={comment_id: comment_authors[comment_id] for comment_id in kept_comments},
+        likes=likes,
+        disposable_posts=[(post_id, post_authors[post_id]) for post_id in post_ids[args.posts:]],
+        disposable_comments=[(comment_id, comment_authors[comment_id]) for comment_id in comment_ids[len(kept_comments):]],
+        disposable_users=disposable_users,
+    )
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted `values`, in milliseconds"""
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(q / 100 * len(values)))] * 1000, 2)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float | None = None) -> dict:
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+    if elapsed is not None:
+        summary["rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+async def run_mix(client, ctx: Context, mix: dict[str, int], requests: int, concurrency: int) -> dict:
+    names, weights = list(mix), list(mix.values())
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    statuses: Counter = Counter()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            name = ctx.rng.choices(names, weights)[0]
+            route = ROUTES[name]
+            url, kwargs = route.build(ctx)
+            request_kwargs = {key: value for key, value in kwargs.items() if key != "etag_key"}
+            started = time.perf_counter()
+            response = await client.request(route.method, url, **request_kwargs)
+            latencies[name].append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                errors[name] += 1
+            elif route.after:
+                route.after(ctx, response, kwargs)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize([value for values in latencies.values() for value in values], sum(errors.values()), elapsed)
+    result["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    result["routes"] = {name: summarize(latencies[name], errors[name]) for name in names if latencies[name]}
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions of req/s or p95 latency beyond `threshold` (a fraction) per mix"""
+    regressions = []
+    for name, current in results["mixes"].items():
+        base = baseline.get("mixes", {}).get(name)
+        if not base:
+            continue
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {current['rps']} req/s vs baseline {base['rps']}")
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms vs baseline {base['p95_ms']} ms")
+    return regressions
+
+
+async def main(args) -> dict:
+    # the database and settings must be chosen before the application is imported
+    directory = tempfile.mkdtemp(prefix="blog-bench-")
+    os.environ["FASTAPI_ENV"] = "production"  # no SQL echo, production pragmas
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{directory}/bench.db"
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["COUNTER_RECONCILE_INTERVAL_SECONDS"] = "0"
+    from src.core.db_connection import dispose_engines, get_engine, init_db
+    from src.main import app
+
+    check_route_coverage(app)
+    engine = get_engine()
+    await init_db(engine)
+    started = time.perf_counter()
+    ctx = await seed_database(engine, args)
+    print(f"Seeded {args.users} users, {args.posts} posts in {time.perf_counter() - started:.1f}s ({directory})")
+
+    results = {
+        "meta": {
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users, "posts": args.posts, "comments_per_post": args.comments_per_post,
+            "likes_per_post": args.likes_per_post, "requests": args.requests, "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "mixes": {},
+    }
+    try:
+        await run_mixes(app, ctx, args, results)
+    finally:
+        await dispose_engines()
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+async def run_mixes(app, ctx: Context, args, results: dict) -> None:
+    import httpx
+
+    # requests go straight into the ASGI app: no sockets, no server process;
+    # unhandled exceptions become 500 responses and count as errors
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name in args.mixes:
+                requests = max(1, int(args.requests * MIX_REQUEST_FACTOR.get(name, 1)))
+                result = await run_mix(client, ctx, MIXES[name], requests, args.concurrency)
+                results["mixes"][name] = result
+                print(
+                    f"{name:>8}: {result['rps']:>8} req/s  p50 {result['p50_ms']:>7} ms  p95 {result['p95_ms']:>7} ms  "
+                    f"p99 {result['p99_ms']:>7} ms  errors {result['errors']}"
+                )
+                if args.verbose:
+                    for route, summary in sorted(result["routes"].items()):
+                        print(f"          {route:<24} n={summary['requests']:<5} p50 {summary['p50_ms']:>7} ms  p95 {summary['p95_ms']:>7} ms  errors {summary['errors']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process HTTP load benchmark")
+    parser.add_argument("--mixes", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mix (bulk runs a fraction)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--comments-per-post", type=int, default=5)
+    parser.add_argument("--likes-per-post", type=int, default=3)
+    parser.add_argument("--disposable", type=int, default=500, help="extra posts/users/comments the delete routes consume")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="password hashing cost; 12 in production")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare with a previous --output/--save-baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed req/s loss and p95 growth (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("-v", "--verbose", action="store_true", help="per-route latency")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
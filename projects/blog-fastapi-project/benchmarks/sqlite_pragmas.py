@@ -0,0 +1,125 @@
+# Mixed read/write throughput of the SQLite pragma profiles
+#
+# Each profile gets a fresh database file and engine. Reader tasks fetch single posts
+# and list pages while writer tasks insert posts, one transaction each, for a fixed time.
+# Compare the rollback-journal defaults with the WAL production profile:
+#
+#     python -m benchmarks.sqlite_pragmas
+#     python -m benchmarks.sqlite_pragmas --readers 16 --writers 4 --duration 10 --json pragmas.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.core.db_connection import SQLITE_PRAGMA_PROFILES, init_db, install_sqlite_pragmas
+from src.modules.blog.models import BlogPost
+from src.modules.user.models import User
+
+PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no mmap, 2 MiB cache
+    "default": {},
+    "production": SQLITE_PRAGMA_PROFILES["production"],
+}
+
+
+async def run_profile(name: str, pragmas: dict, args) -> dict:
+    path = os.path.join(args.directory, f"bench-{name}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    connections = args.readers + args.writers
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=connections, max_overflow=0)
+    install_sqlite_pragmas(engine, pragmas)
+    await init_db(engine)
+    async with engine.begin() as conn:
+        author_id = (await conn.execute(
+            insert(User).values(username="bench", email="bench@example.com").returning(User.id)
+        )).scalar_one()
+        await conn.execute(insert(BlogPost), [
+            {"title": f"Seed {i}", "content": "x" * 500, "author_id": author_id} for i in range(args.seed_posts)
+        ])
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    latencies = {"reads": [], "writes": []}
+    deadline = time.perf_counter() + args.duration
+
+    async def reader():
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with engine.connect() as conn:
+                    if rng.random() < 0.5:
+                        post_id = rng.randint(1, args.seed_posts)
+                        (await conn.execute(select(BlogPost).where(BlogPost.id == post_id))).first()
+                    else:
+                        (await conn.execute(select(BlogPost).order_by(BlogPost.created_at, BlogPost.id).limit(20))).all()
+            except OperationalError:
+                counts["errors"] += 1
+                continue
+            latencies["reads"].append(time.perf_counter() - started)
+            counts["reads"] += 1
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(BlogPost).values(
+                        title="Bench", content="x" * 500, author_id=author_id, created_at=datetime.utcnow()
+                    ))
+            except OperationalError:
+                counts["errors"] += 1
+                continue
+            latencies["writes"].append(time.perf_counter() - started)
+            counts["writes"] += 1
+
+    await asyncio.gather(*[reader() for _ in range(args.readers)], *[writer() for _ in range(args.writers)])
+    await engine.dispose()
+
+    def p95_ms(values):
+        return round(sorted(values)[int(len(values) * 0.95)] * 1000, 2) if values else None
+
+    return {
+        "profile": name,
+        "pragmas": pragmas,
+        "reads_per_second": round(counts["reads"] / args.duration, 1),
+        "writes_per_second": round(counts["writes"] / args.duration, 1),
+        "read_p95_ms": p95_ms(latencies["reads"]),
+        "write_p95_ms": p95_ms(latencies["writes"]),
+        "errors": counts["errors"],
+    }
+
+
+async def main(args) -> list[dict]:
+    results = []
+    for name in args.profiles:
+        result = await run_profile(name, PROFILES[name], args)
+        print(
+            f"{name:>10}: {result['reads_per_second']:>8} reads/s  {result['writes_per_second']:>7} writes/s  "
+            f"p95 read {result['read_p95_ms']} ms  p95 write {result['write_p95_ms']} ms  errors {result['errors']}"
+        )
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mixed read/write throughput per SQLite pragma profile")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per profile")
+    parser.add_argument("--seed-posts", type=int, default=1000)
+    parser.add_argument("--directory", default=tempfile.gettempdir(), help="where the database files are created")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    results = asyncio.run(main(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
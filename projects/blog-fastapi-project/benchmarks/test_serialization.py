@@ -0,0 +1,119 @@
+# Micro-benchmarks of the response serialization paths, at 10, 100 and 1000 rows
+#
+# Needs pytest-benchmark (requirements/dev.txt); skipped without it.
+#
+#     python -m pytest benchmarks/test_serialization.py --benchmark-autosave
+#     python -m pytest benchmarks/test_serialization.py --benchmark-compare --benchmark-compare-fail=mean:10%
+#     python -m pytest benchmarks/test_serialization.py --benchmark-group-by=group --benchmark-columns=mean,stddev,ops
+#
+# Results are saved under .benchmarks/; divide a group's mean by the row count for the
+# per-row cost.
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+pytest.importorskip("pytest_benchmark")
+
+from src.modules.blog.enums import PostStatus
+from src.modules.blog.models import BlogPost
+from src.modules.blog.routers import _as_rows
+from src.modules.blog.schemas import BlogPostResponse, BlogPostWithAuthor
+from src.modules.blog.utils import BlogUtils
+from src.modules.user.models import User
+from src.modules.user.schemas import UserSchema
+
+SIZES = [10, 100, 1000]
+
+# what FastAPI does with a return value and `response_model`: validate, then dump to JSON-able data
+POST_LIST_RESPONSE = TypeAdapter(List[BlogPostWithAuthor])
+USER_LIST_RESPONSE = TypeAdapter(list[UserSchema])
+
+
+def make_posts(n: int) -> list[BlogPost]:
+    """Detached ORM rows as the list queries return them"""
+    started = datetime(2024, 1, 1)
+    return [
+        BlogPost(
+            id=i, title=f"Post {i}", content="Lorem ipsum dolor sit amet. " * 40, excerpt="Lorem ipsum",
+            tags="python, fastapi,web" if i % 2 else None, status=PostStatus.PUBLISHED, author_id=i % 7 + 1,
+            created_at=started + timedelta(minutes=i), updated_at=started + timedelta(minutes=i),
+            published_at=started + timedelta(minutes=i), likes_count=i % 13, comments_count=i % 5,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def make_users(n: int) -> list[User]:
+    return [
+        User(id=i, username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}", hashed_password="x", disabled=0)
+        for i in range(1, n + 1)
+    ]
+
+
+def validate_posts(posts: list[BlogPost]) -> list[BlogPostResponse]:
+    return [BlogPostResponse.model_validate(post) for post in posts]
+
+
+def serialize_post_list(posts: list[BlogPost]) -> list:
+    # list_posts without include=author: rows as dicts, response_model_exclude_unset drops "author"
+    rows = _as_rows(posts, BlogPostWithAuthor)
+    return POST_LIST_RESPONSE.dump_python(POST_LIST_RESPONSE.validate_python(rows), mode="json", exclude_unset=True)
+
+
+def convert_tags(tags: list[str]) -> list[list[str]]:
+    return [BlogUtils.convert_tags_to_list(value) for value in tags]
+
+
+def build_user_schemas(users: list[User]) -> list[UserSchema]:
+    # as UserService.get_all_users does
+    return [
+        UserSchema(id=user.id, username=user.username, email=user.email, full_name=user.full_name, disabled=bool(user.disabled))
+        for user in users
+    ]
+
+
+def serialize_user_list(users: list[User]) -> list:
+    # the hand-built schemas are validated a second time against response_model
+    return USER_LIST_RESPONSE.dump_python(USER_LIST_RESPONSE.validate_python(build_user_schemas(users)), mode="json")
+
+
+@pytest.mark.benchmark(group="BlogPostResponse.model_validate")
+@pytest.mark.parametrize("n", SIZES)
+def test_validate_posts(benchmark, n: int):
+    posts = make_posts(n)
+    result = benchmark(validate_posts, posts)
+    assert len(result) == n and result[0].tags == ["python", "fastapi", "web"]
+
+
+@pytest.mark.benchmark(group="list_posts response")
+@pytest.mark.parametrize("n", SIZES)
+def test_serialize_post_list(benchmark, n: int):
+    posts = make_posts(n)
+    result = benchmark(serialize_post_list, posts)
+    assert len(result) == n and result[1]["tags"] == [] and "author" not in result[0]
+
+
+@pytest.mark.benchmark(group="BlogUtils.convert_tags_to_list")
+@pytest.mark.parametrize("n", SIZES)
+def test_convert_tags(benchmark, n: int):
+    tags = [", ".join(f"tag{j}" for j in range(i % 6)) for i in range(n)]
+    result = benchmark(convert_tags, tags)
+    assert len(result) == n and result[3] == ["tag0", "tag1", "tag2"]
+
+
+@pytest.mark.benchmark(group="UserSchema construction")
+@pytest.mark.parametrize("n", SIZES)
+def test_build_user_schemas(benchmark, n: int):
+    users = make_users(n)
+    result = benchmark(build_user_schemas, users)
+    assert len(result) == n and result[0].disabled is False
+
+
+@pytest.mark.benchmark(group="all-users response")
+@pytest.mark.parametrize("n", SIZES)
+def test_serialize_user_list(benchmark, n: int):
+    users = make_users(n)
+    result = benchmark(serialize_user_list, users)
+    assert len(result) == n and result[0]["username"] == "user1"
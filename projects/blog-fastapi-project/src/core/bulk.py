@@ -0,0 +1,75 @@
+# Helpers for /bulk endpoints
+# Items are validated one by one so a bad item is reported by its index instead of
+# failing the whole request; valid items are inserted in batches inside the request's
+# single transaction.
+from typing import Any, Iterator, Optional, Sequence, TypeVar
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkCreateResponse(BaseModel):
+    """`ids[i]` is the new id of item i, or None if it was rejected (see `errors`)"""
+    created: int
+    ids: list[Optional[int]]
+    errors: list[BulkItemError]
+
+
+def check_bulk_size(items: Sequence[Any]) -> None:
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_items} items per request")
+
+
+def validate_items(items: Sequence[Any], model: type[ModelT]) -> tuple[list[tuple[int, ModelT]], list[BulkItemError]]:
+    """Validate raw items; returns (index, model) for valid items and an error per invalid one"""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"] for err in e.errors()
+            )
+            errors.append(BulkItemError(index=index, detail=detail))
+    return valid, errors
+
+
+def batched(items: Sequence[T], size: int | None = None) -> Iterator[Sequence[T]]:
+    size = size or settings.bulk_insert_batch_size
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def insert_returning_ids(db: AsyncSession, model, rows: list[dict]) -> list[int]:
+    """executemany INSERT of `rows` (batched by SQLAlchemy's insertmanyvalues); new ids in row order
+
+    Every row must have the same keys. This is a Core insert on the table: the ORM bulk
+    path drops None values and would split rows with different NULL columns into
+    separate statements.
+    """
+    table = model.__table__
+    if db.bind.dialect.name == "sqlite":
+        # SQLite can't order RETURNING rows, and sort_by_parameter_order would fall back to one
+        # statement per row; rowids of a multi-row INSERT are assigned in VALUES order instead
+        result = await db.execute(insert(table).returning(table.c.id), rows)
+        return sorted(result.scalars().all())
+    result = await db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+    return list(result.scalars().all())
+
+
+def bulk_response(count: int, ids_by_index: dict[int, int], errors: list[BulkItemError]) -> BulkCreateResponse:
+    return BulkCreateResponse(
+        created=len(ids_by_index),
+        ids=[ids_by_index.get(index) for index in range(count)],
+        errors=sorted(errors, key=lambda error: error.index),
+    )
@@ -0,0 +1,127 @@
+# Bounded in-process caches with TTL and LRU eviction
+#
+# Values are shared between requests, so only cache immutable snapshots (pydantic
+# response schemas), never ORM objects bound to a session. Writers invalidate keys
+# with invalidate_after_transaction(): the key is dropped immediately and again when
+# the surrounding transaction ends, so a concurrent reader can't re-populate it with
+# the old row (or a rolled-back one) for the rest of the TTL. Sessions on a read replica
+# never fill the caches: a lagging replica could store a row older than the last
+# invalidation, and the entry would then outlive the write that should have dropped it.
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+_PENDING_INVALIDATIONS = "pending_cache_invalidations"
+# session.info flag of sessions that read from a replica (see get_read_db_session)
+REPLICA_SESSION = "replica"
+
+# name -> cache, for stats
+_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: float = 60.0, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        """Store a value; `ttl_seconds` overrides the cache default for this entry"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def get_cache_stats() -> dict[str, dict]:
+    """Hit/miss/eviction counters for every cache, keyed by cache name"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear_caches() -> None:
+    """Empty every cache, e.g. after data was changed behind the services' back"""
+    for cache in _caches.values():
+        cache.clear()
+
+
+def invalidate_after_transaction(session, cache: TTLCache, key: Hashable) -> None:
+    """Drop `key` now and once more when the session's transaction commits or rolls back"""
+    cache.invalidate(key)
+    session.info.setdefault(_PENDING_INVALIDATIONS, []).append((cache, key))
+
+
+def is_invalidation_pending(session, cache: TTLCache, key: Hashable) -> bool:
+    """True if this session wrote `key` in its open transaction; don't cache what it reads back"""
+    return (cache, key) in session.info.get(_PENDING_INVALIDATIONS, ())
+
+
+def may_cache(session, cache: TTLCache, key: Hashable) -> bool:
+    """True if what `session` just read for `key` may be shared through `cache`"""
+    return not session.info.get(REPLICA_SESSION) and not is_invalidation_pending(session, cache, key)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_pending_invalidations(session, transaction):
+    if transaction.parent is not None:
+        return
+    for cache, key in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        cache.invalidate(key)
@@ -1,18 +1,87 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 import os
-from typing import ClassVar
+import sys
+from typing import ClassVar, Optional
+
+# asyncio.timeout (security.py) and code.co_qualname (query_log.py) are 3.11+
+if sys.version_info < (3, 11):
+    raise RuntimeError(f"Python 3.11 or newer is required, this is {sys.version.split()[0]}")
 
 class Settings(BaseSettings):
     app_name: str 
     database_url: str
     debug_mode: bool = False
-    admin_email: str = "admin1@example.com"
     items_per_user: int = 150
     access_token_expire_minutes: int = 30  # 30 minutes
     secret_key: str = "dev_my_secret_key123980"
     algorithm: str = "HS256"
 
+    # Database connection pool, shared by every session for the same URL
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # recycle connections after 30 minutes
+    db_pool_pre_ping: bool = True
+
+    # SQLite pragmas applied to every new connection, on top of the FASTAPI_ENV profile
+    # in db_connection.SQLITE_PRAGMA_PROFILES, e.g. SQLITE_PRAGMAS='{"cache_size": -131072}'
+    sqlite_pragmas: dict[str, str | int] = {}
+    # Startup check: fail instead of warning when a pragma didn't take effect
+    sqlite_pragmas_strict: bool = False
+
+    # Read replicas for GET handlers (ReadDbSession), e.g. DB_REPLICA_URLS='["sqlite+aiosqlite:///test-db/replica.db"]'
+    db_replica_urls: list[str] = []
+    db_replica_health_check_interval_seconds: float = 10
+    # a failed replica gets no reads until it passes a health check, at the earliest after this
+    db_replica_down_seconds: float = 30
+    # after a successful write, the same client reads from the primary for this long
+    db_read_your_writes_seconds: float = 5
+
+    # Background recount of BlogPost likes/comments counters (0 disables the job)
+    counter_reconcile_interval_seconds: int = 600
+    counter_reconcile_batch_size: int = 500
+
+    # In-process read-through caches, per entity type
+    cache_posts_enabled: bool = True
+    cache_posts_ttl_seconds: float = 60
+    cache_posts_max_entries: int = 2048
+    cache_users_enabled: bool = True
+    cache_users_ttl_seconds: float = 300
+    cache_users_max_entries: int = 2048
+
+    # Password hashing (bcrypt cost factor; hashes run in a bounded thread pool)
+    bcrypt_rounds: int = 12
+    password_hash_max_concurrency: int = 4
+    password_hash_queue_timeout_seconds: float = 5.0
+
+    # Verified JWT claims cache (entries expire with the token)
+    token_cache_enabled: bool = True
+    token_cache_max_entries: int = 10000
+    # /bulk endpoints: max items per request, rows per executemany batch
+    bulk_max_items: int = 1000
+    bulk_insert_batch_size: int = 500
+
+    # Streaming exports: rows fetched per server-side cursor round trip
+    export_yield_per: int = 1000
+
+    # Request/query metrics at /api/metrics (Prometheus text format)
+    metrics_enabled: bool = True
+    # Log every SQL statement (SQLAlchemy echo); slow ones are logged regardless
+    db_echo: bool = False
+    # Log statements slower than this, with caller and parameters, credentials redacted (0 disables)
+    slow_query_threshold_ms: float = 100
+    # Report a request that runs the same statement shape more than this many times (0 disables);
+    # strict raises instead of warning, and is always on under FASTAPI_ENV=test
+    n_plus_one_threshold: int = 10
+    n_plus_one_strict: bool = False
+
+    # User granted the admin role by `python -m src.modules.auth.bootstrap` (no default)
+    bootstrap_admin_user_id: Optional[int] = None
+
+    # Compiled role permission masks; local role changes invalidate immediately
+    role_cache_ttl_seconds: float = 300
+
     env_file_name: ClassVar[str] = ".env.development"
     # Dynamically set the env_file based on APP_ENV environment variable
     if os.getenv("APP_ENV") not in {"development", "testing", "production"}:
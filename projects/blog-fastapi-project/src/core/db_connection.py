@@ -1,13 +1,31 @@
+import asyncio
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated
+from fastapi import Depends, Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
-    create_async_engine, AsyncSession,
+    create_async_engine, AsyncEngine, AsyncSession,
 )
 from sqlalchemy.orm import sessionmaker
+from src.core.cache import REPLICA_SESSION
+from src.core.config import settings
+from src.core.database import Base
+from src.core.metrics import install_query_metrics
+from src.core.migrations import run_migrations
+
+# Process-wide engine registry: one engine (and connection pool) per database URL
+_engines: dict[str, AsyncEngine] = {}
+_session_makers: dict[str, sessionmaker] = {}
 
 def get_database_url():
     """Get database URL based on environment"""
     env = os.getenv("FASTAPI_ENV", "development")
-    
+
     if env == "test":
         # get it from env variable or default to test DB
         return os.getenv("DATABASE_URL", "sqlite+aiosqlite:///test-db/test-db.db")
@@ -16,45 +34,300 @@ def get_database_url():
     else:
         return os.getenv("DATABASE_URL", "sqlite+aiosqlite:///test-db/dev-db.db")
 
-def get_engine():
-    database_url = get_database_url()
-    echo = os.getenv("FASTAPI_ENV") != "production"  # Only echo in dev/test
-    return create_async_engine(database_url, echo=echo)
+def _is_memory_database(url) -> bool:
+    return url.database in (None, "", ":memory:")
+
+def _pool_options(database_url: str) -> dict:
+    """Pool settings from Settings; in-memory SQLite uses a single static connection"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and _is_memory_database(url):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+# SQLite pragma profiles per FASTAPI_ENV. WAL lets readers run alongside the single
+# writer; synchronous=NORMAL is durable against application crashes under WAL (a power
+# loss may drop the last commits); busy_timeout makes writers wait for the lock instead
+# of failing with "database is locked".
+_SERVER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, per connection
+    "busy_timeout": 5000,  # ms
+    "temp_store": "MEMORY",
+}
+SQLITE_PRAGMA_PROFILES = {
+    "production": _SERVER_PRAGMAS,
+    "development": _SERVER_PRAGMAS,
+    # test databases are thrown away: skip fsync entirely
+    "test": {**_SERVER_PRAGMAS, "synchronous": "OFF", "mmap_size": 0},
+}
+# PRAGMA reads return these as numbers
+_PRAGMA_NUMBERS = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+}
+
+def get_sqlite_pragmas() -> dict[str, str | int]:
+    """Pragmas for new SQLite connections: the environment's profile plus Settings overrides"""
+    env = os.getenv("FASTAPI_ENV", "development")
+    return {**SQLITE_PRAGMA_PROFILES.get(env, _SERVER_PRAGMAS), **settings.sqlite_pragmas}
+
+def install_sqlite_pragmas(engine: AsyncEngine, pragmas: dict[str, str | int]) -> None:
+    """Run the PRAGMA statements on every new DBAPI connection of `engine`"""
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+async def check_sqlite_pragmas(engine: AsyncEngine, pragmas: dict[str, str | int] | None = None) -> dict[str, tuple]:
+    """Read the pragmas back from a pooled connection; returns {name: (expected, actual)} for mismatches
+
+    journal_mode=WAL silently stays on the old mode on file systems without shared memory
+    support, and mmap_size is capped by the SQLite build, so the effective values are checked.
+    """
+    if engine.dialect.name != "sqlite" or _is_memory_database(engine.url):
+        return {}
+    pragmas = get_sqlite_pragmas() if pragmas is None else pragmas
+    mismatches = {}
+    async with engine.connect() as conn:
+        for name, expected in pragmas.items():
+            actual = (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            wanted = expected
+            if isinstance(expected, str):
+                wanted = _PRAGMA_NUMBERS.get(name, {}).get(expected.upper(), expected.lower())
+                actual = actual.lower() if isinstance(actual, str) else actual
+            if actual != wanted:
+                mismatches[name] = (expected, actual)
+    for name, (expected, actual) in mismatches.items():
+        logging.warning(f"SQLite pragma {name}: expected {expected}, got {actual}")
+    if mismatches and settings.sqlite_pragmas_strict:
+        raise RuntimeError(f"SQLite pragmas not applied: {sorted(mismatches)}")
+    return mismatches
+
+def get_engine(database_url: str | None = None) -> AsyncEngine:
+    """Get the shared engine for a database URL, creating it on first use"""
+    database_url = database_url or get_database_url()
+    engine = _engines.get(database_url)
+    if engine is None:
+        # echo logs every statement synchronously; slow statements are logged by query_log instead
+        engine = create_async_engine(database_url, echo=settings.db_echo, **_pool_options(database_url))
+        url = make_url(database_url)
+        if url.get_backend_name() == "sqlite" and not _is_memory_database(url):
+            install_sqlite_pragmas(engine, get_sqlite_pragmas())
+        install_query_metrics(engine)
+        _engines[database_url] = engine
+    return engine
+
 # Dynamic session creation to respect environment changes
-def get_session_local():
-    """Get a fresh sessionmaker with current environment settings"""
-    return sessionmaker(
-        autocommit=False,
-        autoflush=False,
-        bind=get_engine(),
-        class_=AsyncSession,
-    )
+def get_session_local(database_url: str | None = None):
+    """Get the sessionmaker bound to the shared engine for the current environment"""
+    database_url = database_url or get_database_url()
+    SessionLocal = _session_makers.get(database_url)
+    if SessionLocal is None:
+        SessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=get_engine(database_url),
+            class_=AsyncSession,
+            # objects stay readable after the unit of work commits
+            expire_on_commit=False,
+        )
+        _session_makers[database_url] = SessionLocal
+    return SessionLocal
 
-async def get_db_session():
-    """Get database session that respects current environment"""
-    SessionLocal = get_session_local()
+@asynccontextmanager
+async def session_scope(database_url: str | None = None):
+    """Unit of work: one session and transaction, committed once on success"""
+    SessionLocal = get_session_local(database_url)
     async with SessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+async def get_db_session():
+    """Request-scoped unit of work shared by routers and services"""
+    async with session_scope() as session:
         yield session
 
+# FastAPI dependency: the "function" scope commits before the response is sent
+DbSession = Annotated[AsyncSession, Depends(get_db_session, scope="function")]
+
+######### Read replicas #########
+# Cookie set on responses to successful writes; its value is the time until which the
+# client's reads go to the primary, so it works across workers without shared state.
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+class ReplicaRouter:
+    """Round-robin choice among healthy replica URLs; choose() returns None to use the primary"""
+
+    def __init__(self, urls: list[str] | None = None, down_seconds: float = 30):
+        self.down_seconds = down_seconds
+        self.configure(urls or [])
+
+    def configure(self, urls: list[str]) -> None:
+        self.urls = list(urls)
+        self._next = 0
+        self._down_until: dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.urls)
+
+    def choose(self) -> str | None:
+        now = time.monotonic()
+        for _ in range(len(self.urls)):
+            url = self.urls[self._next % len(self.urls)]
+            self._next += 1
+            if self._down_until.get(url, 0) <= now:
+                return url
+        return None
+
+    def mark_down(self, url: str) -> None:
+        logging.warning(f"Read replica {make_url(url).render_as_string(hide_password=True)} is down")
+        self._down_until[url] = time.monotonic() + self.down_seconds
+
+    def mark_up(self, url: str) -> None:
+        self._down_until.pop(url, None)
+
+    async def check(self) -> dict[str, bool]:
+        """Ping every replica whose down period is over (or that is up); returns url -> healthy"""
+        health = {}
+        now = time.monotonic()
+        for url in self.urls:
+            if self._down_until.get(url, 0) > now:
+                health[url] = False
+                continue
+            try:
+                async with get_engine(url).connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except (DBAPIError, OSError):
+                self.mark_down(url)
+                health[url] = False
+            else:
+                self.mark_up(url)
+                health[url] = True
+        return health
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            make_url(url).render_as_string(hide_password=True): {
+                "healthy": self._down_until.get(url, 0) <= now,
+            }
+            for url in self.urls
+        }
+
+replica_router = ReplicaRouter(settings.db_replica_urls, settings.db_replica_down_seconds)
+
+def mark_primary_sticky(response: Response) -> None:
+    """Send this client's reads to the primary for db_read_your_writes_seconds"""
+    if replica_router.enabled:
+        until = time.time() + settings.db_read_your_writes_seconds
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE, f"{until:.3f}", max_age=max(1, int(settings.db_read_your_writes_seconds)), httponly=True
+        )
+
+def _reads_from_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_database_url(request: Request) -> str | None:
+    """Database for a read-only request: a healthy replica, or None for the primary"""
+    return None if _reads_from_primary(request) else replica_router.choose()
+
+async def get_read_db_session(request: Request):
+    """Request-scoped session for read-only handlers: a healthy replica, else the primary
+
+    Clients that wrote within db_read_your_writes_seconds read from the primary, so they
+    see their own writes despite replication lag.
+    """
+    # replica liveness comes from the background health check (ReplicaRouter.check), so
+    # a request costs one pool checkout, on the replica or the primary
+    database_url = read_database_url(request)
+    async with session_scope(database_url) as session:
+        # replica reads may lag behind the primary: the entity caches skip them
+        session.info[REPLICA_SESSION] = database_url is not None
+        yield session
+
+# FastAPI dependency for GET handlers that only read
+ReadDbSession = Annotated[AsyncSession, Depends(get_read_db_session, scope="function")]
+
+async def run_replica_health_checks(interval_seconds: float | None = None):
+    """Ping the replicas periodically until cancelled"""
+    interval_seconds = interval_seconds or settings.db_replica_health_check_interval_seconds
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await replica_router.check()
+        except Exception as e:
+            logging.error(f"Replica health check failed: {e}")
+
+def _create_missing_indexes(connection):
+    # create_all() only builds indexes together with new tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+async def init_db(engine: AsyncEngine | None = None):
+    """Create missing tables and indexes for every imported model, then migrate"""
+    engine = engine or get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+        await conn.run_sync(_create_missing_indexes)
+
+def get_pool_stats() -> dict[str, dict]:
+    """Connection pool statistics for every registered engine, keyed by URL"""
+    stats = {}
+    for database_url, engine in _engines.items():
+        pool = engine.pool
+        stats[make_url(database_url).render_as_string(hide_password=True)] = {
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        }
+    return stats
+
+async def dispose_engines():
+    """Close every pooled connection; called once on application shutdown"""
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _session_makers.clear()
+
 #########  Test-specific database connection #########
+TEST_DATABASE_URL = "sqlite+aiosqlite:///test-db/database-test.db"
+
 def get_test_engine():
     """Get engine specifically for testing with database-test.db"""
-    return create_async_engine(
-        "sqlite+aiosqlite:///test-db/database-test.db", 
-        echo=True
-    )
+    return get_engine(TEST_DATABASE_URL)
 
 def get_test_session_local():
-    """Get a fresh test sessionmaker"""
-    return sessionmaker(
-        autocommit=False,
-        autoflush=False,
-        bind=get_test_engine(),
-        class_=AsyncSession,
-    )
+    """Get the test sessionmaker"""
+    return get_session_local(TEST_DATABASE_URL)
 
 async def get_test_db_session():
     """Get database session specifically for testing"""
     TestSessionLocal = get_test_session_local()
     async with TestSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
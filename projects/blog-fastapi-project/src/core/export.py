@@ -0,0 +1,51 @@
+# Streaming NDJSON / CSV encoders for export endpoints
+# Rows come from an AsyncResult opened with yield_per, one partition at a time, and each
+# partition is encoded into a single chunk: memory stays bounded by the partition size
+# no matter how large the table is.
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+async def encode_ndjson(columns: list[str], partitions: AsyncIterator[list]) -> AsyncIterator[str]:
+    async for rows in partitions:
+        yield "".join(
+            json.dumps({column: _plain(value) for column, value in zip(columns, row)}, separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+async def encode_csv(columns: list[str], partitions: AsyncIterator[list]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in partitions:
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+ENCODERS: dict[str, Callable[[list[str], AsyncIterator[list]], AsyncIterator[str]]] = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+}
@@ -0,0 +1,199 @@
+# In-process request and database metrics, rendered in the Prometheus text format
+#
+# The metrics middleware times every request and labels it with the matched route
+# template (not the raw path, so ids don't explode the label set). Cursor execute hooks
+# on each engine count statements and their time into the current request's
+# RequestStats, found through a context variable, and into a process-wide histogram.
+# Everything is plain counters and fixed-bucket histograms updated on the event loop
+# thread, so recording costs a few dict lookups per request and per statement. The
+# same hooks drive the slow-query log and N+1 detection in src/core/query_log.py.
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.core.query_log import check_repeated, log_if_slow
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+UNMATCHED_ROUTE = "unmatched"
+_QUERY_STARTS = "metrics_query_starts"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed upper bounds"""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass
+class RequestStats:
+    """Statements run on behalf of the current request"""
+    request: str = ""  # "GET /api/blogs/posts/", for log messages
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)  # statement shape -> executions
+
+
+@dataclass
+class RouteMetrics:
+    latency: Histogram
+    queries: Histogram  # statements per request
+    db_seconds: Histogram  # database time per request
+    statuses: Counter
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+# (method, route template) -> metrics
+_routes: dict[tuple[str, str], RouteMetrics] = {}
+_query_duration = Histogram(QUERY_DURATION_BUCKETS)
+_queries_outside_requests = 0
+
+
+def start_request(request: str = "") -> RequestStats:
+    """Collect the statements of the current task (and the tasks it starts) into new RequestStats"""
+    stats = RequestStats(request)
+    _current_request.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+def record_request(method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+    metrics = _routes.get((method, route))
+    if metrics is None:
+        metrics = _routes[(method, route)] = RouteMetrics(
+            Histogram(LATENCY_BUCKETS), Histogram(QUERY_COUNT_BUCKETS), Histogram(LATENCY_BUCKETS), Counter()
+        )
+    metrics.latency.observe(seconds)
+    metrics.queries.observe(stats.queries)
+    metrics.db_seconds.observe(stats.db_seconds)
+    metrics.statuses[status_code] += 1
+
+
+def route_template(scope: dict) -> str:
+    """Path template of the route that handled the request, e.g. /api/blogs/posts/{post_id}"""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    # routes of included routers may only know their own part of the path: take the
+    # include prefix from the request path, which has one segment per template segment
+    segments = scope.get("path", "").split("/")
+    depth = template.count("/")
+    return "/".join(segments[:len(segments) - depth]) + template if len(segments) > depth else template
+
+
+def install_query_metrics(engine: AsyncEngine) -> None:
+    """Count statements and their execution time on every connection of `engine`;
+    also feeds the slow-query log and the repeated-statement check (src/core/query_log.py)"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def query_started(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_request.get()
+        if stats is not None:
+            check_repeated(stats.shapes, statement, stats.request)
+        conn.info.setdefault(_QUERY_STARTS, []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def query_finished(conn, cursor, statement, parameters, context, executemany):
+        global _queries_outside_requests
+        elapsed = time.perf_counter() - conn.info[_QUERY_STARTS].pop()
+        _query_duration.observe(elapsed)
+        log_if_slow(statement, parameters, elapsed, getattr(context.compiled, "positiontup", None))
+        stats = _current_request.get()
+        if stats is None:
+            _queries_outside_requests += 1
+        else:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def query_failed(exception_context):
+        # after_cursor_execute doesn't run for a failed statement
+        connection = exception_context.connection
+        if connection is not None and connection.info.get(_QUERY_STARTS):
+            connection.info[_QUERY_STARTS].pop()
+
+
+def server_timing(seconds: float, stats: RequestStats) -> str:
+    """Server-Timing header value: total and database time in ms, with the statement count"""
+    return f'app;dur={seconds * 1000:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def render_metrics(pool_stats: dict[str, dict]) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    routes = sorted(_routes.items())
+    lines = [
+        "# HELP http_requests_total Requests by route and status code",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route), metrics in routes:
+        for status_code, count in sorted(metrics.statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+    for name, attribute, help_text in (
+        ("http_request_duration_seconds", "latency", "Request latency by route"),
+        ("http_request_db_queries", "queries", "SQL statements per request by route"),
+        ("http_request_db_duration_seconds", "db_seconds", "Database time per request by route"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), metrics in routes:
+            lines += _histogram_lines(name, getattr(metrics, attribute), method=method, route=route)
+    lines += [
+        "# HELP db_query_duration_seconds Execution time of every SQL statement",
+        "# TYPE db_query_duration_seconds histogram",
+        *_histogram_lines("db_query_duration_seconds", _query_duration),
+        "# HELP db_queries_outside_requests_total SQL statements run outside a request (startup, background jobs)",
+        "# TYPE db_queries_outside_requests_total counter",
+        f"db_queries_outside_requests_total {_queries_outside_requests}",
+    ]
+    for field in ("size", "checked_out", "checked_in", "overflow"):
+        lines += [f"# HELP db_pool_{field} Connection pool {field.replace('_', ' ')}", f"# TYPE db_pool_{field} gauge"]
+        for database, stats in sorted(pool_stats.items()):
+            if stats.get(field) is not None:
+                lines.append(f"db_pool_{field}{_labels(database=database)} {stats[field]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Drop all recorded values (tests)"""
+    global _query_duration, _queries_outside_requests
+    _routes.clear()
+    _query_duration = Histogram(QUERY_DURATION_BUCKETS)
+    _queries_outside_requests = 0
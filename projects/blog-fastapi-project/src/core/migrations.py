@@ -0,0 +1,55 @@
+# Lightweight schema migrations
+# create_all() only creates missing tables, so changes to existing tables (new columns,
+# constraints, backfills) are registered here as named steps. init_db() runs every step
+# that is not yet recorded in the schema_migrations table, in registration order.
+# Steps must be idempotent: on a fresh database create_all() has already built the
+# latest schema and the step only needs to do its data work.
+import logging
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("name", String(255), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+_migrations: list[tuple[str, Callable[[Connection], None]]] = []
+
+
+def migration(name: str):
+    """Register a migration step, run once per database by run_migrations()"""
+    def decorator(fn: Callable[[Connection], None]):
+        _migrations.append((name, fn))
+        return fn
+    return decorator
+
+
+def add_column_if_missing(connection: Connection, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    existing = {col["name"] for col in inspect(connection).get_columns(table)}
+    if column in existing:
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def run_migrations(connection: Connection) -> list[str]:
+    """Apply pending migration steps; returns the names that were applied"""
+    _metadata.create_all(connection)
+    applied = set(connection.execute(select(schema_migrations.c.name)).scalars())
+    newly_applied = []
+    for name, fn in _migrations:
+        if name in applied:
+            continue
+        logger.info(f"Applying migration {name}")
+        fn(connection)
+        connection.execute(schema_migrations.insert().values(name=name, applied_at=datetime.utcnow()))
+        newly_applied.append(name)
+    return newly_applied
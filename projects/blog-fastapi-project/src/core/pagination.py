@@ -0,0 +1,54 @@
+# Keyset (cursor) pagination helpers
+# A cursor is an opaque url-safe token holding the sort key of the last row on a page,
+# e.g. (created_at, id). The next page starts strictly after that key, so deep pages
+# cost the same as the first one instead of scanning and discarding `skip` rows.
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+
+class InvalidCursorError(ValueError):
+    def __init__(self, message: str = "Invalid pagination cursor"):
+        self.message = message
+        super().__init__(self.message)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a sort key as an opaque cursor token"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor token back into a sort key with the given value types"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise InvalidCursorError()
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value, value_type in zip(values, types)
+        )
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError() from e
+
+
+def next_page_cursor(items: Sequence[Any], limit: int, *key_attrs: str) -> str | None:
+    """Cursor for the page after `items`, or None when the page was not full"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(*(getattr(last, attr) for attr in key_attrs))
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def set_next_cursor_header(response, next_cursor: str | None) -> None:
+    """Expose the next page cursor without changing list response bodies"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,119 @@
+# Slow-query log and repeated-statement (N+1) detection
+#
+# Called from the cursor execute hooks in src/core/metrics.py, so it costs nothing extra
+# per statement beyond a dict increment. Statements slower than slow_query_threshold_ms
+# are logged with the application function that issued them and their parameters, with
+# the values of credential binds (hashed_password, tokens, ...) replaced by "<redacted>". A
+# request that runs the same statement shape more than n_plus_one_threshold times is
+# reported once per shape: a warning, or RepeatedStatementError when strict (the
+# default under FASTAPI_ENV=test) so tests fail on the offending call.
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from typing import Optional, Sequence
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_PACKAGE = os.path.join("src", "modules") + os.sep
+# expanding IN lists render one placeholder per value: "IN (?, ?, ?)"
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)")
+_MAX_PARAMETERS_LENGTH = 500
+# bind names are column names, possibly suffixed ("hashed_password_m0", "token_1")
+_SENSITIVE_BIND = re.compile(r"password|secret|token", re.IGNORECASE)
+_REDACTED = "<redacted>"
+
+
+class RepeatedStatementError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with IN lists collapsed, so lookups differing only in values compare equal"""
+    return _PLACEHOLDER_LIST.sub("(?...)", " ".join(statement.split()))
+
+
+def calling_function() -> Optional[str]:
+    """Innermost frame in src/modules, e.g. "BlogService.list_posts (src/modules/blog/services.py:250)"
+
+    Under the asyncio extension the cursor hooks run in a greenlet whose stack ends in
+    SQLAlchemy; the awaiting coroutines are on the parent greenlet's suspended stack.
+    """
+    frame = sys._getframe(1)
+    try:
+        import greenlet
+        parent = greenlet.getcurrent().parent
+    except ImportError:
+        parent = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        position = filename.find(_APP_PACKAGE)
+        if position >= 0:
+            return f"{frame.f_code.co_qualname} ({filename[position:]}:{frame.f_lineno})"
+        frame = frame.f_back
+        if frame is None and parent is not None:
+            frame, parent = parent.gr_frame, None
+    return None
+
+
+def _redact_row(row, bind_names: Optional[Sequence[str]]):
+    if isinstance(row, dict):
+        return {name: _REDACTED if _SENSITIVE_BIND.search(name) else value for name, value in row.items()}
+    if not bind_names or len(row) % len(bind_names):
+        # positional values we can't name (raw driver SQL): log none of them
+        return f"<{len(row)} values>"
+    # a multi-row INSERT repeats the row's binds once per row
+    return tuple(
+        _REDACTED if _SENSITIVE_BIND.search(bind_names[index % len(bind_names)]) else value
+        for index, value in enumerate(row)
+    )
+
+
+def redact_parameters(parameters, bind_names: Optional[Sequence[str]] = None):
+    """`parameters` (one row, or a list of rows for executemany) with credential values replaced"""
+    if isinstance(parameters, list):
+        return [_redact_row(row, bind_names) for row in parameters]
+    return _redact_row(parameters, bind_names)
+
+
+def _parameters(parameters, bind_names: Optional[Sequence[str]]) -> str:
+    text = repr(redact_parameters(parameters, bind_names))
+    return text if len(text) <= _MAX_PARAMETERS_LENGTH else text[:_MAX_PARAMETERS_LENGTH] + "..."
+
+
+def log_if_slow(statement: str, parameters, seconds: float, bind_names: Optional[Sequence[str]] = None) -> None:
+    """`bind_names` are the names of positional parameters in order (compiled.positiontup)"""
+    threshold = settings.slow_query_threshold_ms
+    if threshold <= 0 or seconds * 1000 < threshold:
+        return
+    logger.warning(
+        "Slow query (%.1f ms) from %s: %s; parameters: %s",
+        seconds * 1000, calling_function() or "unknown caller", " ".join(statement.split()),
+        _parameters(parameters, bind_names),
+    )
+
+
+def is_strict() -> bool:
+    return settings.n_plus_one_strict or os.getenv("FASTAPI_ENV") == "test"
+
+
+def check_repeated(shapes: Counter, statement: str, request: str) -> None:
+    """Count `statement` for the current request; report the shape once it exceeds the threshold"""
+    threshold = settings.n_plus_one_threshold
+    if threshold <= 0:
+        return
+    shape = statement_shape(statement)
+    shapes[shape] += 1
+    if shapes[shape] != threshold + 1:
+        return
+    message = (
+        f"Statement repeated more than {threshold} times in {request or 'one request'} "
+        f"(N+1?) from {calling_function() or 'unknown caller'}: {shape}"
+    )
+    if is_strict():
+        raise RepeatedStatementError(message)
+    logger.warning(message)
@@ -0,0 +1,122 @@
+# Password hashing off the event loop
+# bcrypt is deliberately slow (~100-300 ms per hash at the default cost) and would block
+# every other request on the worker if called inside a handler. PasswordHasher runs it in
+# a dedicated thread pool (bcrypt releases the GIL, so threads hash in parallel) and
+# bounds how many hashes may wait: callers that can't get a slot within the queue
+# timeout get PasswordHasherBusyError, which the app maps to 503.
+import asyncio
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from src.core.config import settings
+
+
+class PasswordHasherBusyError(Exception):
+    def __init__(self, message: str = "Password hashing is busy, try again later"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, max_concurrency: int = 4, queue_timeout_seconds: float = 5.0):
+        self.rounds = rounds
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor: ThreadPoolExecutor | None = None
+        # asyncio primitives are bound to one loop (tests and CLIs may run several)
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.queued = 0
+        self.in_progress = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.total_hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, fn, *args):
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self.queued += 1
+        acquired = False
+        try:
+            # not wait_for(): on 3.11 it can lose a permit that is granted as the wait times out
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                await semaphore.acquire()
+                acquired = True
+        except TimeoutError:
+            if acquired:
+                semaphore.release()
+            self.timeouts += 1
+            raise PasswordHasherBusyError()
+        finally:
+            self.queued -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.in_progress += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.in_progress -= 1
+            self.completed += 1
+            self.total_hash_seconds += elapsed
+            self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash several passwords in parallel, keeping at most max_concurrency of them in the queue"""
+        hashes: list[str] = [""] * len(passwords)
+        pending = iter(range(len(passwords)))
+
+        async def worker():
+            for i in pending:
+                hashes[i] = await self.hash(passwords[i])
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(passwords)))))
+        return hashes
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "queued": self.queued,
+            "in_progress": self.in_progress,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            "avg_hash_ms": round(self.total_hash_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_hash_ms": round(self.max_hash_seconds * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    max_concurrency=settings.password_hash_max_concurrency,
+    queue_timeout_seconds=settings.password_hash_queue_timeout_seconds,
+)
@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import Depends, FastAPI, Request, Response
 from .core.config import settings
-from contextlib import asynccontextmanager
-from src.core.db_connection import get_db_session, get_engine
+from contextlib import asynccontextmanager, suppress
+from fastapi.responses import JSONResponse
+from src.core.db_connection import (
+    check_sqlite_pragmas, get_db_session, get_engine, get_pool_stats, dispose_engines, init_db,
+    mark_primary_sticky, replica_router, run_replica_health_checks,
+)
 from src.core.database import Base
+from src.core.cache import get_cache_stats
+from src.core.metrics import record_request, render_metrics, route_template, server_timing, start_request
+from src.core.pagination import InvalidCursorError
+from src.core.security import PasswordHasherBusyError, password_hasher
+from src.modules.auth.dependencies import require_permission
+from src.modules.auth.enums import Permission
+from src.modules.blog.exception import BlogException
 # import user model
 from src.modules.user import models as user_models
 
@@ -10,17 +23,70 @@ from src.modules.user import models as user_models
 from src.modules.user.routers import router as user_router
 from src.modules.auth.routers import router as auth_router
 from src.modules.blog.routers import router as blog_router
+from src.modules.blog.tasks import run_counter_reconciliation
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # one pooled engine for the whole process, shared by every request
     engine = get_engine()
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        yield
-    await engine.dispose()
+    await init_db(engine)
+    # warns (or fails with SQLITE_PRAGMAS_STRICT) if e.g. WAL couldn't be enabled
+    await check_sqlite_pragmas(engine)
+    background_tasks = []
+    if settings.counter_reconcile_interval_seconds > 0:
+        background_tasks.append(asyncio.create_task(run_counter_reconciliation()))
+    if replica_router.enabled:
+        await replica_router.check()
+        background_tasks.append(asyncio.create_task(run_replica_health_checks()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
+    await dispose_engines()
 app = FastAPI(lifespan=lifespan)
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # after a successful write this client's ReadDbSession reads go to the primary for a while
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_primary_sticky(response)
+    return response
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    # registered last, so it runs outermost and times the other middleware too;
+    # the request stats also scope the repeated-statement (N+1) check
+    stats = start_request(f"{request.method} {request.url.path}")
+    if not settings.metrics_enabled:
+        return await call_next(request)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        record_request(request.method, route_template(request.scope), 500, time.perf_counter() - started, stats)
+        raise
+    # streamed bodies (exports) are still being produced; their time and queries aren't counted
+    elapsed = time.perf_counter() - started
+    record_request(request.method, route_template(request.scope), response.status_code, elapsed, stats)
+    response.headers["Server-Timing"] = server_timing(elapsed, stats)
+    return response
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request, exc: InvalidCursorError):
+    return JSONResponse(status_code=400, content={"detail": exc.message})
+
+@app.exception_handler(BlogException)
+async def blog_exception_handler(request, exc: BlogException):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.message})
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request, exc: PasswordHasherBusyError):
+    return JSONResponse(status_code=503, content={"detail": exc.message}, headers={"Retry-After": "1"})
+
 
 
 @app.get("/")
@@ -39,4 +105,27 @@ async def info():
         "app_name": settings.app_name,
         "database_url": settings.database_url,
         "debug_mode": settings.debug_mode,
-    }
\ No newline at end of file
+    }
+
+# operational endpoints: bearer token of a role with OPS_READ (admin, monitoring)
+OPS_READ = [Depends(require_permission(Permission.OPS_READ))]
+
+@app.get("/api/db/pool-stats", dependencies=OPS_READ)
+async def pool_stats():
+    return get_pool_stats()
+
+@app.get("/api/db/replicas", dependencies=OPS_READ)
+async def replica_stats():
+    return replica_router.stats()
+
+@app.get("/api/metrics", include_in_schema=False, dependencies=OPS_READ)
+async def metrics():
+    return Response(render_metrics(get_pool_stats()), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/cache/stats", dependencies=OPS_READ)
+async def cache_stats():
+    return get_cache_stats()
+
+@app.get("/api/security/password-hash-stats", dependencies=OPS_READ)
+async def password_hash_stats():
+    return password_hasher.stats()
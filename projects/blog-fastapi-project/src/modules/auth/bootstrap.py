@@ -0,0 +1,49 @@
+# Bootstrap the first administrator
+#
+# No account is ever an admin because of its username or email. Grant the admin role to
+# an existing user id once, from the command line:
+#
+#   python -m src.modules.auth.bootstrap --user-id 1
+#   BOOTSTRAP_ADMIN_USER_ID=1 python -m src.modules.auth.bootstrap
+#
+# Later admins are granted through POST /api/auth/assign-role/ by an existing admin.
+import argparse
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.core.config import settings
+from src.modules.auth.exception import AuthException
+from src.modules.auth.services import AuthService
+from src.modules.user.models import User
+
+ADMIN_ROLE = "admin"
+
+
+async def grant_bootstrap_admin(db: AsyncSession, user_id: int) -> None:
+    """Give the admin role to `user_id`; tokens issued afterwards carry it"""
+    if (await db.execute(select(User.id).where(User.id == user_id))).scalar() is None:
+        raise AuthException(f"User {user_id} not found")
+    if not await AuthService().assign_role_to_user(db, user_id, ADMIN_ROLE):
+        raise AuthException(f"{AuthException.ROLE_NOT_FOUND}: {ADMIN_ROLE}")
+
+
+async def _main(user_id: int) -> None:
+    from src.core.db_connection import dispose_engines, init_db, session_scope
+
+    try:
+        await init_db()
+        async with session_scope() as db:
+            await grant_bootstrap_admin(db, user_id)
+    finally:
+        await dispose_engines()
+    print(f"User {user_id} now has the {ADMIN_ROLE} role")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grant the admin role to an existing user")
+    parser.add_argument("--user-id", type=int, default=settings.bootstrap_admin_user_id,
+                        help="default: BOOTSTRAP_ADMIN_USER_ID")
+    args = parser.parse_args()
+    if args.user_id is None:
+        parser.error("no user id: pass --user-id or set BOOTSTRAP_ADMIN_USER_ID")
+    asyncio.run(_main(args.user_id))
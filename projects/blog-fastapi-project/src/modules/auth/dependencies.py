@@ -0,0 +1,52 @@
+# Auth dependencies
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from src.core.db_connection import DbSession
+from src.modules.auth.enums import Permission
+from src.modules.auth.exception import AuthException
+from src.modules.auth.services import auth_service
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
+# same scheme for endpoints that also serve anonymous clients
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
+
+
+async def get_current_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    """Verified JWT claims of the bearer token; cached per token, so repeat calls are cheap"""
+    claims = auth_service.decode_access_token(token)
+    if claims is None or claims.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=AuthException.TOKEN_INVALID,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+
+CurrentClaims = Annotated[dict, Depends(get_current_claims)]
+
+
+async def get_optional_claims(token: Annotated[Optional[str], Depends(optional_oauth2_scheme)]) -> Optional[dict]:
+    """Claims of the bearer token, or None without one; an invalid token is still a 401"""
+    if token is None:
+        return None
+    return await get_current_claims(token)
+
+
+OptionalClaims = Annotated[Optional[dict], Depends(get_optional_claims)]
+
+
+def require_permission(*permissions: Permission):
+    """Dependency that allows the request only if the token grants every given permission"""
+    required = Permission.NONE
+    for permission in permissions:
+        required |= permission
+
+    async def dependency(claims: CurrentClaims, db: DbSession) -> dict:
+        granted = await auth_service.get_permissions(db, claims)
+        if not auth_service.check_user_permission(granted, required):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=AuthException.FORBIDDEN_ACCESS)
+        return claims
+
+    return dependency
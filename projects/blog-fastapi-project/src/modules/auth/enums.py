@@ -0,0 +1,33 @@
+# Define enums
+from enum import IntFlag
+from typing import Iterable
+
+class Permission(IntFlag):
+    """Permission bits; a role's permissions compile to the OR of its bits"""
+    NONE = 0
+    POSTS_CREATE = 1 << 0
+    POSTS_EDIT_ANY = 1 << 1
+    POSTS_DELETE_ANY = 1 << 2
+    COMMENTS_MODERATE = 1 << 3
+    USERS_MANAGE = 1 << 4
+    ROLES_MANAGE = 1 << 5
+    DATA_EXPORT = 1 << 6
+    OPS_READ = 1 << 7  # metrics, pool/replica/cache/hasher stats
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "Permission":
+        """Compile permission names (as stored in role_permissions) into a mask; unknown names are ignored"""
+        mask = cls.NONE
+        for name in names:
+            mask |= cls.__members__.get(name, cls.NONE)
+        return mask
+
+    @classmethod
+    def all(cls) -> "Permission":
+        mask = cls.NONE
+        for member in cls:
+            mask |= member
+        return mask
+
+    def names(self) -> list[str]:
+        return [member.name for member in type(self) if member and member in self]
@@ -16,4 +16,6 @@ class AuthException(Exception):
     ROLE_ASSIGNMENT_FAILED = "Failed to assign role to user"
     ROLE_REMOVAL_FAILED = "Failed to remove role from user"
     PERMISSION_CHECK_FAILED = "Failed to check user permissions"
+    UNKNOWN_PERMISSION = "Unknown permission"
+    ROLE_NOT_FOUND = "Role not found"
     
\ No newline at end of file
@@ -0,0 +1,58 @@
+# Auth schema migrations (see src/core/migrations.py)
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from src.core.migrations import migration
+from src.modules.auth.enums import Permission
+
+DEFAULT_ROLES = {
+    "admin": ("Full access", Permission.all()),
+    "author": ("Writes posts", Permission.POSTS_CREATE),
+    "moderator": ("Moderates posts and comments", Permission.POSTS_EDIT_ANY | Permission.POSTS_DELETE_ANY | Permission.COMMENTS_MODERATE),
+    "monitoring": ("Reads metrics and operational stats", Permission.OPS_READ),
+}
+
+
+@migration("auth_0001_default_roles")
+def seed_default_roles(connection: Connection):
+    for name, (description, permissions) in DEFAULT_ROLES.items():
+        role_id = connection.execute(text("SELECT id FROM roles WHERE name = :name"), {"name": name}).scalar()
+        if role_id is not None:
+            continue
+        connection.execute(
+            text("INSERT INTO roles (name, description) VALUES (:name, :description)"),
+            {"name": name, "description": description},
+        )
+        role_id = connection.execute(text("SELECT id FROM roles WHERE name = :name"), {"name": name}).scalar()
+        for permission in permissions.names():
+            connection.execute(
+                text("INSERT INTO role_permissions (role_id, permission) VALUES (:role_id, :permission)"),
+                {"role_id": role_id, "permission": permission},
+            )
+
+
+def grant_to_role(connection: Connection, role_name: str, permission: Permission) -> None:
+    """Add `permission` to an existing role unless it already has it"""
+    role_id = connection.execute(text("SELECT id FROM roles WHERE name = :name"), {"name": role_name}).scalar()
+    if role_id is None:
+        return
+    granted = connection.execute(
+        text("SELECT 1 FROM role_permissions WHERE role_id = :role_id AND permission = :permission"),
+        {"role_id": role_id, "permission": permission.name},
+    ).scalar()
+    if not granted:
+        connection.execute(
+            text("INSERT INTO role_permissions (role_id, permission) VALUES (:role_id, :permission)"),
+            {"role_id": role_id, "permission": permission.name},
+        )
+
+
+@migration("auth_0002_data_export_permission")
+def grant_data_export(connection: Connection):
+    # roles seeded before the permission existed
+    grant_to_role(connection, "admin", Permission.DATA_EXPORT)
+
+
+@migration("auth_0003_ops_read_permission")
+def grant_ops_read(connection: Connection):
+    seed_default_roles(connection)  # adds the monitoring role; existing roles are left alone
+    grant_to_role(connection, "admin", Permission.OPS_READ)
@@ -1,37 +1,70 @@
 # User roles and permissions management routes
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.modules.user import services as user_services
-from src.modules.user.schemas import UserCreate, UserSchema
-from src.core.db_connection import get_db_session
+from src.core.db_connection import DbSession
+from src.modules.auth.dependencies import CurrentClaims, oauth2_scheme, require_permission
+from src.modules.auth.enums import Permission
+from src.modules.auth.exception import AuthException
+from src.modules.auth.schemas import LoginRequest, RoleAssignment, RolePermissionsUpdate, Token
+from src.modules.auth.services import auth_service
+from src.modules.user.services import user_service
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 router = APIRouter()
 
-@router.post("/auth/assign-role/", response_model=UserSchema)
+@router.post("/auth/token", response_model=Token)
+async def login_for_access_token(credentials: LoginRequest, db: DbSession):
+    user = await auth_service.authenticate_user(db, credentials.username, credentials.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=AuthException.INVALID_CREDENTIALS,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    claims = await auth_service.build_token_claims(db, user)
+    return Token(access_token=auth_service.create_access_token(claims))
+
+@router.post("/auth/logout", status_code=200)
+async def logout(claims: CurrentClaims, token: str = Depends(oauth2_scheme)):
+    auth_service.revoke_token(token)
+    return {"detail": "Token revoked"}
+
+@router.get("/auth/roles", response_model=dict[str, list[str]])
+async def list_roles(db: DbSession):
+    return await auth_service.list_roles(db)
+
+@router.put("/auth/roles/{role_name}", response_model=dict[str, list[str]])
+async def set_role_permissions(
+    role_name: str,
+    update: RolePermissionsUpdate,
+    db: DbSession,
+    claims: dict = Depends(require_permission(Permission.ROLES_MANAGE)),
+):
+    try:
+        await auth_service.set_role_permissions(db, role_name, update.permissions, update.description)
+    except AuthException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return {role_name: sorted(dict.fromkeys(update.permissions))}
+
+@router.post("/auth/assign-role/", status_code=200)
 async def assign_role_to_user(
-    user: UserSchema,
-    role: str,
-    db: AsyncSession = Depends(get_db_session)
+    assignment: RoleAssignment,
+    db: DbSession,
+    claims: dict = Depends(require_permission(Permission.ROLES_MANAGE)),
 ):
-    user = await user_services.get_user(db, user.id)
-    if not user:
+    if not await user_service.check_if_user_exists(db, assignment.user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    user = user_services.assign_role_to_user(user, role)
-    await user_services.update_user(db, user)
-    return user
+    if not await auth_service.assign_role_to_user(db, assignment.user_id, assignment.role):
+        raise HTTPException(status_code=404, detail=AuthException.ROLE_NOT_FOUND)
+    return {"detail": "Role assigned", "roles": await auth_service.get_user_roles(db, assignment.user_id)}
 
-@router.post("/auth/remove-role/", response_model=UserSchema)
+@router.post("/auth/remove-role/", status_code=200)
 async def remove_role_from_user(
-    user: UserSchema,
-    role: str,
-    db: AsyncSession = Depends(get_db_session)
+    assignment: RoleAssignment,
+    db: DbSession,
+    claims: dict = Depends(require_permission(Permission.ROLES_MANAGE)),
 ):
-    user = await user_services.get_user(db, user.id)
-    if not user:
+    if not await user_service.check_if_user_exists(db, assignment.user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    user = user_services.remove_role_from_user(user, role)
-    await user_services.update_user(db, user)
-    return user
\ No newline at end of file
+    removed = await auth_service.remove_role_from_user(db, assignment.user_id, assignment.role)
+    return {"detail": "Role removed" if removed else "User did not have this role",
+            "roles": await auth_service.get_user_roles(db, assignment.user_id)}
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class LoginRequest(BaseModel):
+    username: str = Field(..., example="johndoe")
+    password: str = Field(..., example="password123")
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+
+class RoleAssignment(BaseModel):
+    user_id: int = Field(..., example=1)
+    role: str = Field(..., example="author")
+
+
+class RolePermissionsUpdate(BaseModel):
+    permissions: list[str] = Field(default_factory=list, example=["POSTS_CREATE"])
+    description: Optional[str] = None
@@ -1,15 +1,45 @@
 # Auth services
 # create_access_token function to create JWT tokens
+import hashlib
+import time
 from datetime import datetime, timedelta
+from typing import Callable, Optional
 from jose import JWTError, jwt
-from app.core.config import settings
-from src.modules.user.models import User
-from src.modules.user.services import get_user
+from sqlalchemy import delete, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.core.cache import TTLCache, invalidate_after_transaction, may_cache
+from src.core.config import settings
+from src.core.security import password_hasher
+from src.modules.auth.enums import Permission
+from src.modules.auth.exception import AuthException
+from src.modules.auth.models import Role, RolePermission, UserRole
+from src.modules.user.models import User
+
+# sha256(token) -> verified claims; each entry expires at the token's own `exp`
+token_cache = TTLCache(
+    "auth_tokens",
+    max_entries=settings.token_cache_max_entries,
+    ttl_seconds=settings.access_token_expire_minutes * 60,
+    enabled=settings.token_cache_enabled,
+)
+
+# compiled role masks: a single entry holding ({role name: mask}, version)
+role_cache = TTLCache("roles", max_entries=1, ttl_seconds=settings.role_cache_ttl_seconds)
+_ROLE_MASKS_KEY = "role_masks"
+
+
+def _token_key(token: str) -> str:
+    # never keep raw bearer tokens in memory longer than the request
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class AuthService:
-    def __init__(self, db: AsyncSession):
-        self.db = db
+    def __init__(self):
+        # token key -> exp (epoch seconds) of tokens revoked in this process
+        self._revoked: dict[str, float] = {}
+        # optional external check (e.g. a shared deny list); runs on cache hits too
+        self.revocation_check: Optional[Callable[[dict], bool]] = None
 
     # create_access_token function to create JWT tokens
     def create_access_token(self, data: dict, expires_delta: timedelta | None = None):
@@ -23,39 +53,159 @@ class AuthService:
         return encoded_jwt
 
     # decode_access_token function to decode JWT tokens
-    def decode_access_token(token: str):
+    def decode_access_token(self, token: str) -> dict | None:
+        """Verified claims of a token, or None if it is invalid, expired or revoked.
+
+        Verified claims are cached until the token expires, so repeat requests with
+        the same token skip signature verification and JSON parsing.
+        """
+        key = _token_key(token)
+        if key in self._revoked:
+            return None
+        claims = token_cache.get(key)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            except JWTError:
+                return None
+            exp = claims.get("exp")
+            if exp is not None:
+                token_cache.set(key, claims, ttl_seconds=exp - time.time())
+        if self.revocation_check and self.revocation_check(claims):
+            return None
+        return dict(claims)
+
+    def revoke_token(self, token: str) -> None:
+        """Reject `token` from now on, even if its claims are cached"""
+        key = _token_key(token)
+        token_cache.invalidate(key)
         try:
-            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            return payload
+            claims = jwt.get_unverified_claims(token)
         except JWTError:
+            return
+        self._purge_revoked()
+        self._revoked[key] = claims.get("exp") or time.time() + settings.access_token_expire_minutes * 60
+
+    def _purge_revoked(self) -> None:
+        now = time.time()
+        for key in [key for key, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[key]
+
+    async def authenticate_user(self, db: AsyncSession, username: str, password: str) -> User | None:
+        """The active user with these credentials, or None"""
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
+        if not user or user.disabled or not user.hashed_password:
+            return None
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
-    
-    # def decode_access_token(
-    #     token: str, session: Session
-    # ) -> User | None:
-    #     try:
-    #         payload = jwt.decode(
-    #             token, settings.secret_key, algorithms=[settings.algorithm]
-    #         )
-    #         username: str = payload.get("sub")
-    #     except JWTError:
-    #         return
-    #     if not username:
-    #         return
-    #     user = get_user(session, username)
-    #     return user
-
-    # add user roles and permissions management functions here
-    # e.g., assign_role_to_user, check_user_permission, etc.
-
-    def assign_role_to_user(user: User, role: str):
-        user.roles.append(role)
         return user
 
-    def remove_role_from_user(user: User, role: str):
-        if role in user.roles:
-            user.roles.remove(role)
-        return user
+    # roles and permissions: each role compiles to a Permission bitmask; the masks of
+    # all roles are cached in-process, and a user's combined mask is embedded in the JWT
+    async def get_role_masks(self, db: AsyncSession) -> tuple[dict[str, int], str]:
+        """Compiled permission mask per role name, and a version hash of the whole table"""
+        cached = role_cache.get(_ROLE_MASKS_KEY)
+        if cached is not None:
+            return cached
+        result = await db.execute(
+            select(Role.name, RolePermission.permission).outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        )
+        names: dict[str, list[str]] = {}
+        for role_name, permission in result.all():
+            names.setdefault(role_name, [])
+            if permission:
+                names[role_name].append(permission)
+        masks = {role_name: int(Permission.from_names(permissions)) for role_name, permissions in names.items()}
+        version = hashlib.sha1(repr(sorted(masks.items())).encode()).hexdigest()[:12]
+        if may_cache(db, role_cache, _ROLE_MASKS_KEY):
+            role_cache.set(_ROLE_MASKS_KEY, (masks, version))
+        return masks, version
+
+    @staticmethod
+    def compile_permissions(masks: dict[str, int], roles: list[str]) -> Permission:
+        mask = Permission.NONE
+        for role_name in roles:
+            mask |= masks.get(role_name, 0)
+        return mask
+
+    async def get_user_roles(self, db: AsyncSession, user_id: int) -> list[str]:
+        result = await db.execute(
+            select(Role.name).join(UserRole, UserRole.role_id == Role.id).where(UserRole.user_id == user_id).order_by(Role.name)
+        )
+        return list(result.scalars().all())
+
+    async def build_token_claims(self, db: AsyncSession, user: User) -> dict:
+        """JWT claims for a user: identity, role names, compiled permission mask and role table version"""
+        roles = await self.get_user_roles(db, user.id)
+        masks, version = await self.get_role_masks(db)
+        return {
+            "sub": user.username,
+            "uid": user.id,
+            "roles": roles,
+            "perms": int(self.compile_permissions(masks, roles)),
+            "rv": version,
+        }
+
+    async def get_permissions(self, db: AsyncSession, claims: dict) -> Permission:
+        """Permission mask for verified claims; no database access while the role cache is warm"""
+        masks, version = await self.get_role_masks(db)
+        if claims.get("rv") == version:
+            return Permission(claims.get("perms", 0))
+        # role permissions changed since the token was issued: recompile from its role names
+        return self.compile_permissions(masks, claims.get("roles", []))
+
+    @staticmethod
+    def check_user_permission(granted: Permission, required: Permission) -> bool:
+        return granted & required == required
+
+    async def list_roles(self, db: AsyncSession) -> dict[str, list[str]]:
+        masks, _ = await self.get_role_masks(db)
+        return {role_name: Permission(mask).names() for role_name, mask in sorted(masks.items())}
+
+    async def set_role_permissions(self, db: AsyncSession, role_name: str, permissions: list[str], description: str | None = None) -> Role:
+        """Create or update a role with exactly these permissions"""
+        unknown = [name for name in permissions if name not in Permission.__members__ or name == "NONE"]
+        if unknown:
+            raise AuthException(f"{AuthException.UNKNOWN_PERMISSION}: {', '.join(unknown)}")
+        result = await db.execute(select(Role).where(Role.name == role_name))
+        role = result.scalars().first()
+        if not role:
+            role = Role(name=role_name)
+            db.add(role)
+        if description is not None:
+            role.description = description
+        await db.flush()
+        await db.execute(delete(RolePermission).where(RolePermission.role_id == role.id))
+        if permissions:
+            await db.execute(
+                insert(RolePermission),
+                [{"role_id": role.id, "permission": name} for name in dict.fromkeys(permissions)],
+            )
+        invalidate_after_transaction(db, role_cache, _ROLE_MASKS_KEY)
+        return role
+
+    async def assign_role_to_user(self, db: AsyncSession, user_id: int, role_name: str) -> bool:
+        """Grant a role; False if the role does not exist. Applies to tokens issued afterwards"""
+        role_id = (await db.execute(select(Role.id).where(Role.name == role_name))).scalar()
+        if role_id is None:
+            return False
+        exists = await db.execute(select(UserRole).where(UserRole.user_id == user_id, UserRole.role_id == role_id))
+        if not exists.scalars().first():
+            db.add(UserRole(user_id=user_id, role_id=role_id))
+            await db.flush()
+        return True
+
+    async def remove_role_from_user(self, db: AsyncSession, user_id: int, role_name: str) -> bool:
+        """Revoke a role; False if the user did not have it. Applies to tokens issued afterwards"""
+        role_id = (await db.execute(select(Role.id).where(Role.name == role_name))).scalar()
+        if role_id is None:
+            return False
+        result = await db.execute(
+            delete(UserRole).where(UserRole.user_id == user_id, UserRole.role_id == role_id).returning(UserRole.role_id)
+        )
+        return result.first() is not None
+
 
-    def check_user_permission(user: User, permission: str) -> bool:
-        return permission in user.permissions
\ No newline at end of file
+# Create singleton instance
+auth_service = AuthService()
@@ -1,6 +1,7 @@
 class BlogException(Exception):
-    def __init__(self, message: str):
+    def __init__(self, message: str, status_code: int = 400):
         self.message = message
+        self.status_code = status_code
         super().__init__(self.message)
 
     # Error Messages
@@ -0,0 +1,177 @@
+# Bulk import of blog posts from NDJSON or CSV
+#
+# Streams the input file, validates every record with BlogPostCreate and inserts valid
+# posts through BlogService.bulk_create_posts, one transaction per batch, on the shared
+# pooled engine. After each committed batch the number of consumed records is written to
+# a checkpoint file, so a failed import can be resumed where it stopped; the file is
+# deleted once the whole input has been imported, so a later run starts from the top.
+# Delivery is at-least-once: the file is written after the commit, so a crash between
+# the two imports that one batch again on resume.
+#
+#     python -m src.modules.blog.importer posts.ndjson
+#     python -m src.modules.blog.importer posts.csv --format csv --batch-size 5000
+#     python -m src.modules.blog.importer posts.ndjson --checkpoint posts.ckpt   # resume
+#
+# Files produced by GET /blogs/export/posts can be imported as they are.
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from src.core.bulk import validate_items
+from src.modules.blog.schemas import BlogPostCreate
+from src.modules.blog.utils import BlogUtils
+
+
+@dataclass
+class ImportStats:
+    consumed: int = 0  # records read, including skipped and rejected ones
+    skipped: int = 0  # records before the checkpoint, imported by an earlier run
+    imported: int = 0
+    rejected: int = 0
+    started_at: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.imported / elapsed if elapsed > 0 else 0.0
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict | str]:
+    """Yield raw records one at a time; never loads the whole file"""
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                # empty CSV cells mean "not set"
+                yield {key: value for key, value in row.items() if value != ""}
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # reported as a rejected record by validation
+                    yield line.strip()
+
+
+def prepare_record(record):
+    # tags may come as a comma separated string (CSV, or the export's storage format)
+    if not isinstance(record, dict):
+        return record
+    tags = record.get("tags")
+    if isinstance(tags, str):
+        record = {**record, "tags": BlogUtils.convert_tags_to_list(tags)}
+    return record
+
+
+def load_checkpoint(path: Optional[str]) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["consumed"]
+
+
+def remove_checkpoint(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def save_checkpoint(path: Optional[str], consumed: int) -> None:
+    if not path:
+        return
+    # write-then-rename so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"consumed": consumed}, f)
+    os.replace(tmp_path, path)
+
+
+async def import_posts(
+    path: str,
+    fmt: str = "ndjson",
+    batch_size: int = 1000,
+    checkpoint: Optional[str] = None,
+    report_every: float = 5.0,
+) -> ImportStats:
+    """Import every record of `path` after the checkpoint, one transaction per batch
+
+    The checkpoint is removed when the end of the file is reached; after a failure it is
+    kept so the next run resumes. At-least-once: if the process dies after a batch commits but before its checkpoint
+    is saved, resuming imports that batch (at most `batch_size` posts) a second time.
+    """
+    from src.core.db_connection import init_db, session_scope
+    from src.modules.blog.services import blog_service
+
+    await init_db()
+    stats = ImportStats(consumed=load_checkpoint(checkpoint), started_at=time.perf_counter())
+    resume_from = stats.consumed
+    if resume_from:
+        print(f"Resuming from {checkpoint}: skipping the first {resume_from} records, imported by an earlier run")
+    last_report = stats.started_at
+
+    async def flush(batch: list, consumed: int) -> None:
+        nonlocal last_report
+        valid, errors = validate_items([prepare_record(record) for record in batch], BlogPostCreate)
+        async with session_scope() as db:
+            ids_by_index, insert_errors = await blog_service.bulk_create_posts(db, valid)
+        # not atomic with the commit above: a crash in between repeats this batch on resume
+        save_checkpoint(checkpoint, consumed)
+        stats.consumed = consumed
+        stats.imported += len(ids_by_index)
+        stats.rejected += len(errors) + len(insert_errors)
+        for error in sorted(errors + insert_errors, key=lambda e: e.index):
+            print(f"record {consumed - len(batch) + error.index + 1}: {error.detail}")
+        now = time.perf_counter()
+        if now - last_report >= report_every:
+            last_report = now
+            print(f"{stats.imported} imported, {stats.rejected} rejected, {stats.rows_per_second:.0f} rows/s")
+
+    batch: list = []
+    position = 0
+    for record in read_records(path, fmt):
+        position += 1
+        if position <= resume_from:
+            stats.skipped += 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await flush(batch, position)
+            batch = []
+    if batch:
+        await flush(batch, position)
+    if stats.skipped < resume_from:
+        print(f"{path} has only {position} records, fewer than the checkpoint's {resume_from}")
+    remove_checkpoint(checkpoint)
+    return stats
+
+
+async def _main(args) -> None:
+    from src.core.db_connection import dispose_engines
+
+    try:
+        stats = await import_posts(args.path, args.format, args.batch_size, args.checkpoint, args.report_every)
+    finally:
+        await dispose_engines()
+    elapsed = time.perf_counter() - stats.started_at
+    print(
+        f"Done: {stats.imported} imported, {stats.rejected} rejected, {stats.skipped} skipped in {elapsed:.1f}s "
+        f"({stats.rows_per_second:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import blog posts from NDJSON or CSV")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records per transaction")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <path>.checkpoint); resumes if it exists, "
+                        "deleted after a complete import")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args()
+    args.format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    args.checkpoint = args.checkpoint or f"{args.path}.checkpoint"
+    asyncio.run(_main(args))
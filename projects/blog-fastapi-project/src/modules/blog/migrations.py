@@ -0,0 +1,67 @@
+# Blog schema migrations (see src/core/migrations.py)
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from src.core.migrations import migration, add_column_if_missing
+
+
+@migration("blog_0001_post_counters")
+def add_post_counters(connection: Connection):
+    add_column_if_missing(connection, "blog_posts", "likes_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(connection, "blog_posts", "comments_count", "INTEGER NOT NULL DEFAULT 0")
+    # initial count for posts that existed before the columns
+    connection.execute(text(
+        "UPDATE blog_posts SET "
+        "likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = blog_posts.id), "
+        "comments_count = (SELECT count(*) FROM comments WHERE comments.post_id = blog_posts.id)"
+    ))
+
+
+@migration("blog_0002_unique_likes")
+def dedupe_likes(connection: Connection):
+    # keep the first like per (post_id, user_id) so ux_likes_post_id_user_id can be built
+    connection.execute(text(
+        "DELETE FROM likes WHERE id NOT IN "
+        "(SELECT min(id) FROM likes GROUP BY post_id, user_id)"
+    ))
+    connection.execute(text(
+        "UPDATE blog_posts SET "
+        "likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = blog_posts.id)"
+    ))
+
+
+@migration("blog_0003_tags_backfill")
+def backfill_post_tags(connection: Connection, batch_size: int = 1000):
+    # rebuild tags/post_tags from the comma separated BlogPost.tags strings
+    from src.modules.blog.utils import BlogUtils
+
+    connection.execute(text("DELETE FROM post_tags"))
+    tag_ids = dict(connection.execute(text("SELECT name, id FROM tags")).all())
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text("SELECT id, tags FROM blog_posts WHERE id > :last_id ORDER BY id LIMIT :batch_size"),
+            {"last_id": last_id, "batch_size": batch_size},
+        ).all()
+        if not rows:
+            break
+        links = []
+        for post_id, tags in rows:
+            for name in BlogUtils.normalize_tags(BlogUtils.convert_tags_to_list(tags)):
+                if name not in tag_ids:
+                    connection.execute(text("INSERT INTO tags (name) VALUES (:name)"), {"name": name})
+                    tag_ids[name] = connection.execute(
+                        text("SELECT id FROM tags WHERE name = :name"), {"name": name}
+                    ).scalar_one()
+                links.append({"post_id": post_id, "tag_id": tag_ids[name]})
+        if links:
+            connection.execute(text("INSERT INTO post_tags (post_id, tag_id) VALUES (:post_id, :tag_id)"), links)
+        last_id = rows[-1][0]
+
+
+@migration("blog_0004_search_index")
+def add_search_index(connection: Connection):
+    from src.modules.blog.search import create_search_index, rebuild_search_index
+
+    # FTS5 index plus sync triggers (SQLite only), filled from existing posts
+    if create_search_index(connection):
+        rebuild_search_index(connection)
@@ -1,9 +1,9 @@
 # BlogPost model based on SQLAlchemy
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
 from src.core.database import Base
-from sqlalchemy.orm import  Mapped, mapped_column, relationship
+from sqlalchemy.orm import  Mapped, backref, mapped_column, relationship
 from src.modules.user.models import User
 from src.modules.blog.enums import PostStatus, CommentApprovalStatus
 
@@ -28,6 +28,23 @@ class BlogPost(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     published_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # denormalized counters, kept in step by the like/comment write paths
+    likes_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    comments_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    # Relationships never lazy load (that would be implicit IO under asyncio): use
+    # joinedload/selectinload in the query. passive_deletes keeps deletes from loading
+    # children. The User side is added as backrefs so the user module stays independent.
+    author: Mapped[User] = relationship(User, lazy="raise", backref=backref("posts", lazy="raise", passive_deletes=True))
+    comments: Mapped[list["Comment"]] = relationship(back_populates="post", lazy="raise", passive_deletes=True)
+    likes: Mapped[list["Likes"]] = relationship(back_populates="post", lazy="raise", passive_deletes=True)
+
+    __table_args__ = (
+        # keyset pagination order for list_posts, unfiltered and per author / status
+        Index("ix_blog_posts_created_at_id", "created_at", "id"),
+        Index("ix_blog_posts_author_id_created_at_id", "author_id", "created_at", "id"),
+        Index("ix_blog_posts_status_created_at_id", "status", "created_at", "id"),
+    )
 
     def __repr__(self):
         return f"<BlogPost(title={self.title}, status={self.status})>"
@@ -42,6 +59,14 @@ class Comment(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     approved: Mapped[CommentApprovalStatus] = mapped_column(SQLEnum(CommentApprovalStatus), default=CommentApprovalStatus.PENDING)
 
+    post: Mapped[BlogPost] = relationship(back_populates="comments", lazy="raise")
+    author: Mapped[User] = relationship(User, lazy="raise", backref=backref("comments", lazy="raise", passive_deletes=True))
+
+    __table_args__ = (
+        # keyset pagination order for list_comments
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Comment(author_name={self.author_name}, post_id={self.post_id})>"
     
@@ -53,9 +78,43 @@ class Likes (Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    post: Mapped[BlogPost] = relationship(back_populates="likes", lazy="raise")
+    user: Mapped[User] = relationship(User, lazy="raise", backref=backref("likes", lazy="raise", passive_deletes=True))
+
+    __table_args__ = (
+        # keyset pagination order for list_likes
+        Index("ix_likes_post_id_created_at_id", "post_id", "created_at", "id"),
+        # one like per user and post; target of the like_post upsert
+        Index("ux_likes_post_id_user_id", "post_id", "user_id", unique=True),
+    )
+
     def __repr__(self):
         return f"<Likes(user_id={self.user_id}, post_id={self.post_id})>"
 
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Tag(name={self.name})>"
+
+class PostTag(Base):
+    """Association between posts and tags (inverted index tag -> posts)"""
+    __tablename__ = "post_tags"
+
+    post_id: Mapped[int] = mapped_column(ForeignKey("blog_posts.id", ondelete="CASCADE"), primary_key=True)
+    tag_id: Mapped[int] = mapped_column(ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        # tag filter lookups go tag -> posts
+        Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
+    )
+
+    def __repr__(self):
+        return f"<PostTag(post_id={self.post_id}, tag_id={self.tag_id})>"
+
 # class Category(Base):
 #     __tablename__ = "categories"
 
@@ -65,3 +124,6 @@ class Likes (Base):
 
 #     def __repr__(self):
 #         return f"<Category(name={self.name})>"
+
+# register schema migrations for the tables above
+from src.modules.blog import migrations  # noqa: E402,F401
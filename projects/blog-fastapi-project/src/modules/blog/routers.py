@@ -1,33 +1,106 @@
 # Blog Routers
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Literal, Optional
+from src.core.bulk import BulkCreateResponse, bulk_response, check_bulk_size, validate_items
+from src.core.db_connection import DbSession, ReadDbSession, read_database_url, session_scope
+from src.core.export import ENCODERS, EXPORT_MEDIA_TYPES
+from src.core.http_cache import is_not_modified, make_etag, not_modified, set_validators
+from src.core.pagination import next_page_cursor, set_next_cursor_header
+from src.modules.auth.dependencies import OptionalClaims, require_permission
+from src.modules.auth.enums import Permission
+from src.modules.blog.enums import PostStatus
 from src.modules.blog.services import blog_service
+from src.modules.user.loaders import UserLoader, UserSummaryLoader
 from src.modules.user.services import user_service
 from src.modules.blog.schemas import (
-    BlogPostCreate, BlogPostUpdate, BlogPostResponse,
-    CommentBase, CommentCreate, CommentUpdate, CommentResponse,
+    BlogPostCreate, BlogPostUpdate, BlogPostResponse, BlogPostDetail, BlogPostWithAuthor, BlogPostSearchResult,
+    CommentBase, CommentCreate, CommentUpdate, CommentResponse, CommentWithAuthor,
     LikesBase, LikesCreate, LikesUpdate
 )
 
 router = APIRouter(prefix="/blogs")
 
+
+# Posts are validated on the ETag only, never Last-Modified: counter updates deliberately
+# leave updated_at alone, and on a list page a deletion, or an older post moving into
+# the page, doesn't change max(updated_at) either.
+def _posts_etag(posts) -> str:
+    """ETag over the version columns of posts (ORM rows, version rows or schemas)"""
+    return make_etag(*((p.id, p.updated_at, p.likes_count, p.comments_count) for p in posts))
+
+def _as_rows(items, model, authors: Optional[dict] = None) -> list[dict]:
+    """`items` as dicts of `model`'s fields, validated once by the route's response model
+
+    ORM rows can't be validated against a model with `author` (the relationship is
+    lazy="raise"). Without `authors` the key is left unset, and the route's
+    response_model_exclude_unset keeps it out of the response.
+    """
+    fields = [name for name in model.model_fields if name != "author"]
+    rows = [{name: getattr(item, name) for name in fields} for item in items]
+    if authors is not None:
+        for row in rows:
+            row["author"] = authors[row["author_id"]]
+    return rows
+
+async def _embed_authors(items, model, loader: UserSummaryLoader) -> list[dict]:
+    """`items` with an author summary each; all authors of the page come from one query"""
+    return _as_rows(items, model, await loader.load_many(item.author_id for item in items))
+
+INCLUDE_QUERY = Query(None, description="author = embed a summary of each item's author")
+
 ######## BlogPost Endpoints #########
 @router.post("/posts/", response_model=BlogPostResponse, tags=["posts"])
-async def create_post(post_data: BlogPostCreate):
+async def create_post(post_data: BlogPostCreate, db: DbSession):
     author_id = post_data.author_id
     if author_id is None:
         raise HTTPException(status_code=400, detail="author_id is required")
     
     # Check if author exists
-    author = await user_service.check_if_user_exists(author_id)
+    author = await user_service.check_if_user_exists(db, author_id)
     if not author:
         raise HTTPException(status_code=404, detail="Author not found")
     
-    return await blog_service.create_post(post_data)
+    return await blog_service.create_post(db, post_data)
+
+@router.post("/posts/bulk", response_model=BulkCreateResponse, tags=["posts"])
+async def bulk_create_posts(items: List[Any], db: DbSession):
+    """Create many posts in one transaction; invalid items are reported by index and skipped"""
+    check_bulk_size(items)
+    valid, errors = validate_items(items, BlogPostCreate)
+    ids_by_index, insert_errors = await blog_service.bulk_create_posts(db, valid)
+    return bulk_response(len(items), ids_by_index, errors + insert_errors)
 
 @router.get("/posts/{post_id}", response_model=BlogPostResponse, tags=["posts"])
-async def get_post(post_id: int):
-    post = await blog_service.get_post(post_id)
+async def get_post(post_id: int, request: Request, response: Response, db: ReadDbSession):
+    if "if-none-match" in request.headers:
+        # answer revalidations from the version columns, without loading content
+        version = await blog_service.get_post_version(db, post_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Post not found")
+        etag = _posts_etag([version])
+        if is_not_modified(request, etag, None):
+            return not_modified(etag, None)
+    post = await blog_service.get_post(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    set_validators(response, _posts_etag([post]), None)
+    return post
+
+@router.get("/posts/{post_id}/detail", response_model=BlogPostDetail, tags=["posts"])
+async def get_post_detail(
+    post_id: int,
+    db: ReadDbSession,
+    claims: OptionalClaims,
+    comments_limit: int = Query(5, ge=0, le=50),
+):
+    """Post with author, counters and the first approved comments in one request
+
+    With a bearer token, liked_by_viewer tells whether its user liked the post.
+    """
+    viewer_id = claims.get("uid") if claims else None
+    post = await blog_service.get_post_detail(db, post_id, comments_limit, viewer_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
@@ -36,57 +109,145 @@ async def get_post(post_id: int):
 async def update_post(
     post_id: int,
     post_data: BlogPostUpdate,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
-    existing_post = await blog_service.get_post(post_id)
-    if not existing_post:
+    # the author check is part of the UPDATE; another author's post raises 403
+    post = await blog_service.update_post(db, post_id, post_data, author_id=current_user_id)
+    if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Authorization check
-    if existing_post.author_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this post")
-    
-    return await blog_service.update_post(post_id, post_data)
+    return post
 
 @router.delete("/posts/{post_id}", response_model=dict, tags=["posts"])
 async def delete_post(
     post_id: int,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
-    existing_post = await blog_service.get_post(post_id)
-    if not existing_post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Authorization check
-    if existing_post.author_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this post")
-    
-    success = await blog_service.delete_post(post_id)
+    # the author check is part of the DELETE; another author's post raises 403
+    success = await blog_service.delete_post(db, post_id, author_id=current_user_id)
     if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete post")
-    
+        raise HTTPException(status_code=404, detail="Post not found")
+
     return {"detail": "Post deleted successfully"}
 
-@router.get("/posts/", response_model=List[BlogPostResponse], tags=["posts"])
+@router.get("/posts/", response_model=List[BlogPostWithAuthor], response_model_exclude_unset=True, tags=["posts"])
 async def list_posts(
+    request: Request,
+    response: Response,
+    db: ReadDbSession,
+    loader: UserLoader,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces skip"),
+    tag: Optional[List[str]] = Query(None, description="Only posts with these tags; repeat for several"),
+    tag_match: str = Query("all", pattern="^(all|any)$", description="all = every tag (AND), any = at least one (OR)"),
+    author_id: Optional[int] = Query(None, description="Only posts by this author"),
+    status: Optional[PostStatus] = Query(None, description="Only posts with this status"),
+    include: Optional[Literal["author"]] = INCLUDE_QUERY
+):
+    query = dict(
+        skip=skip, limit=limit, cursor=cursor, tags=tag, match_all_tags=tag_match == "all",
+        author_id=author_id, status=status,
+    )
+    if include == "author":
+        posts = await blog_service.list_posts(db, **query)
+        items = await _embed_authors(posts, BlogPostWithAuthor, loader)
+        # author names aren't versioned: fold them into the page's ETag
+        etag = make_etag(_posts_etag(posts), *(item["author"] for item in items))
+        next_cursor = next_page_cursor(posts, limit, "created_at", "id")
+        if is_not_modified(request, etag, None):
+            not_modified_response = not_modified(etag, None)
+            set_next_cursor_header(not_modified_response, next_cursor)
+            return not_modified_response
+        set_validators(response, etag, None)
+        set_next_cursor_header(response, next_cursor)
+        return items
+    if "if-none-match" in request.headers:
+        versions = await blog_service.list_post_versions(db, **query)
+        etag = _posts_etag(versions)
+        if is_not_modified(request, etag, None):
+            not_modified_response = not_modified(etag, None)
+            set_next_cursor_header(not_modified_response, next_page_cursor(versions, limit, "created_at", "id"))
+            return not_modified_response
+    posts = await blog_service.list_posts(db, **query)
+    set_validators(response, _posts_etag(posts), None)
+    set_next_cursor_header(response, next_page_cursor(posts, limit, "created_at", "id"))
+    return _as_rows(posts, BlogPostWithAuthor)
+
+@router.get("/search", response_model=List[BlogPostSearchResult], tags=["posts"])
+async def search_posts(
+    response: Response,
+    db: ReadDbSession,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
+):
+    results = await blog_service.search_posts(db, q, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, next_page_cursor(results, limit, "rank", "id"))
+    return results
+
+######## Export Endpoints #########
+@router.get("/export/{entity}", tags=["export"])
+async def export(
+    entity: Literal["posts", "comments", "likes"],
+    request: Request,
+    claims: dict = Depends(require_permission(Permission.DATA_EXPORT)),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: Optional[datetime] = Query(
+        None,
+        description="Only rows changed at or after this time (incremental export). Post counters are not "
+        "tracked: likes_count/comments_count changes don't bump updated_at",
+    ),
 ):
-    return await blog_service.list_posts(skip=skip, limit=limit)
+    """Stream a whole table as NDJSON or CSV with constant memory
+
+    Incremental post exports leave out posts whose only change is a like or comment;
+    recount from incremental likes/comments exports, or take a full export.
+    """
+    database_url = read_database_url(request)
+
+    async def body():
+        # the body is sent after the endpoint returns, so it needs its own session
+        async with session_scope(database_url) as db:
+            columns, partitions = await blog_service.stream_export(db, entity, updated_since)
+            async for chunk in ENCODERS[format](columns, partitions):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
 
 ######## Comment Endpoints #########
 @router.post("/comments/", response_model=CommentResponse, tags=["comments"])
 async def create_comment(
     comment_data: CommentCreate,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
     # Set the author_id from the authenticated user
     comment_data.author_id = current_user_id
-    return await blog_service.create_comment(comment_data)
+    return await blog_service.create_comment(db, comment_data)
+
+@router.post("/comments/bulk", response_model=BulkCreateResponse, tags=["comments"])
+async def bulk_create_comments(
+    items: List[Any],
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
+):
+    """Create many comments by the current user in one transaction"""
+    check_bulk_size(items)
+    # author_id comes from the authenticated user, like create_comment
+    items = [{**item, "author_id": current_user_id} if isinstance(item, dict) else item for item in items]
+    valid, errors = validate_items(items, CommentCreate)
+    ids_by_index, insert_errors = await blog_service.bulk_create_comments(db, valid)
+    return bulk_response(len(items), ids_by_index, errors + insert_errors)
 
 @router.get("/comments/{comment_id}", response_model=CommentResponse, tags=["comments"])
-async def get_comment(comment_id: int):
-    comment = await blog_service.get_comment(comment_id)
+async def get_comment(comment_id: int, db: ReadDbSession):
+    comment = await blog_service.get_comment(db, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     return comment
@@ -95,85 +256,95 @@ async def get_comment(comment_id: int):
 async def update_comment(
     comment_id: int,
     comment_data: CommentUpdate,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
-    existing_comment = await blog_service.get_comment(comment_id)
-    if not existing_comment:
+    # the author check is part of the UPDATE; another author's comment raises 403
+    comment = await blog_service.update_comment(db, comment_id, comment_data, author_id=current_user_id)
+    if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
-    
-    # Authorization check
-    if existing_comment.author_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this comment")
-    
-    return await blog_service.update_comment(comment_id, comment_data)
+    return comment
 
 @router.delete("/comments/{comment_id}", response_model=dict, tags=["comments"])
 async def delete_comment(
     comment_id: int,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
-    existing_comment = await blog_service.get_comment(comment_id)
-    if not existing_comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
-    # Authorization check
-    if existing_comment.author_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
-    
-    success = await blog_service.delete_comment(comment_id)
+    # the author check is part of the DELETE; another author's comment raises 403
+    success = await blog_service.delete_comment(db, comment_id, author_id=current_user_id)
     if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete comment")
-    
+        raise HTTPException(status_code=404, detail="Comment not found")
+
     return {"detail": "Comment deleted successfully"}
 
-@router.get("/posts/{post_id}/comments/", response_model=List[CommentResponse], tags=["comments"])
+@router.get(
+    "/posts/{post_id}/comments/", response_model=List[CommentWithAuthor], response_model_exclude_unset=True, tags=["comments"]
+)
 async def list_comments(
     post_id: int,
+    response: Response,
+    db: ReadDbSession,
+    loader: UserLoader,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces skip"),
+    include: Optional[Literal["author"]] = INCLUDE_QUERY
 ):
-    return await blog_service.list_comments(post_id=post_id, skip=skip, limit=limit)
+    comments = await blog_service.list_comments(db, post_id=post_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, next_page_cursor(comments, limit, "created_at", "id"))
+    if include == "author":
+        return await _embed_authors(comments, CommentWithAuthor, loader)
+    return _as_rows(comments, CommentWithAuthor)
 
 ######## Likes Endpoints #########
 @router.post("/likes/", response_model=dict, tags=["likes"])
 async def like_post(
     post_id: int,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
     like_data = LikesBase(post_id=post_id, user_id=current_user_id)
-    await blog_service.like_post(like_data)
-    return {"detail": "Post liked successfully"}
+    # repeated likes are accepted; "changed" tells whether this call added one
+    changed = await blog_service.like_post(db, like_data)
+    return {"detail": "Post liked successfully", "changed": changed}
 
 @router.delete("/likes/", response_model=dict, tags=["likes"])
 async def unlike_post(
     post_id: int,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: DbSession
 ):
-    success = await blog_service.unlike_post(post_id, current_user_id)
+    success = await blog_service.unlike_post(db, post_id, current_user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Like not found")
     return {"detail": "Post unliked successfully"}
 
 @router.get("/posts/{post_id}/likes/count", response_model=dict, tags=["likes"])
-async def count_likes(post_id: int):
-    count = await blog_service.count_likes(post_id)
+async def count_likes(post_id: int, db: ReadDbSession):
+    count = await blog_service.count_likes(db, post_id)
     return {"post_id": post_id, "like_count": count}
 
 @router.get("/posts/{post_id}/likes/check", response_model=dict, tags=["likes"])  
 async def has_liked(
     post_id: int,
-    current_user_id: int  # TODO: Replace with proper authentication dependency
+    current_user_id: int,  # TODO: Replace with proper authentication dependency
+    db: ReadDbSession
 ):
-    liked = await blog_service.has_liked(post_id, current_user_id)
+    liked = await blog_service.has_liked(db, post_id, current_user_id)
     return {"post_id": post_id, "has_liked": liked}
 
 @router.get("/posts/{post_id}/likes/", response_model=List[dict], tags=["likes"])
 async def list_likes(
     post_id: int,
+    response: Response,
+    db: ReadDbSession,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces skip")
 ):
-    likes = await blog_service.list_likes(post_id=post_id, skip=skip, limit=limit)
+    likes = await blog_service.list_likes(db, post_id=post_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, next_page_cursor(likes, limit, "created_at", "id"))
     return [{"user_id": like.user_id, "created_at": like.created_at} for like in likes]
 
 # Note: Authentication TODOs
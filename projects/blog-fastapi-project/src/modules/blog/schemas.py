@@ -1,9 +1,11 @@
 # BlogPost schema for full post. icluding author name and email
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 from src.modules.blog.enums import PostStatus, CommentApprovalStatus
+from src.modules.blog.utils import BlogUtils
+from src.modules.user.schemas import UserSummary
 
 ######### BlogPost Schema #########
 class BlogPostBase(BaseModel):
@@ -59,6 +61,8 @@ class BlogPostResponse(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
+    likes_count: int = 0
+    comments_count: int = 0
     
     model_config = {
         "use_enum_values": True,
@@ -66,7 +70,41 @@ class BlogPostResponse(BaseModel):
         "json_encoders": {
             datetime: lambda v: v.isoformat() if v else None
         }
-    } 
+    }
+
+    # tags are stored as a comma separated string on the model
+    @field_validator("tags", mode="before")
+    @classmethod
+    def convert_tags(cls, value):
+        if value is None or isinstance(value, str):
+            return BlogUtils.convert_tags_to_list(value)
+        return value
+
+class BlogPostSearchResult(BaseModel):
+    """Search hit: post summary (without content) with rank and highlighted snippet"""
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    tags: Optional[List[str]] = Field(default_factory=list)
+    status: PostStatus
+    category: Optional[str] = None
+    author_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    snippet: str
+    rank: float  # bm25 score, lower is more relevant
+
+    model_config = {
+        "use_enum_values": True,
+        "from_attributes": True,
+    }
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def convert_tags(cls, value):
+        if value is None or isinstance(value, str):
+            return BlogUtils.convert_tags_to_list(value)
+        return value
 
 ######### Comment Schema #########
 class CommentBase(BaseModel):
@@ -114,6 +152,18 @@ class CommentResponse(BaseModel):
         }
     }
 
+class BlogPostWithAuthor(BlogPostResponse):
+    author: Optional[UserSummary] = None
+
+class CommentWithAuthor(CommentResponse):
+    author: Optional[UserSummary] = None
+
+class BlogPostDetail(BlogPostResponse):
+    """Everything a post page needs: post, author, counters and the first approved comments"""
+    author: Optional[UserSummary] = None
+    top_comments: List[CommentWithAuthor] = Field(default_factory=list)
+    liked_by_viewer: Optional[bool] = None  # None for anonymous requests
+
 ######### Likes Schema #########
 class LikesBase(BaseModel):
     post_id: int
@@ -0,0 +1,88 @@
+# Full-text search over blog posts backed by an SQLite FTS5 index
+#
+# blog_posts_fts is an external-content FTS5 table: it stores only the inverted index
+# and reads column values from blog_posts. Triggers on blog_posts keep it in sync for
+# every write path (ORM, bulk inserts, raw SQL). Counter updates do not touch the
+# indexed columns, so they do not trigger re-indexing.
+#
+# Rebuild (e.g. after a bulk load with triggers disabled, or on an old database):
+#     python -m src.modules.blog.search rebuild
+import argparse
+import asyncio
+import re
+from sqlalchemy import column, table, text
+from sqlalchemy.engine import Connection
+
+FTS_TABLE = "blog_posts_fts"
+
+# column order matters for bm25() weights and snippet() column indexes
+fts_table = table(FTS_TABLE, column("rowid"), column("title"), column("excerpt"), column("content"), column("tags"))
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 3.0)  # title, excerpt, content, tags
+
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, excerpt, content, tags,
+        content='blog_posts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ai AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, excerpt, content, tags)
+        VALUES (new.id, new.title, new.excerpt, new.content, new.tags);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ad AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, excerpt, content, tags)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content, old.tags);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_posts_fts_au AFTER UPDATE OF title, excerpt, content, tags ON blog_posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, excerpt, content, tags)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content, old.tags);
+        INSERT INTO {FTS_TABLE}(rowid, title, excerpt, content, tags)
+        VALUES (new.id, new.title, new.excerpt, new.content, new.tags);
+    END""",
+]
+
+
+def create_search_index(connection: Connection) -> bool:
+    """Create the FTS5 table and sync triggers; returns False on non-SQLite databases"""
+    if connection.dialect.name != "sqlite":
+        return False
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    return True
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Re-read every blog post into the FTS index"""
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+async def _rebuild():
+    from src.core.db_connection import dispose_engines, get_engine, init_db
+    from src.modules.blog import models  # noqa: F401  registers tables and migrations
+
+    engine = get_engine()
+    await init_db(engine)
+    async with engine.begin() as conn:
+        if await conn.run_sync(create_search_index):
+            await conn.run_sync(rebuild_search_index)
+            print(f"Rebuilt {FTS_TABLE} for {engine.url.render_as_string(hide_password=True)}")
+        else:
+            print(f"Full-text search is only available on SQLite, not {engine.dialect.name}")
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blog full-text search index maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(_rebuild())
@@ -2,159 +2,499 @@
 from sqlalchemy import Column, ForeignKey, Integer
 from sqlalchemy.orm import Session
 from src.core.database import Base
-from src.core.db_connection import get_db_session
-from src.modules.blog.models import BlogPost, Comment, Likes, PostStatus, CommentApprovalStatus
+from src.core.pagination import decode_cursor
+from src.core.bulk import BulkItemError, batched, insert_returning_ids
+from src.core.cache import TTLCache, invalidate_after_transaction, may_cache
+from src.core.config import settings
+from src.modules.blog.exception import BlogException
+from src.modules.blog.models import BlogPost, Comment, Likes, PostTag, Tag, PostStatus, CommentApprovalStatus
 from src.modules.blog.utils import BlogUtils
 from src.modules.user.models import User
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import bindparam, delete, func, insert, literal_column, or_, tuple_, update
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from src.modules.blog.schemas import BlogPostCreate, BlogPostUpdate, CommentBase, CommentCreate, CommentUpdate, LikesBase, LikesCreate, LikesUpdate
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.modules.blog.search import BM25_WEIGHTS, build_match_query, fts_table
+from src.modules.blog.schemas import BlogPostDetail, BlogPostResponse, CommentWithAuthor, BlogPostSearchResult, BlogPostCreate, BlogPostUpdate, CommentBase, CommentCreate, CommentUpdate, LikesBase, LikesCreate, LikesUpdate
 
+# dialect-specific INSERT constructs that support ON CONFLICT
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# what a post representation depends on besides its content; counter updates keep
+# updated_at, so they are part of the version
+_VERSION_COLUMNS = (BlogPost.id, BlogPost.created_at, BlogPost.updated_at, BlogPost.likes_count, BlogPost.comments_count)
+
+# export name -> (model, column that updated_since filters on); comments and likes are
+# never edited, so their creation time is their last change
+_EXPORTS = {
+    "posts": (BlogPost, BlogPost.updated_at),
+    "comments": (Comment, Comment.created_at),
+    "likes": (Likes, Likes.created_at),
+}
+
+# post id -> BlogPostResponse
+post_cache = TTLCache(
+    "posts",
+    max_entries=settings.cache_posts_max_entries,
+    ttl_seconds=settings.cache_posts_ttl_seconds,
+    enabled=settings.cache_posts_enabled,
+)
+
+# All methods take the request-scoped session; the caller's unit of work commits,
+# services only flush so generated ids and defaults are available.
 class BlogService:
     def __init__(self):
         pass
-    
+
 
 
 ######## BlogPost Methods #########
-    async def create_post(self, post_data: BlogPostCreate) -> BlogPost:
-        async for db in get_db_session():
-            # convert tags list to comma separated string for database storage
-            post_data.tags = BlogUtils.convert_tags_to_string(post_data.tags)
-            new_post = BlogPost(**post_data.model_dump())
-            db.add(new_post)
-            await db.commit()
-            await db.refresh(new_post)
-            # convert tags back to list for response
-            new_post.tags = BlogUtils.convert_tags_to_list(new_post.tags)
-            return new_post
-    
-    async def get_post(self, post_id: int) -> Optional[BlogPost]:
-        async for db in get_db_session():
-            result = await db.execute(select(BlogPost).where(BlogPost.id == post_id)) 
-            # convert comma separated string back to list
-            post = result.scalars().first()
-            if post:
-                post.tags = BlogUtils.convert_tags_to_list(post.tags)
-            return post
-
-    async def update_post(self, post_id: int, post_data: BlogPostUpdate) -> Optional[BlogPost]:
-        async for db in get_db_session():
-            # Only convert tags if they are provided in the update
-            if post_data.tags is not None:
-                post_data.tags = BlogUtils.convert_tags_to_string(post_data.tags)
-            result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
-            existing_post = result.scalars().first()
-            if not existing_post:
-                return None
-            for key, value in post_data.model_dump(exclude_unset=True).items():
-                setattr(existing_post, key, value)
-            await db.commit()
-            await db.refresh(existing_post)
-            # convert tags back to list for response
-            existing_post.tags = BlogUtils.convert_tags_to_list(existing_post.tags)
-            return existing_post
-
-    async def delete_post(self, post_id: int) -> bool:
-        async for db in get_db_session():
-            result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
-            existing_post = result.scalars().first()
-            if not existing_post:
-                return False
-            await db.delete(existing_post)
-            await db.commit()
-            return True
-    
-    async def list_posts(self, skip: int = 0, limit: int = 10) -> List[BlogPost]:
-        async for db in get_db_session():
-            
-            result = await db.execute(select(BlogPost).offset(skip).limit(limit))
-            posts = result.scalars().all()
-            for post in posts:
-                post.tags = BlogUtils.convert_tags_to_list(post.tags)
-            return posts
+    async def create_post(self, db: AsyncSession, post_data: BlogPostCreate) -> BlogPost:
+        values = post_data.model_dump()
+        tags = BlogUtils.normalize_tags(post_data.tags)
+        # convert tags list to comma separated string for database storage
+        values["tags"] = BlogUtils.convert_tags_to_string(tags)
+        new_post = BlogPost(**values)
+        db.add(new_post)
+        await db.flush()
+        invalidate_after_transaction(db, post_cache, new_post.id)
+        await self._sync_post_tags(db, new_post.id, tags)
+        return new_post
 
-######## Comment Methods #########
-    async def create_comment(self, comment_data: CommentCreate) -> Comment:
-        async for db in get_db_session():
-            new_comment = Comment(**comment_data.model_dump())
-            db.add(new_comment)
-            await db.commit()
-            await db.refresh(new_comment)
-            return new_comment
-    async def get_comment(self, comment_id: int) -> Optional[Comment]:
-        async for db in get_db_session():
-            result = await db.execute(select(Comment).where(Comment.id == comment_id))
-            return result.scalars().first()
-    async def update_comment(self, comment_id: int, comment_data: CommentUpdate) -> Optional[Comment]:
-        async for db in get_db_session():
-            result = await db.execute(select(Comment).where(Comment.id == comment_id))
-            existing_comment = result.scalars().first()
-            if not existing_comment:
-                return None
-            for key, value in comment_data.model_dump().items():
-                setattr(existing_comment, key, value)
-            await db.commit()
-            await db.refresh(existing_comment)
-            return existing_comment
-    async def delete_comment(self, comment_id: int) -> bool:
-        async for db in get_db_session():
-            result = await db.execute(select(Comment).where(Comment.id == comment_id))
-            existing_comment = result.scalars().first()
-            if not existing_comment:
-                return False
-            await db.delete(existing_comment)
-            await db.commit()
-            return True
-    async def list_comments(self, post_id: int, skip: int = 0, limit: int = 10) -> List[Comment]:
-        async for db in get_db_session():
-            result = await db.execute(
-                select(Comment).where(Comment.post_id == post_id).offset(skip).limit(limit)
-            )
-            return result.scalars().all()
-    
+    async def bulk_create_posts(
+        self, db: AsyncSession, items: List[tuple[int, BlogPostCreate]]
+    ) -> tuple[dict[int, int], List[BulkItemError]]:
+        """Insert validated posts in executemany batches; returns {item index: new id} and per-item errors"""
+        author_ids = {post.author_id for _, post in items}
+        result = await db.execute(select(User.id).where(User.id.in_(author_ids)))
+        existing_authors = set(result.scalars())
+        errors = [BulkItemError(index=index, detail="Author not found") for index, post in items if post.author_id not in existing_authors]
+        accepted = [(index, post) for index, post in items if post.author_id in existing_authors]
 
-######## Likes Methods #########
-    async def like_post(self, like_data: LikesCreate) -> Likes:
-        async for db in get_db_session():
-            new_like = Likes(**like_data.model_dump())
-            db.add(new_like)
-            await db.commit()
-            await db.refresh(new_like)
-            return new_like
-    async def unlike_post(self, post_id: int, user_id: int) -> bool:
-        async for db in get_db_session():
+        ids_by_index: dict[int, int] = {}
+        tags_by_post: dict[int, List[str]] = {}
+        now = datetime.utcnow()
+        for batch in batched(accepted):
+            rows, batch_tags = [], []
+            for _, post in batch:
+                values = post.model_dump()
+                tags = BlogUtils.normalize_tags(post.tags)
+                values["tags"] = BlogUtils.convert_tags_to_string(tags)
+                # executemany needs the same keys in every row, so fill defaults here
+                values["created_at"] = values["created_at"] or now
+                values["updated_at"] = values["updated_at"] or now
+                rows.append(values)
+                batch_tags.append(tags)
+            post_ids = await insert_returning_ids(db, BlogPost, rows)
+            for (index, _), post_id, tags in zip(batch, post_ids, batch_tags):
+                ids_by_index[index] = post_id
+                if tags:
+                    tags_by_post[post_id] = tags
+        await self._insert_post_tags(db, tags_by_post)
+        return ids_by_index, errors
+
+    async def get_post(self, db: AsyncSession, post_id: int) -> Optional[BlogPostResponse]:
+        """Read-through cached post snapshot"""
+        cached = post_cache.get(post_id)
+        if cached is not None:
+            return cached
+        result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
+        post = result.scalars().first()
+        if not post:
+            return None
+        response = BlogPostResponse.model_validate(post)
+        # neither uncommitted writes of this session nor replica reads go to other requests
+        if may_cache(db, post_cache, post_id):
+            post_cache.set(post_id, response)
+        return response
+
+    async def update_post(
+        self, db: AsyncSession, post_id: int, post_data: BlogPostUpdate, author_id: Optional[int] = None
+    ) -> Optional[BlogPost]:
+        """Single UPDATE ... RETURNING; with `author_id`, only that author's post is updated
+
+        Returns None if the post doesn't exist and raises BlogException (403) if it isn't the author's.
+        """
+        values = post_data.model_dump(exclude_unset=True)
+        tags = None
+        # Only convert tags if they are provided in the update
+        if post_data.tags is not None:
+            tags = BlogUtils.normalize_tags(post_data.tags)
+            values["tags"] = BlogUtils.convert_tags_to_string(tags)
+        result = await db.execute(
+            update(BlogPost)
+            .where(*self._owned_by(BlogPost.id == post_id, BlogPost.author_id, author_id))
+            # an empty update still checks existence and ownership, without touching updated_at
+            .values(values or {BlogPost.updated_at: BlogPost.updated_at})
+            .returning(BlogPost)
+            .execution_options(populate_existing=True)
+        )
+        post = result.scalars().first()
+        if not post:
+            return await self._missing_or_forbidden(db, BlogPost, post_id, author_id)
+        invalidate_after_transaction(db, post_cache, post_id)
+        if tags is not None:
+            await self._sync_post_tags(db, post_id, tags)
+        return post
+
+    async def delete_post(self, db: AsyncSession, post_id: int, author_id: Optional[int] = None) -> bool:
+        """Single DELETE ... RETURNING; same ownership rules as update_post"""
+        result = await db.execute(
+            delete(BlogPost)
+            .where(*self._owned_by(BlogPost.id == post_id, BlogPost.author_id, author_id))
+            .returning(BlogPost.id)
+        )
+        if result.scalar() is None:
+            await self._missing_or_forbidden(db, BlogPost, post_id, author_id)
+            return False
+        # post_tags cascade on PostgreSQL; SQLite doesn't enforce foreign keys
+        await db.execute(delete(PostTag).where(PostTag.post_id == post_id))
+        invalidate_after_transaction(db, post_cache, post_id)
+        return True
+
+    @staticmethod
+    def _owned_by(condition, owner_column, owner_id: Optional[int]) -> list:
+        return [condition] if owner_id is None else [condition, owner_column == owner_id]
+
+    async def _missing_or_forbidden(self, db: AsyncSession, model, row_id: int, owner_id: Optional[int]) -> None:
+        """After a write matched no row: None if the row doesn't exist, BlogException (403) if it isn't owned"""
+        if owner_id is not None:
+            result = await db.execute(select(model.id).where(model.id == row_id))
+            if result.scalar() is not None:
+                raise BlogException(BlogException.UNAUTHORIZED_ACTION, status_code=403)
+        return None
+
+    async def get_post_detail(
+        self, db: AsyncSession, post_id: int, comments_limit: int = 5, viewer_id: Optional[int] = None
+    ) -> Optional[BlogPostDetail]:
+        """Post page in two statements: post + author (+ viewer's like), then top approved comments + authors
+
+        Counts come from the denormalized counters on the post row.
+        """
+        liked_by_viewer = (
+            select(Likes.id).where(Likes.post_id == BlogPost.id, Likes.user_id == viewer_id).exists()
+            if viewer_id is not None
+            else literal_column("NULL")
+        )
+        result = await db.execute(
+            select(BlogPost, liked_by_viewer.label("liked_by_viewer"))
+            .options(joinedload(BlogPost.author))
+            .where(BlogPost.id == post_id)
+        )
+        row = result.first()
+        if not row:
+            return None
+        post, liked = row
+        comments = []
+        if comments_limit:
             result = await db.execute(
-                select(Likes).where(Likes.post_id == post_id, Likes.user_id == user_id)
+                select(Comment)
+                .options(joinedload(Comment.author))
+                .where(Comment.post_id == post_id, Comment.approved == CommentApprovalStatus.APPROVED)
+                .order_by(Comment.created_at, Comment.id)
+                .limit(comments_limit)
             )
-            existing_like = result.scalars().first()
-            if not existing_like:
-                return False
-            await db.delete(existing_like)
-            await db.commit()
-            return True
-    async def count_likes(self, post_id: int) -> int:
-        async for db in get_db_session():
-            result = await db.execute(
-                select(Likes).where(Likes.post_id == post_id)
+            comments = result.scalars().all()
+        detail = BlogPostDetail.model_validate(post)
+        detail.top_comments = [CommentWithAuthor.model_validate(comment) for comment in comments]
+        detail.liked_by_viewer = None if liked is None else bool(liked)
+        return detail
+
+    async def get_post_version(self, db: AsyncSession, post_id: int):
+        """Version columns of a post (id, timestamps, counters) without loading its content"""
+        cached = post_cache.get(post_id)
+        if cached is not None:
+            return cached
+        result = await db.execute(select(*_VERSION_COLUMNS).where(BlogPost.id == post_id))
+        return result.first()
+
+    def _list_posts_query(self, columns, skip, limit, cursor, tags, match_all_tags, author_id, status):
+        query = select(*columns).order_by(BlogPost.created_at, BlogPost.id)
+        # equality filters lead the (column, created_at, id) indexes, so pages stay index range scans
+        if author_id is not None:
+            query = query.where(BlogPost.author_id == author_id)
+        if status is not None:
+            query = query.where(BlogPost.status == status)
+        tags = BlogUtils.normalize_tags(tags)
+        if tags:
+            # tag filter through the post_tags index: all tags (AND) or any tag (OR)
+            matching = (
+                select(PostTag.post_id)
+                .join(Tag, Tag.id == PostTag.tag_id)
+                .where(Tag.name.in_(tags))
+                .group_by(PostTag.post_id)
             )
-            return len(result.scalars().all())
-    async def has_liked(self, post_id: int, user_id: int) -> bool:
-        async for db in get_db_session():
-            result = await db.execute(
-                select(Likes).where(Likes.post_id == post_id, Likes.user_id == user_id)
+            if match_all_tags:
+                matching = matching.having(func.count(PostTag.tag_id) == len(tags))
+            query = query.where(BlogPost.id.in_(matching))
+        if cursor:
+            # keyset pagination: continue after the (created_at, id) of the previous page
+            query = query.where(tuple_(BlogPost.created_at, BlogPost.id) > decode_cursor(cursor, datetime, int))
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    async def list_posts(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match_all_tags: bool = True,
+        author_id: Optional[int] = None,
+        status: Optional[PostStatus] = None,
+    ) -> List[BlogPost]:
+        result = await db.execute(self._list_posts_query((BlogPost,), skip, limit, cursor, tags, match_all_tags, author_id, status))
+        return result.scalars().all()
+
+    async def list_post_versions(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match_all_tags: bool = True,
+        author_id: Optional[int] = None,
+        status: Optional[PostStatus] = None,
+    ) -> list:
+        """Version columns of the posts list_posts() would return, in the same order"""
+        result = await db.execute(self._list_posts_query(_VERSION_COLUMNS, skip, limit, cursor, tags, match_all_tags, author_id, status))
+        return result.all()
+
+    async def stream_export(
+        self, db: AsyncSession, entity: str, updated_since: Optional[datetime] = None
+    ) -> tuple[List[str], AsyncIterator[list]]:
+        """Column names and row partitions of a table, read through a server-side cursor in id order
+
+        `updated_since` filters posts on updated_at, which counter updates don't bump, so
+        incremental post exports don't carry likes_count/comments_count changes.
+        """
+        model, since_column = _EXPORTS[entity]
+        table = model.__table__
+        query = select(table).order_by(table.c.id)
+        if updated_since is not None:
+            if updated_since.tzinfo is not None:
+                # timestamps are stored as naive UTC
+                updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+            query = query.where(since_column >= updated_since)
+        result = await db.stream(query.execution_options(yield_per=settings.export_yield_per))
+        return list(result.keys()), result.partitions()
+
+    async def _sync_post_tags(self, db: AsyncSession, post_id: int, tags: List[str]) -> None:
+        """Make post_tags for a post match `tags`, creating missing Tag rows"""
+        await db.execute(delete(PostTag).where(PostTag.post_id == post_id))
+        await self._insert_post_tags(db, {post_id: tags})
+
+    async def _insert_post_tags(self, db: AsyncSession, tags_by_post: dict[int, List[str]]) -> None:
+        """Add post_tags rows for new posts, creating missing Tag rows once for all of them"""
+        names = list(dict.fromkeys(name for tags in tags_by_post.values() for name in tags))
+        if not names:
+            return
+        upsert = _UPSERT_INSERTS[db.bind.dialect.name]
+        await db.execute(
+            upsert(Tag).values([{"name": name} for name in names]).on_conflict_do_nothing(index_elements=[Tag.name])
+        )
+        result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names)))
+        tag_ids = dict(result.all())
+        await db.execute(
+            insert(PostTag),
+            [{"post_id": post_id, "tag_id": tag_ids[name]} for post_id, tags in tags_by_post.items() for name in tags],
+        )
+
+    async def search_posts(self, db: AsyncSession, query: str, limit: int = 10, cursor: Optional[str] = None) -> List[BlogPostSearchResult]:
+        """Full-text search (SQLite FTS5), best bm25 rank first, with highlighted snippets"""
+        match = build_match_query(query)
+        if not match:
+            return []
+        fts = literal_column(fts_table.name)
+        rank = func.bm25(fts, *BM25_WEIGHTS)
+        snippet = func.snippet(fts, -1, "<mark>", "</mark>", "…", 16)
+        summary_columns = [getattr(BlogPost, name) for name in BlogPostSearchResult.model_fields if name not in ("rank", "snippet")]
+        stmt = (
+            # content is searched but not returned
+            select(*summary_columns, rank.label("rank"), snippet.label("snippet"))
+            .join_from(fts_table, BlogPost, BlogPost.id == fts_table.c.rowid)
+            .where(fts.op("MATCH")(match))
+            .order_by(rank, BlogPost.id)
+            .limit(limit)
+        )
+        if cursor:
+            stmt = stmt.where(tuple_(rank, BlogPost.id) > decode_cursor(cursor, float, int))
+        result = await db.execute(stmt)
+        return [BlogPostSearchResult.model_validate(dict(row._mapping)) for row in result.all()]
+
+######## Comment Methods #########
+    async def create_comment(self, db: AsyncSession, comment_data: CommentCreate) -> Comment:
+        new_comment = Comment(**comment_data.model_dump())
+        db.add(new_comment)
+        await db.flush()
+        await self._adjust_counter(db, new_comment.post_id, BlogPost.comments_count, 1)
+        return new_comment
+    async def bulk_create_comments(
+        self, db: AsyncSession, items: List[tuple[int, CommentCreate]]
+    ) -> tuple[dict[int, int], List[BulkItemError]]:
+        """Insert validated comments in executemany batches and bump each post's counter once"""
+        post_ids = {comment.post_id for _, comment in items}
+        result = await db.execute(select(BlogPost.id).where(BlogPost.id.in_(post_ids)))
+        existing_posts = set(result.scalars())
+        errors = [BulkItemError(index=index, detail="Post not found") for index, comment in items if comment.post_id not in existing_posts]
+        accepted = [(index, comment) for index, comment in items if comment.post_id in existing_posts]
+
+        ids_by_index: dict[int, int] = {}
+        added_per_post: dict[int, int] = {}
+        now = datetime.utcnow()
+        for batch in batched(accepted):
+            rows = []
+            for _, comment in batch:
+                values = comment.model_dump()
+                values["created_at"] = values["created_at"] or now
+                rows.append(values)
+                added_per_post[comment.post_id] = added_per_post.get(comment.post_id, 0) + 1
+            comment_ids = await insert_returning_ids(db, Comment, rows)
+            for (index, _), comment_id in zip(batch, comment_ids):
+                ids_by_index[index] = comment_id
+        if added_per_post:
+            # one executemany UPDATE for all posts instead of one statement per post
+            posts = BlogPost.__table__
+            connection = await db.connection()
+            await connection.execute(
+                update(posts)
+                .where(posts.c.id == bindparam("post_id"))
+                .values(comments_count=posts.c.comments_count + bindparam("added"), updated_at=posts.c.updated_at),
+                [{"post_id": post_id, "added": added} for post_id, added in added_per_post.items()],
             )
-            return result.scalars().first() is not None
-    async def list_likes(self, post_id: int, skip: int = 0, limit: int = 10) -> List[Likes]:
-        async for db in get_db_session():
-            result = await db.execute(
-                select(Likes).where(Likes.post_id == post_id).offset(skip).limit(limit)
+            for post_id in added_per_post:
+                invalidate_after_transaction(db, post_cache, post_id)
+        return ids_by_index, errors
+
+    async def get_comment(self, db: AsyncSession, comment_id: int) -> Optional[Comment]:
+        result = await db.execute(select(Comment).where(Comment.id == comment_id))
+        return result.scalars().first()
+    async def update_comment(
+        self, db: AsyncSession, comment_id: int, comment_data: CommentUpdate, author_id: Optional[int] = None
+    ) -> Optional[Comment]:
+        """Single UPDATE ... RETURNING; same ownership rules as update_post"""
+        values = comment_data.model_dump(exclude_unset=True)
+        result = await db.execute(
+            update(Comment)
+            .where(*self._owned_by(Comment.id == comment_id, Comment.author_id, author_id))
+            .values(values or {Comment.id: Comment.id})
+            .returning(Comment)
+            .execution_options(populate_existing=True)
+        )
+        comment = result.scalars().first()
+        if not comment:
+            return await self._missing_or_forbidden(db, Comment, comment_id, author_id)
+        return comment
+    async def delete_comment(self, db: AsyncSession, comment_id: int, author_id: Optional[int] = None) -> bool:
+        """Single DELETE ... RETURNING; same ownership rules as update_post"""
+        result = await db.execute(
+            delete(Comment)
+            .where(*self._owned_by(Comment.id == comment_id, Comment.author_id, author_id))
+            .returning(Comment.post_id)
+        )
+        post_id = result.scalar()
+        if post_id is None:
+            await self._missing_or_forbidden(db, Comment, comment_id, author_id)
+            return False
+        await self._adjust_counter(db, post_id, BlogPost.comments_count, -1)
+        return True
+    async def list_comments(self, db: AsyncSession, post_id: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> List[Comment]:
+        query = select(Comment).where(Comment.post_id == post_id).order_by(Comment.created_at, Comment.id)
+        if cursor:
+            query = query.where(tuple_(Comment.created_at, Comment.id) > decode_cursor(cursor, datetime, int))
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
+        return result.scalars().all()
+
+
+######## Likes Methods #########
+    async def like_post(self, db: AsyncSession, like_data: LikesCreate) -> bool:
+        """Idempotent like; returns False when the user had already liked the post"""
+        upsert = _UPSERT_INSERTS[db.bind.dialect.name]
+        result = await db.execute(
+            upsert(Likes)
+            .values(post_id=like_data.post_id, user_id=like_data.user_id)
+            .on_conflict_do_nothing(index_elements=[Likes.post_id, Likes.user_id])
+            .returning(Likes.id)
+        )
+        liked = result.scalar() is not None
+        if liked:
+            await self._adjust_counter(db, like_data.post_id, BlogPost.likes_count, 1)
+        return liked
+    async def unlike_post(self, db: AsyncSession, post_id: int, user_id: int) -> bool:
+        """Remove a like; returns False when there was nothing to remove"""
+        result = await db.execute(
+            delete(Likes).where(Likes.post_id == post_id, Likes.user_id == user_id).returning(Likes.id)
+        )
+        unliked = result.scalar() is not None
+        if unliked:
+            await self._adjust_counter(db, post_id, BlogPost.likes_count, -1)
+        return unliked
+    async def count_likes(self, db: AsyncSession, post_id: int) -> int:
+        result = await db.execute(
+            select(BlogPost.likes_count).where(BlogPost.id == post_id)
+        )
+        return result.scalar() or 0
+    async def has_liked(self, db: AsyncSession, post_id: int, user_id: int) -> bool:
+        result = await db.execute(
+            select(Likes.id).where(Likes.post_id == post_id, Likes.user_id == user_id)
+        )
+        return result.scalars().first() is not None
+    async def list_likes(self, db: AsyncSession, post_id: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> List[Likes]:
+        query = select(Likes).where(Likes.post_id == post_id).order_by(Likes.created_at, Likes.id)
+        if cursor:
+            query = query.where(tuple_(Likes.created_at, Likes.id) > decode_cursor(cursor, datetime, int))
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
+        return result.scalars().all()
+
+
+######## Counter Methods #########
+    async def _adjust_counter(self, db: AsyncSession, post_id: int, counter, delta: int) -> None:
+        # same transaction as the like/comment write; counters are not content
+        # edits, so updated_at is kept as is
+        await db.execute(
+            update(BlogPost)
+            .where(BlogPost.id == post_id)
+            .values({counter: counter + delta, BlogPost.updated_at: BlogPost.updated_at})
+        )
+        invalidate_after_transaction(db, post_cache, post_id)
+
+    async def reconcile_counters(self, db: AsyncSession, after_id: int = 0, batch_size: int = 500) -> tuple[Optional[int], int]:
+        """Recount likes and comments for the next batch of posts after `after_id`.
+        Returns the last post id of the batch (None when done) and how many posts drifted."""
+        result = await db.execute(
+            select(BlogPost.id).where(BlogPost.id > after_id).order_by(BlogPost.id).limit(batch_size)
+        )
+        post_ids = result.scalars().all()
+        if not post_ids:
+            return None, 0
+        likes = select(func.count(Likes.id)).where(Likes.post_id == BlogPost.id).scalar_subquery()
+        comments = select(func.count(Comment.id)).where(Comment.post_id == BlogPost.id).scalar_subquery()
+        # one statement per batch, so concurrent increments can't be overwritten by a stale count
+        result = await db.execute(
+            update(BlogPost)
+            .where(
+                BlogPost.id.in_(post_ids),
+                or_(BlogPost.likes_count != likes, BlogPost.comments_count != comments),
             )
-            return result.scalars().all()
+            .values(likes_count=likes, comments_count=comments, updated_at=BlogPost.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            for post_id in post_ids:
+                invalidate_after_transaction(db, post_cache, post_id)
+        return post_ids[-1], result.rowcount
 
 
 # Create singleton instance
-blog_service = BlogService()
\ No newline at end of file
+blog_service = BlogService()
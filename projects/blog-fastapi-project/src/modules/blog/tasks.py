@@ -0,0 +1,33 @@
+# Blog background jobs
+import asyncio
+import logging
+from src.core.config import settings
+from src.core.db_connection import session_scope
+from src.modules.blog.services import blog_service
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_post_counters(batch_size: int | None = None) -> int:
+    """Recount likes_count/comments_count for every post, one transaction per batch.
+    Returns the number of posts whose counters had drifted."""
+    batch_size = batch_size or settings.counter_reconcile_batch_size
+    after_id, fixed = 0, 0
+    while after_id is not None:
+        async with session_scope() as db:
+            after_id, drifted = await blog_service.reconcile_counters(db, after_id=after_id, batch_size=batch_size)
+        fixed += drifted
+    if fixed:
+        logger.warning(f"Counter reconciliation fixed {fixed} posts")
+    return fixed
+
+
+async def run_counter_reconciliation(interval_seconds: int | None = None):
+    """Run reconcile_post_counters periodically until cancelled"""
+    interval_seconds = interval_seconds or settings.counter_reconcile_interval_seconds
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await reconcile_post_counters()
+        except Exception as e:
+            logger.error(f"Counter reconciliation failed: {e}")
@@ -26,4 +26,15 @@ class BlogUtils:
             return []
         return [tag.strip() for tag in tags_str.split(",") if tag.strip()]
 
-  
\ No newline at end of file
+  
+
+    # Public method to clean up tags before they are stored
+    @staticmethod
+    def normalize_tags(tags: Optional[List[str]]) -> List[str]:
+        """Strip whitespace, drop empty and duplicate tags, keeping the original order.
+        Commas split a tag, so the stored string and the tags table always agree."""
+        if not tags:
+            return []
+        return list(dict.fromkeys(
+            part for tag in tags for part in BlogUtils.convert_tags_to_list(str(tag))
+        ))
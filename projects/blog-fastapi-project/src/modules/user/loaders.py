@@ -0,0 +1,37 @@
+# Per-request batching loaders
+# Embedding the author of every item of a page with one lookup per item is an N+1. A
+# loader collects the ids of a whole page, resolves the ones it hasn't seen yet with a
+# single IN query and remembers the results until the request ends.
+from typing import Annotated, Iterable, Optional
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.db_connection import ReadDbSession
+from src.modules.user.schemas import UserSummary
+from src.modules.user.services import user_service
+
+
+class UserSummaryLoader:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._loaded: dict[int, Optional[UserSummary]] = {}
+
+    async def load_many(self, user_ids: Iterable[int]) -> dict[int, Optional[UserSummary]]:
+        """Summaries for the given ids (None for unknown users)"""
+        user_ids = set(user_ids)
+        missing = user_ids - self._loaded.keys()
+        if missing:
+            users = await user_service.get_users_by_ids(self.db, missing)
+            for user_id in missing:
+                user = users.get(user_id)
+                self._loaded[user_id] = UserSummary.model_validate(user) if user else None
+        return {user_id: self._loaded[user_id] for user_id in user_ids}
+
+    async def load(self, user_id: int) -> Optional[UserSummary]:
+        return (await self.load_many([user_id]))[user_id]
+
+
+def get_user_loader(db: ReadDbSession) -> UserSummaryLoader:
+    return UserSummaryLoader(db)
+
+
+UserLoader = Annotated[UserSummaryLoader, Depends(get_user_loader)]
@@ -1,8 +1,12 @@
 # user routers
-from fastapi import APIRouter, HTTPException, status
+from typing import Any
+from fastapi import APIRouter, HTTPException, Response, status
+from src.core.bulk import BulkCreateResponse, bulk_response, check_bulk_size, validate_items
 from src.modules.user.exceptions import UserException
 from src.modules.user.schemas import UserCreate, UserSchema, UserUpdate
 from src.modules.user.services import user_service
+from src.core.db_connection import DbSession
+from src.core.pagination import next_page_cursor, set_next_cursor_header
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,32 +16,42 @@ router = APIRouter()
 @router.post("/users/", response_model=UserSchema)
 # send error message if unique constraint or any other error occurs
 
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, db: DbSession):
     try:
-        return await user_service.create_user(**user.dict())
+        return await user_service.create_user(db, **user.dict())
     except UserException as ue:
         raise HTTPException(status_code=ue.status_code, detail=ue.detail)
     except Exception as e:
         logger.error(f"Error creating user: {e}")
         raise HTTPException(status_code=400, detail=UserException.USER_SERVICE_ERROR)
 
+# create many users in one transaction; invalid items are reported by index and skipped
+@router.post("/users/bulk", response_model=BulkCreateResponse)
+async def bulk_create_users(items: list[Any], db: DbSession):
+    check_bulk_size(items)
+    valid, errors = validate_items(items, UserCreate)
+    ids_by_index, insert_errors = await user_service.bulk_create_users(db, valid)
+    return bulk_response(len(items), ids_by_index, errors + insert_errors)
+
 #get all users 
 @router.get("/user/all-users", response_model=list[UserSchema])
-async def read_users(skip: int = 0, limit: int = 100):
-    users = await user_service.get_all_users(skip=skip, limit=limit)
+async def read_users(response: Response, db: DbSession, skip: int = 0, limit: int = 100, cursor: str | None = None):
+    users = await user_service.get_all_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, next_page_cursor(users, limit, "id"))
     return users
 
 @router.get("/users/{username}", response_model=UserSchema)
-async def read_user(username: str):
-    db_user = await user_service.get_user(username)
+async def read_user(username: str, db: DbSession):
+    db_user = await user_service.get_user(db, username)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 # Update User for user with user_id in route params
 @router.put("/users/{user_id}", response_model=UserSchema)
-async def update_user(user_id: int, user: UserUpdate):
+async def update_user(user_id: int, user: UserUpdate, db: DbSession):
     updated_user = await user_service.update_user(
+        db,
         user_id=user_id,
         username=user.username,
         email=user.email,
@@ -51,8 +65,8 @@ async def update_user(user_id: int, user: UserUpdate):
 
 # Delete User by Id
 @router.delete("/users/{user_id}", status_code=200)
-async def delete_user(user_id: int):
-    success = await user_service.delete_user(user_id)
+async def delete_user(user_id: int, db: DbSession):
+    success = await user_service.delete_user(db, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return { "detail": "User deleted"}
@@ -8,6 +8,14 @@ class UserSchema(BaseModel):
     full_name: Optional[str] = None
     disabled: Optional[bool] = None
 
+class UserSummary(BaseModel):
+    """Compact public view of a user, embedded in other responses"""
+    id: int
+    username: str
+    full_name: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
 class UserInDB(UserSchema):
     hashed_password: str
 
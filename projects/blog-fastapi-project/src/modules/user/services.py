@@ -1,76 +1,135 @@
 # User services
+from sqlalchemy import delete, or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from src.modules.auth.models import UserRole
 from src.modules.user.models import User
-from src.modules.user.schemas import UserSchema
-from passlib.context import CryptContext
-from src.core.db_connection import get_db_session
+from src.modules.user.schemas import UserCreate, UserSchema
 from fastapi import HTTPException
 from src.modules.user.exceptions import UserException
+from src.core.pagination import decode_cursor
+from src.core.bulk import BulkItemError, batched, insert_returning_ids
+from src.core.cache import TTLCache, invalidate_after_transaction, may_cache
+from src.core.config import settings
+from src.core.security import password_hasher
 import logging
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ("id", user_id) / ("username", username) -> UserSchema
+user_cache = TTLCache(
+    "users",
+    max_entries=settings.cache_users_max_entries,
+    ttl_seconds=settings.cache_users_ttl_seconds,
+    enabled=settings.cache_users_enabled,
+)
+
+
+def _cache_user(db: AsyncSession, user: UserSchema) -> None:
+    keys = [("id", user.id), ("username", user.username)]
+    if all(may_cache(db, user_cache, key) for key in keys):
+        for key in keys:
+            user_cache.set(key, user)
+
+
+def _invalidate_user(db: AsyncSession, user_id: int, *usernames: str) -> None:
+    invalidate_after_transaction(db, user_cache, ("id", user_id))
+    for username in usernames:
+        invalidate_after_transaction(db, user_cache, ("username", username))
+
 # Function to get user by username
+# Methods take the request-scoped session; the caller's unit of work commits.
 class UserService:
     def __init__(self):
         pass
     
-    async def get_user(self, username: str) -> UserSchema | None:
+    async def get_user(self, db: AsyncSession, username: str) -> UserSchema | None:
         """Get a single user by username"""
+        cached = user_cache.get(("username", username))
+        if cached is not None:
+            return cached
         try:
-            async for db in get_db_session():
-                result = await db.execute(select(User).where(User.username == username))
-                user = result.scalars().first()
-                if user:
-                    return UserSchema(
-                        id=user.id,
-                        username=user.username,
-                        email=user.email,
-                        full_name=user.full_name,
-                        disabled=bool(user.disabled)
-                    )
-                return None
+            result = await db.execute(select(User).where(User.username == username))
+            user = result.scalars().first()
+            if user:
+                schema = UserSchema(
+                    id=user.id,
+                    username=user.username,
+                    email=user.email,
+                    full_name=user.full_name,
+                    disabled=bool(user.disabled)
+                )
+                _cache_user(db, schema)
+                return schema
+            return None
         except Exception as e:
             logging.error(f"Error fetching user {username}: {e}")
             raise UserException(400, UserException.USER_NOT_FOUND)
 
-    async def get_all_users(self, skip: int = 0, limit: int = 100) -> list[UserSchema]:
-        """Get multiple users with pagination"""
+    async def get_users_by_ids(self, db: AsyncSession, user_ids) -> dict[int, UserSchema]:
+        """Users by id; cached ones are served from the user cache, the rest with one IN query"""
+        users = {}
+        missing = set()
+        for user_id in set(user_ids):
+            cached = user_cache.get(("id", user_id))
+            if cached is not None:
+                users[user_id] = cached
+            else:
+                missing.add(user_id)
+        if missing:
+            result = await db.execute(select(User).where(User.id.in_(missing)))
+            for user in result.scalars().all():
+                schema = UserSchema(
+                    id=user.id,
+                    username=user.username,
+                    email=user.email,
+                    full_name=user.full_name,
+                    disabled=bool(user.disabled)
+                )
+                _cache_user(db, schema)
+                users[user.id] = schema
+        return users
+
+    async def get_all_users(self, db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None) -> list[UserSchema]:
+        """Get multiple users with pagination (offset, or keyset on id when a cursor is given)"""
 
+        query = select(User).order_by(User.id)
+        if cursor:
+            (after_id,) = decode_cursor(cursor, int)
+            query = query.where(User.id > after_id)
+        else:
+            query = query.offset(skip)
         try:
-            async for db in get_db_session():
-                result = await db.execute(select(User).offset(skip).limit(limit))
-                users = result.scalars().all()
-                return [
-                    UserSchema(
-                        id=user.id,
-                        username=user.username,
-                        email=user.email,
-                        full_name=user.full_name,
-                        disabled=bool(user.disabled)
-                    ) for user in users
-                ]
+            result = await db.execute(query.limit(limit))
+            users = result.scalars().all()
+            return [
+                UserSchema(
+                    id=user.id,
+                    username=user.username,
+                    email=user.email,
+                    full_name=user.full_name,
+                    disabled=bool(user.disabled)
+                ) for user in users
+            ]
         except Exception as e:
             logging.error(f"Error fetching all users: {e}")
             raise UserException(400, UserException.USER_SERVICE_ERROR)
 
-    async def create_user(self, username: str, email: str, full_name: str, password: str) -> UserSchema:
+    async def create_user(self, db: AsyncSession, username: str, email: str, full_name: str, password: str) -> UserSchema:
         """Create a new user"""
         
+        # hashing runs off the event loop; a full hashing queue surfaces as 503, not 400
+        hashed_password = await password_hasher.hash(password)
         # return proper error message if unique constraint or any other error occurs
         try:
-            async for db in get_db_session():
-                hashed_password = pwd_context.hash(password)
-                new_user = User(
-                    username=username,
-                    email=email,
-                    full_name=full_name,
-                    hashed_password=hashed_password,
-                    disabled=0
-                )
+            new_user = User(
+                username=username,
+                email=email,
+                full_name=full_name,
+                hashed_password=hashed_password,
+                disabled=0
+            )
             db.add(new_user)
-            await db.commit()
-            await db.refresh(new_user)
+            await db.flush()
+            _invalidate_user(db, new_user.id, new_user.username)
             return UserSchema(
                 id=new_user.id,
                 username=new_user.username,
@@ -83,8 +142,64 @@ class UserService:
             logging.error(f"Error creating user: {e}")
             raise UserException(400, UserException.USER_CREATION_FAILED)
 
+    async def bulk_create_users(
+        self, db: AsyncSession, items: list[tuple[int, UserCreate]]
+    ) -> tuple[dict[int, int], list[BulkItemError]]:
+        """Insert validated users in executemany batches; passwords are hashed in parallel
+
+        Hashing runs before the first statement, so the request holds no connection or
+        transaction while bcrypt works (at the cost of hashing passwords of users that
+        turn out to exist already).
+        """
+        errors = []
+        accepted = []
+        seen_usernames, seen_emails = set(), set()
+        for index, user in items:
+            if user.username in seen_usernames or user.email in seen_emails:
+                errors.append(BulkItemError(index=index, detail="Duplicate username or email in request"))
+                continue
+            seen_usernames.add(user.username)
+            seen_emails.add(user.email)
+            accepted.append((index, user))
+        hashed_passwords = dict(zip(
+            (index for index, _ in accepted),
+            await password_hasher.hash_many([user.password for _, user in accepted]),
+        ))
+
+        result = await db.execute(
+            select(User.username, User.email).where(or_(User.username.in_(seen_usernames), User.email.in_(seen_emails)))
+        )
+        taken_usernames, taken_emails = set(), set()
+        for username, email in result.all():
+            taken_usernames.add(username)
+            taken_emails.add(email)
+        errors += [
+            BulkItemError(index=index, detail=UserException.USER_ALREADY_EXISTS)
+            for index, user in accepted if user.username in taken_usernames or user.email in taken_emails
+        ]
+        accepted = [(index, user) for index, user in accepted if user.username not in taken_usernames and user.email not in taken_emails]
+
+        ids_by_index: dict[int, int] = {}
+        for batch in batched(accepted):
+            rows = [
+                {
+                    "username": user.username,
+                    "email": user.email,
+                    "full_name": user.full_name,
+                    "hashed_password": hashed_passwords[index],
+                    "disabled": 0,
+                }
+                for index, user in batch
+            ]
+            # new ids: nothing can be cached for them yet
+            user_ids = await insert_returning_ids(db, User, rows)
+            for (index, _), user_id in zip(batch, user_ids):
+                ids_by_index[index] = user_id
+        return ids_by_index, errors
+
     async def update_user(
         self,
+        db: AsyncSession,
         user_id: int,
         username: str = None,
         email: str = None,
@@ -92,61 +207,83 @@ class UserService:
         password: str = None,
         disabled: bool = None
     ) -> UserSchema | None:
-        """Update an existing user"""
+        """Update an existing user with a single UPDATE ... RETURNING"""
+        hashed_password = await password_hasher.hash(password) if password is not None else None
+        values = {}
+        if username is not None:
+            values["username"] = username
+        if email is not None:
+            values["email"] = email
+        if full_name is not None:
+            values["full_name"] = full_name
+        if password is not None:
+            values["hashed_password"] = hashed_password
+        if disabled is not None:
+            values["disabled"] = int(disabled)
         try:
-            async for db in get_db_session():
-                result = await db.execute(select(User).where(User.id == user_id))
-                user = result.scalars().first()
-                if not user:
+            old_username = None
+            if username is not None:
+                # RETURNING only has the new values; renames need the old name to invalidate its cache entry
+                result = await db.execute(select(User.username).where(User.id == user_id))
+                old_username = result.scalar()
+                if old_username is None:
                     return None
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(values or {User.id: User.id})
+                .returning(User)
+                .execution_options(populate_existing=True)
+            )
+            user = result.scalars().first()
+            if not user:
+                return None
 
-                if username is not None:
-                    user.username = username
-                if email is not None:
-                    user.email = email
-                if full_name is not None:
-                    user.full_name = full_name
-                if password is not None:
-                    user.hashed_password = pwd_context.hash(password)
-                if disabled is not None:
-                    user.disabled = int(disabled)
-                
-                await db.commit()
-                await db.refresh(user)
-                return UserSchema(
-                    id=user.id,
-                    username=user.username,
-                    email=user.email,
-                    full_name=user.full_name,
-                    disabled=bool(user.disabled)
-                )
+            _invalidate_user(db, user.id, *filter(None, {user.username, old_username}))
+            return UserSchema(
+                id=user.id,
+                username=user.username,
+                email=user.email,
+                full_name=user.full_name,
+                disabled=bool(user.disabled)
+            )
         except Exception as e:
             logging.error(f"Error updating user: {e}")
             raise UserException(400, UserException.USER_UPDATE_FAILED)
 
-    async def delete_user(self, user_id: int) -> bool:
-        """Delete a user by ID"""
+    async def delete_user(self, db: AsyncSession, user_id: int) -> bool:
+        """Delete a user by ID with a single DELETE ... RETURNING"""
         try: 
-            async for db in get_db_session():
-                result = await db.execute(select(User).where(User.id == user_id))
-                user = result.scalars().first()
-                if not user:
-                    return False
-                await db.delete(user)
-                await db.commit()
-                return True
+            result = await db.execute(delete(User).where(User.id == user_id).returning(User.username))
+            username = result.scalar()
+            if username is None:
+                return False
+            # SQLite does not enforce ON DELETE CASCADE unless foreign keys are enabled
+            await db.execute(delete(UserRole).where(UserRole.user_id == user_id))
+            _invalidate_user(db, user_id, username)
+            return True
         except Exception as e:
             logging.error(f"Error deleting user: {e}")
             raise UserException(400, UserException.USER_DELETION_FAILED)
 
-    async def check_if_user_exists(self, user_id: int) -> User | None:
+    async def check_if_user_exists(self, db: AsyncSession, user_id: int) -> UserSchema | None:
         """Check if a user exists by ID"""
-        async for db in get_db_session():
-            result = await db.execute(select(User).where(User.id == user_id))
-            return result.scalars().first()
-        async for db in get_db_session():
-            result = await db.execute(select(User).where(User.id == user_id))
-            return result.scalars().first()
+        cached = user_cache.get(("id", user_id))
+        if cached is not None:
+            return cached
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if not user:
+            return None
+        schema = UserSchema(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            disabled=bool(user.disabled)
+        )
+        _cache_user(db, schema)
+        return schema
 
 
 # Create singleton instance
@@ -0,0 +1,35 @@
+# Helpers shared by the test modules
+from contextlib import contextmanager
+from typing import Any, Iterator, NamedTuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class CapturedStatement(NamedTuple):
+    sql: str
+    parameters: Any
+    executemany: bool
+
+
+@contextmanager
+def capture_statements(db: AsyncSession) -> Iterator[list[CapturedStatement]]:
+    """Every statement sent to `db`'s engine inside the block, in order"""
+    statements: list[CapturedStatement] = []
+    engine = db.bind.sync_engine
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(CapturedStatement(statement, parameters, executemany))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def bearer(*roles: str, user_id: int = 1, username: str = "tester") -> dict:
+    """Authorization header with a locally signed token; permissions compile from `roles`"""
+    from src.modules.auth.services import auth_service
+
+    token = auth_service.create_access_token({"sub": username, "uid": user_id, "roles": list(roles)})
+    return {"Authorization": f"Bearer {token}"}
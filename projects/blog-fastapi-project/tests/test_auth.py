@@ -0,0 +1,131 @@
+# Python unit test to test auth services
+import os
+
+# CRITICAL: Set test environment BEFORE any imports that might use the database
+os.environ["FASTAPI_ENV"] = "test"
+
+from datetime import timedelta
+import pytest
+from sqlalchemy import delete, select
+from src.core.cache import clear_caches
+from src.core.db_connection import init_db, session_scope
+from src.modules.auth import services as auth_services
+from src.modules.auth.bootstrap import grant_bootstrap_admin
+from src.modules.auth.enums import Permission
+from src.modules.auth.models import Role, RolePermission, UserRole
+from src.modules.auth.services import AuthService, token_cache
+from src.modules.user.models import User
+
+
+@pytest.fixture(autouse=True)
+def clean_token_cache():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+def test_decode_access_token_caches_verified_claims(monkeypatch):
+    auth_service = AuthService()
+    token = auth_service.create_access_token({"sub": "alice"})
+
+    calls = 0
+    real_decode = auth_services.jwt.decode
+    def counting_decode(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real_decode(*args, **kwargs)
+    monkeypatch.setattr(auth_services.jwt, "decode", counting_decode)
+
+    for _ in range(3):
+        assert auth_service.decode_access_token(token)["sub"] == "alice"
+    assert calls == 1
+    assert auth_service.decode_access_token(token + "x") is None
+    assert auth_service.decode_access_token(auth_service.create_access_token({"sub": "bob"}, timedelta(seconds=-1))) is None
+    assert len(token_cache._entries) == 1
+
+
+def test_revocation_overrides_cached_claims():
+    auth_service = AuthService()
+    token = auth_service.create_access_token({"sub": "alice"})
+    other = auth_service.create_access_token({"sub": "bob"})
+    assert auth_service.decode_access_token(token)
+
+    auth_service.revoke_token(token)
+    assert auth_service.decode_access_token(token) is None
+
+    assert auth_service.decode_access_token(other)
+    auth_service.revocation_check = lambda claims: claims["sub"] == "bob"
+    assert auth_service.decode_access_token(other) is None
+
+
+@pytest.mark.asyncio
+async def test_permissions_compile_into_token_and_follow_role_changes():
+    await init_db()
+    auth_service = AuthService()
+    async with session_scope() as db:
+        await db.execute(delete(UserRole))
+        await db.execute(delete(User))
+        user = User(username="roleuser", email="roleuser@example.com", full_name="Role User")
+        db.add(user)
+        await db.flush()
+        await auth_service.set_role_permissions(db, "editor", ["POSTS_CREATE", "POSTS_EDIT_ANY"])
+        assert await auth_service.assign_role_to_user(db, user.id, "editor")
+        assert not await auth_service.assign_role_to_user(db, user.id, "no-such-role")
+        claims = await auth_service.build_token_claims(db, user)
+
+    assert claims["roles"] == ["editor"]
+    assert Permission(claims["perms"]) == Permission.POSTS_CREATE | Permission.POSTS_EDIT_ANY
+
+    try:
+        async with session_scope() as db:
+            # warm cache: the claims are trusted as issued
+            granted = await auth_service.get_permissions(db, claims)
+            assert auth_service.check_user_permission(granted, Permission.POSTS_EDIT_ANY)
+            assert not auth_service.check_user_permission(granted, Permission.POSTS_EDIT_ANY | Permission.ROLES_MANAGE)
+            await auth_service.set_role_permissions(db, "editor", ["POSTS_CREATE"])
+
+        async with session_scope() as db:
+            # the role changed after the token was issued: recompiled from the role names
+            granted = await auth_service.get_permissions(db, claims)
+            assert granted == Permission.POSTS_CREATE
+
+        with pytest.raises(auth_services.AuthException):
+            async with session_scope() as db:
+                await auth_service.set_role_permissions(db, "editor", ["NOT_A_PERMISSION"])
+    finally:
+        async with session_scope() as db:
+            await db.execute(delete(UserRole))
+            await db.execute(delete(User))
+            role_ids = (await db.execute(select(Role.id).where(Role.name == "editor"))).scalars().all()
+            await db.execute(delete(RolePermission).where(RolePermission.role_id.in_(role_ids)))
+            await db.execute(delete(Role).where(Role.name == "editor"))
+
+
+@pytest.mark.asyncio
+async def test_admin_role_only_comes_from_explicit_bootstrap():
+    await init_db()
+    auth_service = AuthService()
+    async with session_scope() as db:
+        await db.execute(delete(UserRole))
+        await db.execute(delete(User))
+        # an email that looks like the admin's grants nothing
+        user = User(username="admin1", email="admin1@example.com", full_name="Not An Admin")
+        db.add(user)
+        await db.flush()
+        assert (await auth_service.build_token_claims(db, user))["roles"] == []
+
+    try:
+        async with session_scope() as db:
+            await grant_bootstrap_admin(db, user.id)
+            await grant_bootstrap_admin(db, user.id)  # idempotent
+            claims = await auth_service.build_token_claims(db, user)
+        assert claims["roles"] == ["admin"]
+        assert Permission(claims["perms"]) == Permission.all()
+
+        with pytest.raises(auth_services.AuthException):
+            async with session_scope() as db:
+                await grant_bootstrap_admin(db, user.id + 1000)
+    finally:
+        async with session_scope() as db:
+            await db.execute(delete(UserRole))
+            await db.execute(delete(User))
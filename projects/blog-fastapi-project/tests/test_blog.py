@@ -0,0 +1,417 @@
+# Python unit test to test blog services
+import os
+
+# CRITICAL: Set test environment BEFORE any imports that might use the database
+os.environ["FASTAPI_ENV"] = "test"
+
+import httpx
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import clear_caches
+from src.core.db_connection import get_db_session, init_db, session_scope
+from src.modules.blog.enums import CommentApprovalStatus
+from src.modules.blog.exception import BlogException
+from src.modules.blog.models import BlogPost, Comment, Likes, PostTag, Tag
+from src.modules.blog.schemas import BlogPostCreate, BlogPostUpdate, CommentCreate, CommentUpdate, LikesCreate
+from src.modules.blog.services import BlogService
+from src.modules.user.models import User
+from src.core.pagination import InvalidCursorError, next_page_cursor
+from tests.helpers import bearer, capture_statements
+
+
+async def _delete_all():
+    async with session_scope() as db:
+        for model in (PostTag, Tag, Likes, Comment, BlogPost, User):
+            await db.execute(delete(model))
+    clear_caches()
+
+@pytest_asyncio.fixture(autouse=True)
+async def clean_database():
+    """Create tables and clean up blog data around each test"""
+    await init_db()
+    await _delete_all()
+    yield
+    await _delete_all()
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncSession:
+    async for session in get_db_session():
+        yield session
+
+@pytest_asyncio.fixture
+async def blog_service() -> BlogService:
+    return BlogService()
+
+@pytest_asyncio.fixture
+async def author(db_session: AsyncSession) -> User:
+    user = User(username="blogauthor", email="blogauthor@example.com", full_name="Blog Author")
+    db_session.add(user)
+    await db_session.flush()
+    return user
+
+@pytest.mark.asyncio
+async def test_list_posts_cursor_pages_match_offset_pages(db_session: AsyncSession, blog_service: BlogService, author: User):
+    for i in range(7):
+        await blog_service.create_post(db_session, BlogPostCreate(title=f"Post {i}", content="content", author_id=author.id))
+
+    offset_ids = [post.id for post in await blog_service.list_posts(db_session, skip=0, limit=7)]
+
+    cursor_ids = []
+    cursor = None
+    while True:
+        page = await blog_service.list_posts(db_session, limit=3, cursor=cursor)
+        cursor_ids.extend(post.id for post in page)
+        cursor = next_page_cursor(page, 3, "created_at", "id")
+        if cursor is None:
+            break
+    assert cursor_ids == offset_ids
+
+@pytest.mark.asyncio
+async def test_list_comments_cursor(db_session: AsyncSession, blog_service: BlogService, author: User):
+    post = await blog_service.create_post(db_session, BlogPostCreate(title="Post", content="content", author_id=author.id))
+    for i in range(5):
+        await blog_service.create_comment(db_session, CommentCreate(post_id=post.id, author_id=author.id, content=f"comment {i}"))
+
+    first = await blog_service.list_comments(db_session, post.id, limit=2)
+    second = await blog_service.list_comments(db_session, post.id, limit=2, cursor=next_page_cursor(first, 2, "created_at", "id"))
+    assert [c.content for c in first + second] == ["comment 0", "comment 1", "comment 2", "comment 3"]
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(db_session: AsyncSession, blog_service: BlogService):
+    with pytest.raises(InvalidCursorError):
+        await blog_service.list_posts(db_session, cursor="not-a-cursor")
+
+@pytest.mark.asyncio
+async def test_counters_follow_likes_and_comments(db_session: AsyncSession, blog_service: BlogService, author: User):
+    post = await blog_service.create_post(db_session, BlogPostCreate(title="Post", content="content", author_id=author.id))
+    await blog_service.like_post(db_session, LikesCreate(post_id=post.id, user_id=author.id))
+    comment = await blog_service.create_comment(db_session, CommentCreate(post_id=post.id, author_id=author.id, content="hi"))
+    await blog_service.create_comment(db_session, CommentCreate(post_id=post.id, author_id=author.id, content="again"))
+
+    assert await blog_service.count_likes(db_session, post.id) == 1
+    fetched = await blog_service.get_post(db_session, post.id)
+    assert (fetched.likes_count, fetched.comments_count) == (1, 2)
+
+    assert await blog_service.unlike_post(db_session, post.id, author.id)
+    assert await blog_service.delete_comment(db_session, comment.id)
+    fetched = await blog_service.get_post(db_session, post.id)
+    assert (fetched.likes_count, fetched.comments_count) == (0, 1)
+
+@pytest.mark.asyncio
+async def test_reconcile_counters_fixes_drift(db_session: AsyncSession, blog_service: BlogService, author: User):
+    posts = [
+        await blog_service.create_post(db_session, BlogPostCreate(title=f"Post {i}", content="content", author_id=author.id))
+        for i in range(3)
+    ]
+    await blog_service.create_comment(db_session, CommentCreate(post_id=posts[0].id, author_id=author.id, content="hi"))
+    await db_session.execute(update(BlogPost).where(BlogPost.id == posts[2].id).values(likes_count=42))
+
+    after_id, fixed = await blog_service.reconcile_counters(db_session, batch_size=2)
+    assert (after_id, fixed) == (posts[1].id, 0)
+    after_id, fixed = await blog_service.reconcile_counters(db_session, after_id=after_id, batch_size=2)
+    assert (after_id, fixed) == (posts[2].id, 1)
+    assert await blog_service.reconcile_counters(db_session, after_id=after_id, batch_size=2) == (None, 0)
+
+    await db_session.refresh(posts[2])
+    assert posts[2].likes_count == 0
+
+@pytest.mark.asyncio
+async def test_like_and_unlike_are_idempotent(db_session: AsyncSession, blog_service: BlogService, author: User):
+    post = await blog_service.create_post(db_session, BlogPostCreate(title="Post", content="content", author_id=author.id))
+    like = LikesCreate(post_id=post.id, user_id=author.id)
+
+    assert await blog_service.like_post(db_session, like) is True
+    assert await blog_service.like_post(db_session, like) is False
+    assert await blog_service.count_likes(db_session, post.id) == 1
+    assert len(await blog_service.list_likes(db_session, post.id)) == 1
+
+    assert await blog_service.unlike_post(db_session, post.id, author.id) is True
+    assert await blog_service.unlike_post(db_session, post.id, author.id) is False
+    assert await blog_service.count_likes(db_session, post.id) == 0
+
+@pytest.mark.asyncio
+async def test_list_posts_filters_by_tags(db_session: AsyncSession, blog_service: BlogService, author: User):
+    python = await blog_service.create_post(db_session, BlogPostCreate(title="A", content="c", tags=["python", "web"], author_id=author.id))
+    web = await blog_service.create_post(db_session, BlogPostCreate(title="B", content="c", tags=["web"], author_id=author.id))
+    await blog_service.create_post(db_session, BlogPostCreate(title="C", content="c", tags=["misc"], author_id=author.id))
+
+    both = await blog_service.list_posts(db_session, tags=["python", "web"])
+    assert [post.id for post in both] == [python.id]
+    either = await blog_service.list_posts(db_session, tags=["python", "web"], match_all_tags=False)
+    assert [post.id for post in either] == [python.id, web.id]
+
+    # updating tags keeps the index in sync
+    await blog_service.update_post(db_session, web.id, BlogPostUpdate(tags=["python", "web"]))
+    both = await blog_service.list_posts(db_session, tags=["python", "web"])
+    assert [post.id for post in both] == [python.id, web.id]
+
+@pytest.mark.asyncio
+async def test_search_posts_ranks_and_pages(db_session: AsyncSession, blog_service: BlogService, author: User):
+    title_hit = await blog_service.create_post(db_session, BlogPostCreate(title="Async SQLAlchemy", content="intro", author_id=author.id))
+    body_hit = await blog_service.create_post(db_session, BlogPostCreate(title="Notes", content="using sqlalchemy with fastapi", author_id=author.id))
+    await blog_service.create_post(db_session, BlogPostCreate(title="Other", content="nothing relevant", author_id=author.id))
+
+    results = await blog_service.search_posts(db_session, "sqlalchemy")
+    assert [r.id for r in results] == [title_hit.id, body_hit.id]
+    assert "<mark>" in results[1].snippet
+
+    first = await blog_service.search_posts(db_session, "sqlalch", limit=1)
+    second = await blog_service.search_posts(db_session, "sqlalch", limit=1, cursor=next_page_cursor(first, 1, "rank", "id"))
+    assert [r.id for r in first + second] == [title_hit.id, body_hit.id]
+
+    # edits and deletes flow into the index through triggers
+    await blog_service.update_post(db_session, body_hit.id, BlogPostUpdate(content="plain text"))
+    assert [r.id for r in await blog_service.search_posts(db_session, "sqlalchemy")] == [title_hit.id]
+    await blog_service.delete_post(db_session, title_hit.id)
+    assert await blog_service.search_posts(db_session, "sqlalchemy") == []
+
+@pytest.mark.asyncio
+async def test_post_cache_is_invalidated_by_writes(blog_service: BlogService):
+    from src.modules.blog.services import post_cache
+
+    async with session_scope() as db:
+        user = User(username="cacheauthor", email="cacheauthor@example.com", full_name="Cache Author")
+        db.add(user)
+        await db.flush()
+        post = await blog_service.create_post(db, BlogPostCreate(title="Cached", content="c", author_id=user.id))
+        # reads inside the writing transaction are not shared with other requests
+        await blog_service.get_post(db, post.id)
+        assert post_cache.get(post.id) is None
+
+    async with session_scope() as db:
+        first = await blog_service.get_post(db, post.id)
+        assert await blog_service.get_post(db, post.id) is first
+        await blog_service.like_post(db, LikesCreate(post_id=post.id, user_id=user.id))
+
+    async with session_scope() as db:
+        assert (await blog_service.get_post(db, post.id)).likes_count == 1
+        await blog_service.update_post(db, post.id, BlogPostUpdate(title="Renamed"))
+
+    async with session_scope() as db:
+        assert (await blog_service.get_post(db, post.id)).title == "Renamed"
+        await blog_service.delete_post(db, post.id)
+
+    async with session_scope() as db:
+        assert await blog_service.get_post(db, post.id) is None
+
+@pytest.mark.asyncio
+async def test_post_detail_uses_two_statements(db_session: AsyncSession, blog_service: BlogService, author: User):
+    post = await blog_service.create_post(db_session, BlogPostCreate(title="Post", content="content", author_id=author.id))
+    await blog_service.like_post(db_session, LikesCreate(post_id=post.id, user_id=author.id))
+    for content in ("first", "hidden", "second", "third"):
+        await blog_service.create_comment(db_session, CommentCreate(post_id=post.id, author_id=author.id, content=content))
+    await db_session.execute(
+        update(Comment).where(Comment.content != "hidden").values(approved=CommentApprovalStatus.APPROVED)
+    )
+    db_session.expunge_all()
+
+    with capture_statements(db_session) as statements:
+        detail = await blog_service.get_post_detail(db_session, post.id, comments_limit=2, viewer_id=author.id)
+
+    assert len(statements) == 2
+    assert (detail.author.username, detail.likes_count, detail.comments_count) == ("blogauthor", 1, 4)
+    assert [c.content for c in detail.top_comments] == ["first", "second"]
+    assert detail.top_comments[0].author.id == author.id
+    assert detail.liked_by_viewer is True
+    anonymous = await blog_service.get_post_detail(db_session, post.id, comments_limit=0)
+    assert (anonymous.top_comments, anonymous.liked_by_viewer) == ([], None)
+    assert await blog_service.get_post_detail(db_session, post.id + 1000) is None
+
+@pytest.mark.asyncio
+async def test_post_detail_viewer_comes_from_bearer_token(blog_service: BlogService):
+    from src.main import app
+    from src.modules.auth.services import auth_service
+
+    async with session_scope() as db:
+        viewer = User(username="viewer", email="viewer@example.com", full_name="Viewer")
+        db.add(viewer)
+        await db.flush()
+        post = await blog_service.create_post(db, BlogPostCreate(title="Post", content="content", author_id=viewer.id))
+        await blog_service.like_post(db, LikesCreate(post_id=post.id, user_id=viewer.id))
+    token = auth_service.create_access_token({"sub": viewer.username, "uid": viewer.id})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        url = f"/api/blogs/posts/{post.id}/detail"
+        assert (await client.get(url)).json()["liked_by_viewer"] is None
+        # the viewer can't be picked with a query parameter anymore
+        assert (await client.get(url, params={"current_user_id": viewer.id})).json()["liked_by_viewer"] is None
+        authorized = await client.get(url, headers={"Authorization": f"Bearer {token}"})
+        assert authorized.json()["liked_by_viewer"] is True
+        assert (await client.get(url, headers={"Authorization": "Bearer not-a-token"})).status_code == 401
+
+@pytest.mark.asyncio
+async def test_post_list_revalidates_on_etag_only(blog_service: BlogService):
+    from src.main import app
+    from src.core.http_cache import http_date
+
+    async with session_scope() as db:
+        author = User(username="lister", email="lister@example.com", full_name="Lister")
+        db.add(author)
+        await db.flush()
+        posts = [
+            await blog_service.create_post(db, BlogPostCreate(title=f"Post {i}", content="content", author_id=author.id))
+            for i in range(3)
+        ]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/api/blogs/posts/", params={"limit": 2})
+        assert "last-modified" not in first.headers
+        etag = first.headers["etag"]
+        assert (await client.get("/api/blogs/posts/", params={"limit": 2}, headers={"If-None-Match": etag})).status_code == 304
+        # If-Modified-Since can't see deletions, so lists ignore it
+        tomorrow = {"If-Modified-Since": http_date(datetime.utcnow() + timedelta(days=1))}
+        assert (await client.get("/api/blogs/posts/", params={"limit": 2}, headers=tomorrow)).status_code == 200
+
+        async with session_scope() as db:
+            assert await blog_service.delete_post(db, posts[0].id)
+        changed = await client.get("/api/blogs/posts/", params={"limit": 2}, headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_post_revalidation_sees_counter_changes(blog_service: BlogService):
+    from src.main import app
+    from src.core.http_cache import http_date
+
+    async with session_scope() as db:
+        author = User(username="counted", email="counted@example.com", full_name="Counted")
+        db.add(author)
+        await db.flush()
+        post = await blog_service.create_post(db, BlogPostCreate(title="Post", content="content", author_id=author.id))
+
+    url = f"/api/blogs/posts/{post.id}"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get(url)
+        assert first.json()["likes_count"] == 0 and "last-modified" not in first.headers
+        # likes and comments don't touch updated_at, so If-Modified-Since alone can't tell
+        since = {"If-Modified-Since": http_date(datetime.utcnow() + timedelta(days=1))}
+        async with session_scope() as db:
+            await blog_service.like_post(db, LikesCreate(post_id=post.id, user_id=author.id))
+        liked = await client.get(url, headers=since)
+        assert liked.status_code == 200 and liked.json()["likes_count"] == 1
+
+        async with session_scope() as db:
+            await blog_service.create_comment(db, CommentCreate(post_id=post.id, author_id=author.id, content="hi"))
+        commented = await client.get(url, headers={**since, "If-None-Match": liked.headers["etag"]})
+        assert commented.status_code == 200 and commented.json()["comments_count"] == 1
+        assert (await client.get(url, headers={"If-None-Match": commented.headers["etag"]})).status_code == 304
+
+@pytest.mark.asyncio
+async def test_owner_checked_writes_use_returning(db_session: AsyncSession, blog_service: BlogService, author: User):
+    post = await blog_service.create_post(db_session, BlogPostCreate(title="Post", content="content", author_id=author.id))
+    comment = await blog_service.create_comment(db_session, CommentCreate(post_id=post.id, author_id=author.id, content="hi"))
+    created_at = post.updated_at
+
+    with capture_statements(db_session) as statements:
+        updated = await blog_service.update_post(db_session, post.id, BlogPostUpdate(title="Renamed"), author_id=author.id)
+    assert len(statements) == 1 and "RETURNING" in statements[0].sql
+    assert updated.title == "Renamed" and updated.updated_at > created_at
+
+    other_id = author.id + 1000
+    with pytest.raises(BlogException) as exc_info:
+        await blog_service.update_post(db_session, post.id, BlogPostUpdate(title="Stolen"), author_id=other_id)
+    assert exc_info.value.status_code == 403
+    with pytest.raises(BlogException):
+        await blog_service.delete_comment(db_session, comment.id, author_id=other_id)
+    assert await blog_service.update_comment(db_session, comment.id + 1000, CommentUpdate(content="x"), author_id=author.id) is None
+
+    assert (await blog_service.update_comment(db_session, comment.id, CommentUpdate(content="edited"), author_id=author.id)).content == "edited"
+    assert await blog_service.delete_comment(db_session, comment.id, author_id=author.id)
+    assert (await blog_service.get_post(db_session, post.id)).comments_count == 0
+    assert await blog_service.delete_post(db_session, post.id, author_id=author.id)
+    assert not await blog_service.delete_post(db_session, post.id, author_id=author.id)
+
+@pytest.mark.asyncio
+async def test_bulk_create_posts_returns_ids_in_item_order(db_session: AsyncSession, blog_service: BlogService, author: User):
+    items = [
+        (0, BlogPostCreate(title="First", content="c", excerpt="e", tags=["bulk"], author_id=author.id)),
+        (1, BlogPostCreate(title="Orphan", content="c", author_id=author.id + 1000)),
+        (2, BlogPostCreate(title="Second", content="c", category="news", tags=["bulk", "more"], author_id=author.id)),
+    ]
+    ids_by_index, errors = await blog_service.bulk_create_posts(db_session, items)
+
+    assert [(e.index, e.detail) for e in errors] == [(1, "Author not found")]
+    assert (await blog_service.get_post(db_session, ids_by_index[0])).title == "First"
+    assert (await blog_service.get_post(db_session, ids_by_index[2])).title == "Second"
+    tagged = await blog_service.list_posts(db_session, tags=["bulk"])
+    assert [post.id for post in tagged] == [ids_by_index[0], ids_by_index[2]]
+
+@pytest.mark.asyncio
+async def test_bulk_create_comments_bumps_counters_in_one_statement(db_session: AsyncSession, blog_service: BlogService, author: User):
+    from src.core.metrics import start_request
+
+    post_ids, _ = await blog_service.bulk_create_posts(
+        db_session, [(i, BlogPostCreate(title=f"Post {i}", content="c", author_id=author.id)) for i in range(15)]
+    )
+    # the request-scoped N+1 check raises in test mode if each post got its own UPDATE
+    stats = start_request("POST /comments/bulk")
+    items = [(i, CommentCreate(post_id=post_id, author_id=author.id, content="c")) for i, post_id in post_ids.items()]
+    items.append((15, CommentCreate(post_id=post_ids[0], author_id=author.id, content="again")))
+    ids_by_index, errors = await blog_service.bulk_create_comments(db_session, items)
+
+    assert len(ids_by_index) == 16 and errors == []
+    assert sum(count for shape, count in stats.shapes.items() if shape.startswith("UPDATE blog_posts")) == 1
+    assert (await blog_service.get_post(db_session, post_ids[0])).comments_count == 2
+    assert (await blog_service.get_post(db_session, post_ids[14])).comments_count == 1
+
+@pytest.mark.asyncio
+async def test_stream_export_reads_partitions(monkeypatch, db_session: AsyncSession, blog_service: BlogService, author: User):
+    from src.core.config import settings
+    from src.core.export import encode_ndjson
+
+    monkeypatch.setattr(settings, "export_yield_per", 2)
+    for i in range(5):
+        await blog_service.create_post(db_session, BlogPostCreate(title=f"Post {i}", content="content", author_id=author.id))
+
+    columns, partitions = await blog_service.stream_export(db_session, "posts")
+    chunks = [chunk async for chunk in encode_ndjson(columns, partitions)]
+    assert len(chunks) == 3  # 2 + 2 + 1 rows
+    assert "".join(chunks).count("\n") == 5
+
+    future = datetime.utcnow() + timedelta(days=1)
+    columns, partitions = await blog_service.stream_export(db_session, "posts", updated_since=future)
+    assert [rows async for rows in partitions] == []
+
+@pytest.mark.asyncio
+async def test_export_requires_data_export_permission(blog_service: BlogService):
+    from src.main import app
+
+    async with session_scope() as db:
+        author = User(username="exporter", email="exporter@example.com", full_name="Exporter")
+        db.add(author)
+        await db.flush()
+        await blog_service.create_post(db, BlogPostCreate(title="Post", content="content", author_id=author.id))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/api/blogs/export/posts")).status_code == 401
+        assert (await client.get("/api/blogs/export/posts", headers=bearer("author"))).status_code == 403
+        exported = await client.get("/api/blogs/export/posts", headers=bearer("admin"))
+    assert exported.status_code == 200 and exported.text.count("\n") == 1
+
+@pytest.mark.asyncio
+async def test_importer_resumes_from_checkpoint(tmp_path, capsys, db_session: AsyncSession, blog_service: BlogService, author: User):
+    import json
+    from src.modules.blog.importer import import_posts, save_checkpoint
+
+    await db_session.commit()
+    source = tmp_path / "posts.ndjson"
+    source.write_text("".join(
+        json.dumps({"title": f"Imported {i}", "content": "c", "tags": "one, two", "author_id": author.id}) + "\n"
+        for i in range(5)
+    ) + '{"title": "missing content"}\n')
+    checkpoint = str(tmp_path / "posts.checkpoint")
+
+    # pretend an earlier run committed the first two records
+    save_checkpoint(checkpoint, 2)
+    stats = await import_posts(str(source), batch_size=2, checkpoint=checkpoint, report_every=3600)
+    assert (stats.consumed, stats.imported, stats.rejected, stats.skipped) == (6, 3, 1, 2)
+    assert "skipping the first 2 records" in capsys.readouterr().out
+    # a finished import removes its checkpoint, so running it again starts from the top
+    assert not os.path.exists(checkpoint)
+
+    titles = [post.title for post in await blog_service.list_posts(db_session, tags=["one", "two"])]
+    assert titles == ["Imported 2", "Imported 3", "Imported 4"]
+    rerun = await import_posts(str(source), batch_size=10, checkpoint=checkpoint, report_every=3600)
+    assert (rerun.imported, rerun.skipped) == (5, 0)
@@ -44,5 +44,121 @@ async def test_connections():
     
     print("\n✅ All database connections working!")
 
+def test_engine_registry_reuses_engine_per_url():
+    from src.core.db_connection import get_engine, get_test_engine, get_pool_stats, TEST_DATABASE_URL
+
+    # Same URL -> same engine and pool for the whole process
+    assert get_engine() is get_engine()
+    assert get_test_engine() is get_engine(TEST_DATABASE_URL)
+
+    stats = get_pool_stats()
+    assert TEST_DATABASE_URL in stats
+    assert stats[TEST_DATABASE_URL]["checked_out"] == 0
+
+@pytest.mark.asyncio
+async def test_session_scope_commits_once_or_rolls_back():
+    from sqlalchemy import select
+    from src.core.database import Base
+    from src.core.db_connection import get_engine, session_scope
+    from src.modules.user.models import User
+
+    os.environ["FASTAPI_ENV"] = "test"
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # an error inside the unit of work discards everything it flushed
+    with pytest.raises(RuntimeError):
+        async with session_scope() as db:
+            db.add(User(username="uow-rollback", email="uow-rollback@example.com"))
+            await db.flush()
+            raise RuntimeError("boom")
+
+    async with session_scope() as db:
+        result = await db.execute(select(User).where(User.username == "uow-rollback"))
+        assert result.scalars().first() is None
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_are_applied_on_connect(tmp_path):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from src.core.db_connection import check_sqlite_pragmas, get_sqlite_pragmas, install_sqlite_pragmas
+
+    os.environ["FASTAPI_ENV"] = "test"
+    assert get_sqlite_pragmas()["synchronous"] == "OFF"
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pragmas.db")
+    pragmas = {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234, "temp_store": "MEMORY"}
+    install_sqlite_pragmas(engine, pragmas)
+    try:
+        assert await check_sqlite_pragmas(engine, pragmas) == {}
+        # values that didn't take effect are reported with the value actually in use
+        assert await check_sqlite_pragmas(engine, {"busy_timeout": 1}) == {"busy_timeout": (1, 1234)}
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_sessions_route_to_replicas(tmp_path):
+    import time
+    from starlette.requests import Request
+    from src.core.db_connection import PRIMARY_STICKY_COOKIE, get_database_url, get_read_db_session, replica_router
+
+    os.environ["FASTAPI_ENV"] = "test"
+    # plain SQLite files stand in for replicas; the last one can't be opened
+    replicas = [f"sqlite+aiosqlite:///{tmp_path}/replica{i}.db" for i in range(2)]
+    unreachable = f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db"
+
+    async def database_of(cookie: str | None = None) -> str:
+        headers = [(b"cookie", f"{PRIMARY_STICKY_COOKIE}={cookie}".encode())] if cookie else []
+        sessions = get_read_db_session(Request({"type": "http", "headers": headers}))
+        db = await anext(sessions)
+        await sessions.aclose()
+        return db.bind.url.render_as_string()
+
+    replica_router.configure(replicas + [unreachable])
+    try:
+        # the health check marks the unreachable replica down; requests never probe it
+        assert await replica_router.check() == {replicas[0]: True, replicas[1]: True, unreachable: False}
+        assert [await database_of() for _ in range(4)] == replicas * 2
+        # read-your-writes: a client that just wrote reads from the primary
+        assert await database_of(cookie=str(time.time() + 5)) == get_database_url()
+        # every replica down: reads use the primary
+        for replica in replicas:
+            replica_router.mark_down(replica)
+        assert await database_of() == get_database_url()
+    finally:
+        replica_router.configure([])
+
+@pytest.mark.asyncio
+async def test_replica_reads_do_not_fill_entity_caches(tmp_path):
+    from starlette.requests import Request
+    from src.core.cache import REPLICA_SESSION, clear_caches
+    from src.core.db_connection import get_engine, get_read_db_session, init_db, replica_router
+    from src.modules.blog.models import BlogPost
+    from src.modules.blog.services import blog_service, post_cache
+    from src.modules.user.models import User
+    from src.modules.user.services import user_cache, user_service
+
+    os.environ["FASTAPI_ENV"] = "test"
+    replica = f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+    await init_db(get_engine(replica))
+    async with get_engine(replica).begin() as conn:
+        await conn.execute(User.__table__.insert().values(id=1, username="lagging", email="lagging@example.com"))
+        await conn.execute(BlogPost.__table__.insert().values(id=1, title="Stale", content="Old row", author_id=1))
+
+    clear_caches()
+    replica_router.configure([replica])
+    try:
+        sessions = get_read_db_session(Request({"type": "http", "headers": []}))
+        db = await anext(sessions)
+        assert db.info[REPLICA_SESSION]
+        # served from the replica, but a lagging row must not outlive the next write
+        assert (await blog_service.get_post(db, 1)).title == "Stale"
+        assert (await user_service.get_users_by_ids(db, [1]))[1].username == "lagging"
+        await sessions.aclose()
+        assert post_cache.get(1) is None
+        assert user_cache.get(("id", 1)) is None
+    finally:
+        replica_router.configure([])
+        clear_caches()
+
 if __name__ == "__main__":
-    asyncio.run(test_connections())
\ No newline at end of file
+    asyncio.run(test_connections())
@@ -0,0 +1,26 @@
+# Python unit test for conditional GET helpers
+from datetime import datetime, timedelta
+from fastapi import Request
+from src.core.http_cache import http_date, is_not_modified, make_etag
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_if_none_match_compares_weakly_and_wins_over_if_modified_since():
+    etag = make_etag((1, datetime(2024, 1, 1), 0, 0))
+    assert etag == make_etag((1, datetime(2024, 1, 1), 0, 0))
+    assert etag != make_etag((1, datetime(2024, 1, 1), 1, 0))
+
+    modified = datetime(2024, 1, 1, 12, 0, 0, 500)
+    assert is_not_modified(_request(if_none_match=f'"other", {etag.removeprefix("W/")}'), etag, modified)
+    assert not is_not_modified(_request(if_none_match='"other"', if_modified_since=http_date(modified)), etag, modified)
+
+
+def test_if_modified_since_uses_second_resolution():
+    modified = datetime(2024, 1, 1, 12, 0, 0, 500)
+    assert is_not_modified(_request(if_modified_since=http_date(modified)), "x", modified)
+    assert not is_not_modified(_request(if_modified_since=http_date(modified - timedelta(seconds=1))), "x", modified)
+    assert not is_not_modified(_request(if_modified_since="garbage"), "x", modified)
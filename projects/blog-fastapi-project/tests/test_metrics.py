@@ -0,0 +1,83 @@
+# Python unit test for request/query metrics and the /api/metrics endpoint
+import os
+
+# CRITICAL: Set test environment BEFORE any imports that might use the database
+os.environ["FASTAPI_ENV"] = "test"
+
+import httpx
+import pytest
+from src.core.db_connection import init_db
+from src.core.metrics import RequestStats, record_request, render_metrics, reset_metrics, route_template
+from tests.helpers import bearer
+
+
+def test_render_metrics_in_prometheus_text_format():
+    reset_metrics()
+    record_request("GET", "/api/blogs/posts/{post_id}", 200, 0.003, RequestStats(queries=2, db_seconds=0.001))
+    record_request("GET", "/api/blogs/posts/{post_id}", 404, 0.2, RequestStats(queries=1, db_seconds=0.0005))
+    text = render_metrics({"sqlite:///x.db": {"size": 5, "checked_out": 1, "checked_in": 4, "overflow": None}})
+    lines = text.splitlines()
+    labels = 'method="GET",route="/api/blogs/posts/{post_id}"'
+
+    assert f'http_requests_total{{{labels},status="200"}} 1' in lines
+    assert f'http_requests_total{{{labels},status="404"}} 1' in lines
+    # buckets are cumulative and end with +Inf == count
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert f"http_request_db_queries_sum{{{labels}}} 3.0" in lines
+    assert 'db_pool_checked_out{database="sqlite:///x.db"} 1' in lines
+    assert not any(line.startswith("db_pool_overflow{") for line in lines)
+    assert text.endswith("\n")
+    reset_metrics()
+
+
+def test_route_template_adds_include_prefix():
+    class Route:
+        path_format = "/blogs/posts/{post_id}"
+
+    assert route_template({"route": Route(), "path": "/api/blogs/posts/7"}) == "/api/blogs/posts/{post_id}"
+    Route.path_format = "/api/blogs/posts/{post_id}"
+    assert route_template({"route": Route(), "path": "/api/blogs/posts/7"}) == "/api/blogs/posts/{post_id}"
+    assert route_template({"path": "/nope/123"}) == "unmatched"
+
+
+@pytest.mark.asyncio
+async def test_requests_record_latency_and_queries_per_route():
+    from src.main import app
+
+    await init_db()
+    reset_metrics()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/blogs/posts/", params={"limit": 2})
+        assert response.status_code == 200
+        assert 'db;dur=' in response.headers["server-timing"]
+        assert (await client.get("/api/blogs/posts/999999")).status_code == 404
+        assert (await client.get("/api/metrics")).status_code == 401
+        assert (await client.get("/api/metrics", headers=bearer("author"))).status_code == 403
+        metrics = await client.get("/api/metrics", headers=bearer("monitoring"))
+
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = metrics.text.splitlines()
+    assert metrics.status_code == 200
+    assert 'http_requests_total{method="GET",route="/api/blogs/posts/",status="200"} 1' in lines
+    assert 'http_requests_total{method="GET",route="/api/blogs/posts/{post_id}",status="404"} 1' in lines
+    # the lookup ran at least one statement
+    queries = next(line for line in lines if line.startswith('http_request_db_queries_bucket{method="GET",route="/api/blogs/posts/{post_id}",le="0"}'))
+    assert queries.endswith(" 0")
+    assert any(line.startswith("db_pool_size{") for line in lines)
+    reset_metrics()
+
+
+@pytest.mark.asyncio
+async def test_operational_endpoints_require_ops_read():
+    from src.main import app
+
+    await init_db()
+    paths = ["/api/db/pool-stats", "/api/db/replicas", "/api/cache/stats", "/api/security/password-hash-stats"]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for path in paths:
+            assert (await client.get(path)).status_code == 401
+            assert (await client.get(path, headers=bearer("moderator"))).status_code == 403
+            assert (await client.get(path, headers=bearer("admin"))).status_code == 200
@@ -0,0 +1,99 @@
+# Python unit test for the slow-query log and repeated-statement (N+1) detection
+import os
+
+# CRITICAL: Set test environment BEFORE any imports that might use the database
+os.environ["FASTAPI_ENV"] = "test"
+
+import logging
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core import query_log
+from src.core.config import settings
+from src.core.db_connection import get_db_session, init_db
+from src.core.metrics import start_request
+from src.core.query_log import RepeatedStatementError, redact_parameters, statement_shape
+from src.modules.blog.services import BlogService
+from src.modules.user.models import User
+
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncSession:
+    await init_db()
+    async for session in get_db_session():
+        yield session
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT id FROM users\n WHERE id IN (?, ?, ?)") == "SELECT id FROM users WHERE id IN (?...)"
+    assert statement_shape("SELECT id FROM users WHERE id IN (?, ?)") == "SELECT id FROM users WHERE id IN (?...)"
+    assert statement_shape("SELECT ?, ?") == "SELECT ?, ?"
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_parameters_and_caller(db_session: AsyncSession, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="src.core.query_log"):
+        await BlogService().count_likes(db_session, 424242)
+    message = next(record.getMessage() for record in caplog.records if record.name == "src.core.query_log")
+    assert "from BlogService.count_likes (src/modules/blog/services.py:" in message
+    assert "FROM blog_posts" in message and "424242" in message
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0)
+    await BlogService().count_likes(db_session, 424242)
+    assert not [record for record in caplog.records if record.name == "src.core.query_log"]
+
+
+def test_redact_parameters_hides_credentials():
+    names = ["email", "hashed_password", "username"]
+    assert redact_parameters(("a@x", "$2b$hash", "a"), names) == ("a@x", "<redacted>", "a")
+    # executemany rows, and a multi-row INSERT repeating the binds per row
+    assert redact_parameters([("a@x", "h1", "a"), ("b@x", "h2", "b")], names) == [
+        ("a@x", "<redacted>", "a"), ("b@x", "<redacted>", "b")]
+    assert redact_parameters(("a@x", "h1", "a", "b@x", "h2", "b"), names) == (
+        "a@x", "<redacted>", "a", "b@x", "<redacted>", "b")
+    assert redact_parameters({"access_token": "t", "id": 1}) == {"access_token": "<redacted>", "id": 1}
+    # positional values without names are not logged at all
+    assert redact_parameters(("$2b$hash", 1)) == "<2 values>"
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_redacts_password_hashes(db_session: AsyncSession, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="src.core.query_log"):
+        await db_session.execute(insert(User).values(
+            username="slowlog", email="slowlog@example.com", hashed_password="$2b$12$insert-secret"))
+        await db_session.execute(
+            update(User).where(User.username == "slowlog").values(hashed_password="$2b$12$update-secret"))
+    await db_session.rollback()
+    messages = [record.getMessage() for record in caplog.records if record.name == "src.core.query_log"]
+    assert any("INSERT INTO users" in message for message in messages)
+    assert any("UPDATE users" in message and "'slowlog'" in message for message in messages)
+    assert not [message for message in messages if "secret" in message]
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_in_one_request_fail_in_test_mode(db_session: AsyncSession):
+    service = BlogService()
+    start_request("GET /loop")
+    for post_id in range(settings.n_plus_one_threshold):
+        await service.count_likes(db_session, post_id)
+    with pytest.raises(RepeatedStatementError, match="more than 10 times in GET /loop .* BlogService.count_likes"):
+        await service.count_likes(db_session, 99)
+    # a new request starts counting again
+    start_request("GET /loop")
+    await service.count_likes(db_session, 1)
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_warn_once_outside_test_mode(db_session: AsyncSession, monkeypatch, caplog):
+    monkeypatch.setattr(query_log, "is_strict", lambda: False)
+    service = BlogService()
+    start_request("GET /loop")
+    with caplog.at_level(logging.WARNING, logger="src.core.query_log"):
+        for post_id in range(settings.n_plus_one_threshold * 2 + 5):
+            await service.has_liked(db_session, post_id, 1)
+    warnings = [record.getMessage() for record in caplog.records if "repeated" in record.getMessage()]
+    assert len(warnings) == 1 and "BlogService.has_liked" in warnings[0]
@@ -0,0 +1,158 @@
+# EXPLAIN QUERY PLAN regression tests for the hot BlogService queries
+import os
+
+# CRITICAL: Set test environment BEFORE any imports that might use the database
+os.environ["FASTAPI_ENV"] = "test"
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import clear_caches
+from src.core.db_connection import get_db_session, init_db, session_scope
+from src.core.pagination import next_page_cursor
+from src.modules.blog.enums import CommentApprovalStatus, PostStatus
+from src.modules.blog.models import BlogPost, Comment, Likes, PostTag, Tag
+from src.modules.blog.schemas import BlogPostUpdate, CommentCreate, CommentUpdate, LikesCreate
+from src.modules.blog.services import BlogService
+from src.modules.user.models import User
+from src.modules.user.services import UserService
+from tests.helpers import capture_statements
+
+# tables big enough in production that a full scan of them is a regression
+HOT_TABLES = {"blog_posts", "comments", "likes", "post_tags", "tags", "users"}
+POSTS, COMMENTS_PER_POST = 60, 5
+
+
+async def _delete_all():
+    async with session_scope() as db:
+        for model in (PostTag, Tag, Likes, Comment, BlogPost, User):
+            await db.execute(delete(model))
+    clear_caches()
+
+@pytest_asyncio.fixture(autouse=True)
+async def clean_database():
+    await init_db()
+    await _delete_all()
+    yield
+    await _delete_all()
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncSession:
+    async for session in get_db_session():
+        yield session
+
+@pytest_asyncio.fixture
+async def seed(db_session: AsyncSession) -> dict:
+    """Two authors with posts, tags, comments and likes"""
+    service = BlogService()
+    users = [User(username=f"planner{i}", email=f"planner{i}@example.com", full_name=f"Planner {i}") for i in range(2)]
+    db_session.add_all(users)
+    await db_session.flush()
+    started = datetime(2024, 1, 1)
+    posts = [
+        {
+            "title": f"Post {i}", "content": "content", "author_id": users[i % 2].id, "status": PostStatus.PUBLISHED,
+            "created_at": started + timedelta(minutes=i), "updated_at": started + timedelta(minutes=i),
+        }
+        for i in range(POSTS)
+    ]
+    post_ids = (await db_session.execute(insert(BlogPost).returning(BlogPost.id), posts)).scalars().all()
+    await service._insert_post_tags(db_session, {post_id: ["python", "web"][: 1 + post_id % 2] for post_id in post_ids})
+    await db_session.execute(insert(Comment), [
+        {
+            "post_id": post_id, "author_id": users[n % 2].id, "content": f"comment {n}",
+            "approved": CommentApprovalStatus.APPROVED, "created_at": started + timedelta(seconds=n),
+        }
+        for post_id in post_ids for n in range(COMMENTS_PER_POST)
+    ])
+    await db_session.execute(insert(Likes), [{"post_id": post_id, "user_id": users[0].id} for post_id in post_ids])
+    await db_session.flush()
+    return {"service": service, "user_ids": [user.id for user in users], "post_ids": sorted(post_ids)}
+
+
+async def _query_plans(db: AsyncSession, call) -> list[tuple[str, list[str]]]:
+    """Run `call`, then EXPLAIN QUERY PLAN every single-row statement it issued"""
+    with capture_statements(db) as captured:
+        await call()
+    statements = [
+        (statement.sql, statement.parameters)
+        for statement in captured
+        if not statement.executemany and statement.sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH"))
+    ]
+    assert statements, "the call issued no statement"
+    connection = await db.connection()
+    plans = []
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plans.append((statement, [row[-1] for row in result.all()]))
+    return plans
+
+
+def _table_scans(plans: list[tuple[str, list[str]]], ordered_scan_ok: bool = False) -> list[str]:
+    """Plan lines that walk a whole hot table (or, unless `ordered_scan_ok`, a whole index of it)"""
+    scans = []
+    for statement, details in plans:
+        for detail in details:
+            words = detail.split()
+            if words[:1] != ["SCAN"] or words[1] not in HOT_TABLES:
+                continue
+            # "SCAN t USING INDEX ..." walks an index in ORDER BY order; fine when LIMIT stops it early
+            if ordered_scan_ok and "USING" in words:
+                continue
+            scans.append(f"{detail}  <-  {' '.join(statement.split())}")
+    return scans
+
+
+def _cursor_after(seed: dict, position: int) -> str:
+    started = datetime(2024, 1, 1)
+    post = BlogPost(id=seed["post_ids"][position], created_at=started + timedelta(minutes=position))
+    return next_page_cursor([post], 1, "created_at", "id")
+
+
+HOT_CALLS = {
+    "get_post": lambda s, db, seed: s.get_post(db, seed["post_ids"][5]),
+    "get_post_version": lambda s, db, seed: s.get_post_version(db, seed["post_ids"][5]),
+    "get_post_detail": lambda s, db, seed: s.get_post_detail(db, seed["post_ids"][5], viewer_id=seed["user_ids"][0]),
+    "list_posts": lambda s, db, seed: s.list_posts(db, skip=10, limit=10),
+    "list_posts_cursor": lambda s, db, seed: s.list_posts(db, limit=10, cursor=_cursor_after(seed, 20)),
+    "list_posts_by_author": lambda s, db, seed: s.list_posts(db, limit=10, author_id=seed["user_ids"][1]),
+    "list_posts_by_status": lambda s, db, seed: s.list_posts(db, limit=10, status=PostStatus.PUBLISHED),
+    "list_posts_all_tags": lambda s, db, seed: s.list_posts(db, limit=10, tags=["python", "web"]),
+    "list_posts_any_tag": lambda s, db, seed: s.list_posts(db, limit=10, tags=["web"], match_all_tags=False),
+    "list_post_versions": lambda s, db, seed: s.list_post_versions(db, limit=10, author_id=seed["user_ids"][0]),
+    "update_post": lambda s, db, seed: s.update_post(db, seed["post_ids"][3], BlogPostUpdate(tags=["python"]), author_id=seed["user_ids"][1]),
+    "delete_post": lambda s, db, seed: s.delete_post(db, seed["post_ids"][3], author_id=seed["user_ids"][1]),
+    "list_comments": lambda s, db, seed: s.list_comments(db, seed["post_ids"][7], limit=3),
+    "create_comment": lambda s, db, seed: s.create_comment(db, CommentCreate(post_id=seed["post_ids"][7], author_id=seed["user_ids"][0], content="x")),
+    "update_comment": lambda s, db, seed: s.update_comment(db, 1, CommentUpdate(content="x"), author_id=seed["user_ids"][0]),
+    "like_post": lambda s, db, seed: s.like_post(db, LikesCreate(post_id=seed["post_ids"][7], user_id=seed["user_ids"][1])),
+    "unlike_post": lambda s, db, seed: s.unlike_post(db, seed["post_ids"][7], seed["user_ids"][0]),
+    "has_liked": lambda s, db, seed: s.has_liked(db, seed["post_ids"][7], seed["user_ids"][0]),
+    "count_likes": lambda s, db, seed: s.count_likes(db, seed["post_ids"][7]),
+    "list_likes": lambda s, db, seed: s.list_likes(db, seed["post_ids"][7], limit=3),
+    "reconcile_counters": lambda s, db, seed: s.reconcile_counters(db, after_id=seed["post_ids"][10], batch_size=10),
+    "get_users_by_ids": lambda s, db, seed: UserService().get_users_by_ids(db, seed["user_ids"]),
+}
+# unfiltered first pages read the created_at index in order and stop at LIMIT
+ORDERED_SCAN_CALLS = {"list_posts"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(HOT_CALLS))
+async def test_hot_queries_use_indexes(name: str, db_session: AsyncSession, seed: dict):
+    plans = await _query_plans(db_session, lambda: HOT_CALLS[name](seed["service"], db_session, seed))
+    assert _table_scans(plans, ordered_scan_ok=name in ORDERED_SCAN_CALLS) == []
+
+
+@pytest.mark.asyncio
+async def test_table_scans_are_detected(db_session: AsyncSession, seed: dict):
+    # guard for the harness itself: a filter on an unindexed column must be reported
+    from sqlalchemy import select
+
+    async def unindexed():
+        await db_session.execute(select(BlogPost.id).where(BlogPost.title == "Post 1"))
+
+    scans = _table_scans(await _query_plans(db_session, unindexed))
+    assert len(scans) == 1 and scans[0].startswith("SCAN blog_posts")
@@ -0,0 +1,54 @@
+# Python unit test for off-loop password hashing
+import asyncio
+import time
+import pytest
+from src.core.security import PasswordHasher, PasswordHasherBusyError
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_off_the_event_loop():
+    hasher = PasswordHasher(rounds=10, max_concurrency=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    hashed = await hasher.hash("password123")
+    task.cancel()
+    assert ticks > 1  # the loop kept running while bcrypt worked
+    assert await hasher.verify("password123", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.stats()["completed"] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_excess_work():
+    hasher = PasswordHasher(rounds=4, max_concurrency=1, queue_timeout_seconds=0.05)
+    # occupy the only slot with a slow job
+    slow = asyncio.create_task(hasher._run(time.sleep, 0.3))
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusyError):
+        await hasher.hash("password123")
+    await slow
+    assert hasher.stats()["timeouts"] == 1
+    assert await hasher.hash("password123")
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_timeouts_never_lose_permits():
+    hasher = PasswordHasher(rounds=4, max_concurrency=2, queue_timeout_seconds=0.01)
+    # many waiters time out while permits are released around their deadlines
+    results = await asyncio.gather(
+        *(hasher._run(time.sleep, 0.005 * (i % 4)) for i in range(40)), return_exceptions=True
+    )
+    assert all(result is None or isinstance(result, PasswordHasherBusyError) for result in results)
+    timeouts = sum(isinstance(result, PasswordHasherBusyError) for result in results)
+    assert 0 < timeouts < len(results) and hasher.stats()["timeouts"] == timeouts
+    assert hasher._get_semaphore()._value == 2 and hasher.stats()["in_progress"] == 0
+    hasher.shutdown()
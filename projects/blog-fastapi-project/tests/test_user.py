@@ -10,10 +10,13 @@ import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from src.modules.user import services as user_services
+from src.modules.user.loaders import UserSummaryLoader
 from src.modules.user.models import User
-from src.modules.user.schemas import UserSchema
+from src.modules.user.schemas import UserCreate, UserSchema
 from src.core.db_connection import get_db_session
+from src.core.cache import clear_caches
 from passlib.context import CryptContext
+from tests.helpers import capture_statements
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -37,6 +40,7 @@ async def clean_database():
         for user in users:
             await db.delete(user)
         await db.commit()
+    clear_caches()
     
     yield  # Run the test
     
@@ -58,51 +62,49 @@ async def db_session() -> AsyncSession:
 async def user_service() -> user_services.UserService:
     return user_services.UserService()
 @pytest.mark.asyncio
-async def test_create_user( user_service: user_services.UserService):
+async def test_create_user(db_session: AsyncSession, user_service: user_services.UserService):
     username = "testuser1"
     email = "testuser1@example.com"
     full_name = "Test User 1"
     password = "password123"
-    user = await user_service.create_user(username, email, full_name, password)
+    user = await user_service.create_user(db_session, username, email, full_name, password)
     assert user
     assert user.username == username
     assert user.email == email
     assert user.full_name == full_name
     assert user.disabled == False  # SQLite stores as 0/1 # New users should be enabled by default
     # Verify password is hashed
-    async for db in get_db_session():
-        result = await db.execute(select(User).where(User.id == user.id))
-        db_user = result.scalars().first()
-        assert db_user is not None
-        assert pwd_context.verify(password, db_user.hashed_password)
+    result = await db_session.execute(select(User).where(User.id == user.id))
+    db_user = result.scalars().first()
+    assert db_user is not None
+    assert pwd_context.verify(password, db_user.hashed_password)
 @pytest.mark.asyncio
-async def test_get_user( user_service: user_services.UserService):
+async def test_get_user(db_session: AsyncSession, user_service: user_services.UserService):
     # First, create a user to fetch
     username = "fetchuser1"
     email = "fetchuser1@example.com"
     full_name = "Fetch User 1"
     password = "password123"
-    user = await user_service.create_user(username, email, full_name, password)
+    user = await user_service.create_user(db_session, username, email, full_name, password)
     assert user
     assert user.username == username
     assert user.email == email
     assert user.full_name == full_name
     assert user.disabled == False  # SQLite stores as 0/1 # New users should be enabled by default
     # Verify password is hashed
-    async for db in get_db_session():
-        result = await db.execute(select(User).where(User.id == user.id))
-        db_user = result.scalars().first()
-        assert db_user is not None
-        assert pwd_context.verify(password, db_user.hashed_password)
+    result = await db_session.execute(select(User).where(User.id == user.id))
+    db_user = result.scalars().first()
+    assert db_user is not None
+    assert pwd_context.verify(password, db_user.hashed_password)
     # Now, fetch the user by username
-    fetched_user = await user_service.get_user(username)
+    fetched_user = await user_service.get_user(db_session, username)
     assert fetched_user is not None
     assert fetched_user.username == username
     assert fetched_user.email == email
     assert fetched_user.full_name == full_name
     assert user.disabled == False  # SQLite stores as 0/1
 @pytest.mark.asyncio
-async def test_get_all_users( user_service: user_services.UserService):
+async def test_get_all_users(db_session: AsyncSession, user_service: user_services.UserService):
     # Create multiple users
     users_data = [
         ("Testuser2", "user1@example.com", "User One", "password123"),
@@ -110,14 +112,14 @@ async def test_get_all_users( user_service: user_services.UserService):
         ("Testuser4", "user3@example.com", "User Three", "password123"),
     ]
     for username, email, full_name, password in users_data:
-        user = await user_service.create_user(username, email, full_name, password)
+        user = await user_service.create_user(db_session, username, email, full_name, password)
         assert user
         assert user.username == username
         assert user.email == email
         assert user.full_name == full_name
         assert user.disabled == False  # SQLite stores as 0/1
     # Now, fetch all users
-    all_users = await user_service.get_all_users()
+    all_users = await user_service.get_all_users(db_session)
     assert all_users is not None
     assert len(all_users) == len(users_data)
     for user, (username, email, full_name, password) in zip(all_users, users_data):
@@ -126,13 +128,13 @@ async def test_get_all_users( user_service: user_services.UserService):
         assert user.full_name == full_name
         assert user.disabled == False  # SQLite stores as 0/1
 @pytest.mark.asyncio
-async def test_update_user(user_service: user_services.UserService):
+async def test_update_user(db_session: AsyncSession, user_service: user_services.UserService):
     # First, create a user to update
     username = "Testupdateuser"
     email = "Testupdateuser@example.com"
     full_name = "Test Update User"
     password = "password123"
-    user = await user_service.create_user(username, email, full_name, password)
+    user = await user_service.create_user(db_session, username, email, full_name, password)
     assert user
     assert user.username == username
     assert user.email == email
@@ -141,54 +143,52 @@ async def test_update_user(user_service: user_services.UserService):
     # Now, update the user's information
     new_email = "new_updateuser@example.com"
     new_full_name = "New Update User"
-    updated_user = await user_service.update_user(user.id, email=new_email, full_name=new_full_name)
+    updated_user = await user_service.update_user(db_session, user.id, email=new_email, full_name=new_full_name)
     assert updated_user
     assert updated_user.id == user.id
     assert updated_user.email == new_email
     assert updated_user.full_name == new_full_name
     assert user.disabled == False  # SQLite stores as 0/1
     # Verify password remains unchanged
-    async for db in get_db_session():
-        result = await db.execute(select(User).where(User.id == user.id))
-        db_user = result.scalars().first()
-        assert db_user is not None
-        assert pwd_context.verify(password, db_user.hashed_password)
+    result = await db_session.execute(select(User).where(User.id == user.id))
+    db_user = result.scalars().first()
+    assert db_user is not None
+    assert pwd_context.verify(password, db_user.hashed_password)
 @pytest.mark.asyncio
-async def test_delete_user( user_service: user_services.UserService):
+async def test_delete_user(db_session: AsyncSession, user_service: user_services.UserService):
     # First, create a user to delete
     username = "Testdeleteuser"
     email = "Testdeleteuser@example.com"
     full_name = "Test Delete User"
     password = "password123"
-    user = await user_service.create_user(username, email, full_name, password)
+    user = await user_service.create_user(db_session, username, email, full_name, password)
     assert user
     assert user.username == username
     assert user.email == email
     assert user.full_name == full_name
     assert user.disabled == False  # SQLite stores as 0/1
     # Now, delete the user
-    deletion_result = await user_service.delete_user(user.id)
+    deletion_result = await user_service.delete_user(db_session, user.id)
     assert deletion_result is True  # delete_user returns boolean
     # Verify user is actually deleted
-    async for db in get_db_session():
-        result = await db.execute(select(User).where(User.id == user.id))
-        db_user = result.scalars().first()
-        assert db_user is None
+    result = await db_session.execute(select(User).where(User.id == user.id))
+    db_user = result.scalars().first()
+    assert db_user is None
 @pytest.mark.asyncio
-async def test_check_if_user_exists( user_service: user_services.UserService):
+async def test_check_if_user_exists(db_session: AsyncSession, user_service: user_services.UserService):
     # First, create a user to check
     username = "Testexistuser"
     email = "Testexistuser@example.com" # Corrected email
     full_name = "Test Exist User"
     password = "password123"
-    user = await user_service.create_user(username, email, full_name, password)
+    user = await user_service.create_user(db_session, username, email, full_name, password)
     assert user
     assert user.username == username
     assert user.email == email
     assert user.full_name == full_name
     assert user.disabled == False  # SQLite stores as 0/1
     # Now, check if the user exists
-    existing_user = await user_service.check_if_user_exists(user.id)
+    existing_user = await user_service.check_if_user_exists(db_session, user.id)
     assert existing_user is not None
     assert existing_user.id == user.id
     assert existing_user.username == username
@@ -196,9 +196,61 @@ async def test_check_if_user_exists( user_service: user_services.UserService):
     assert existing_user.full_name == full_name
     assert existing_user.disabled == False  # SQLite stores as 0/1, not True/False
     # Check for a non-existing user
-    non_existing_user = await user_service.check_if_user_exists(99999) # Assuming this ID doesn't exist
+    non_existing_user = await user_service.check_if_user_exists(db_session, 99999) # Assuming this ID doesn't exist
     assert non_existing_user is None
 
+@pytest.mark.asyncio
+async def test_bulk_create_users(db_session: AsyncSession, user_service: user_services.UserService):
+    await user_service.create_user(db_session, "Bulkexisting", "bulkexisting@example.com", "Existing", "password123")
+    items = [
+        (0, UserCreate(username="Bulkone", email="bulkone@example.com", full_name="One", password="password1")),
+        (1, UserCreate(username="Bulkexisting", email="other@example.com", full_name="Taken", password="password2")),
+        (2, UserCreate(username="Bulkone", email="bulkdup@example.com", full_name="Dup", password="password3")),
+        (3, UserCreate(username="Bulktwo", email="bulktwo@example.com", full_name="Two", password="password4")),
+    ]
+    ids_by_index, errors = await user_service.bulk_create_users(db_session, items)
+
+    assert sorted(ids_by_index) == [0, 3]
+    assert sorted(e.index for e in errors) == [1, 2]
+    result = await db_session.execute(select(User).where(User.id == ids_by_index[3]))
+    db_user = result.scalars().first()
+    assert db_user.username == "Bulktwo"
+    assert pwd_context.verify("password4", db_user.hashed_password)
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_hashes_outside_the_transaction(
+    db_session: AsyncSession, user_service: user_services.UserService, monkeypatch
+):
+    real_hash_many = user_services.password_hasher.hash_many
+
+    async def hash_many(passwords):
+        # bcrypt must not run while the session holds a connection (and SQLite's lock)
+        assert not db_session.in_transaction()
+        return await real_hash_many(passwords)
+
+    monkeypatch.setattr(user_services.password_hasher, "hash_many", hash_many)
+    items = [(0, UserCreate(username="Hashfirst", email="hashfirst@example.com", full_name="First", password="password1"))]
+    ids_by_index, errors = await user_service.bulk_create_users(db_session, items)
+    assert list(ids_by_index) == [0] and errors == []
+
+@pytest.mark.asyncio
+async def test_user_summary_loader_batches_lookups(db_session: AsyncSession):
+    users = [User(username=f"Loader{i}", email=f"loader{i}@example.com", full_name=f"Loader {i}") for i in range(3)]
+    db_session.add_all(users)
+    await db_session.flush()
+    ids = [user.id for user in users]
+
+    with capture_statements(db_session) as statements:
+        loader = UserSummaryLoader(db_session)
+        first = await loader.load_many([ids[0], ids[1], ids[0], 99999])
+        second = await loader.load_many(ids)
+
+    # one IN query for the first page, one for the single id not seen yet
+    assert len(statements) == 2
+    assert " IN " in statements[0].sql
+    assert first[ids[1]].username == "Loader1" and first[99999] is None
+    assert [second[user_id].full_name for user_id in ids] == ["Loader 0", "Loader 1", "Loader 2"]
+
 # Note: Database cleanup is handled automatically by the clean_database fixture
 
 # how to run the tests